@@ -0,0 +1,100 @@
+"""Compares the time spent serializing and deserializing Django items with
+django.core.serializers and with DjangoItemSerializer.
+
+Usage: python -m benchmarks.django_serializer [num_items]
+"""
+import tests.django.settings
+import django
+from django.conf import settings
+import json
+import sys
+import time
+import uuid
+
+
+def _setup_django():
+    all_settings = {
+        key: getattr(tests.django.settings, key)
+        for key in dir(tests.django.settings)
+        if not key.startswith("_")
+    }
+    settings.configure(**all_settings)
+    django.setup()
+
+
+def _legacy_serialize(item):
+    from django.core import serializers
+
+    data = json.loads(serializers.serialize("json", [item]))[0]
+    fields = data["fields"]
+    fields["id"] = data["pk"]
+    return json.dumps(dict(sorted(fields.items())))
+
+
+def _legacy_deserialize(serialization_result):
+    from django.core import serializers
+
+    raw_data = [
+        {
+            "model": "my_app.anothermodel",
+            "fields": json.loads(serialization_result.serialized_item),
+            "pk": serialization_result.item_id,
+        }
+    ]
+    return list(
+        serializers.deserialize(
+            "json", json.dumps(raw_data), ignorenonexistent=True
+        )
+    )[0].object
+
+
+def _measure(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main(num_items: "int"):
+    _setup_django()
+    from django.apps import apps
+    from maestro.backends.django import DjangoItemSerializer
+
+    Item = apps.get_model("my_app", "Item")
+    AnotherModel = apps.get_model("my_app", "AnotherModel")
+    items = [
+        AnotherModel(
+            id=uuid.uuid4(), item=Item(id=uuid.uuid4(), name="item", version="1")
+        )
+        for _ in range(num_items)
+    ]
+    serializer = DjangoItemSerializer()
+    results = [serializer.serialize_item(item=item, entity_name="") for item in items]
+
+    rows = [
+        (
+            "serialize",
+            _measure(_legacy_serialize, items),
+            _measure(
+                lambda item: serializer.serialize_item(item=item, entity_name=""),
+                items,
+            ),
+        ),
+        (
+            "deserialize",
+            _measure(_legacy_deserialize, results),
+            _measure(
+                lambda result: serializer.deserialize_item(
+                    serialization_result=result
+                ),
+                results,
+            ),
+        ),
+    ]
+    print(f"{'operation':<12}{'legacy (us)':>14}{'current (us)':>14}{'speedup':>10}")
+    for name, legacy, current in rows:
+        print(f"{name:<12}{legacy:>14.2f}{current:>14.2f}{legacy / current:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(num_items=int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -10,6 +10,8 @@ class CollectionType(enum.Enum):
     SYNC_SESSIONS = "sync_sessions"
     PROVIDER_IDS = "provider_ids"
     TRACKED_QUERIES = "tracked_queries"
+    CURRENT_ITEMS = "current_items"
+    RESUME_TOKENS = "resume_tokens"
 
 
 class VectorClockItemRecord(TypedDict):
@@ -39,6 +41,13 @@ class ItemVersionRecord(TypedDict):
     vector_clock: "List[VectorClockItemRecord]"
 
 
+class CurrentItemRecord(TypedDict):
+    id: "str"
+    item_change_id: "str"
+    inserted_timestamp: "Union[dt.datetime, float]"
+    serialized_item: "Dict"
+
+
 class ConflictLogRecord(TypedDict):
     id: "str"
     created_at: "Union[dt.datetime, float]"
@@ -60,6 +69,8 @@ class SyncSessionRecord(TypedDict):
     source_provider_id: "str"
     item_change_ids: "List[str]"
     query_id: "Optional[str]"
+    usage: "Dict[str, int]"
+    stats: "Dict[str, float]"
 
 class ComparisonRecord(TypedDict):
     type: "Literal['comparison']"
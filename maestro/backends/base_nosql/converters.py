@@ -82,6 +82,8 @@ class SyncSessionMetadataConverter(DataStoreAccessConverter):
             target_provider_id=record["target_provider_id"],
             item_changes=item_changes,
             query_id=record["query_id"],
+            usage=dict(record.get("usage", {})),
+            stats=dict(record.get("stats", {})),
         )
 
     def to_record(self, metadata_object: "SyncSession") -> "SyncSessionRecord":
@@ -99,6 +101,8 @@ class SyncSessionMetadataConverter(DataStoreAccessConverter):
             target_provider_id=metadata_object.target_provider_id,
             item_change_ids=item_change_ids,
             query_id=metadata_object.query_id,
+            usage=dict(metadata_object.usage),
+            stats=dict(metadata_object.stats),
         )
         return sync_session_record
 
@@ -7,6 +7,7 @@ from .converters import (
     ItemChangeMetadataConverter,
     ConflictLogMetadataConverter,
     VectorClockMetadataConverter,
+    TrackedQueryMetadataConverter,
 )
 from .serializer import DjangoItemSerializer
 
@@ -16,13 +16,19 @@ class ItemChangeRecordAdmin(admin.ModelAdmin):
         "item_id",
         "provider_id",
         "provider_timestamp",
-        "serialized_item",
+        "get_serialized_item",
         "should_ignore",
         "is_applied",
     )
+    list_select_related = ("content_type", "payload")
     ordering = ["-date_created"]
     search_fields = ["item_id", "operation"]
 
+    def get_serialized_item(self, obj: "ItemChangeRecord") -> "str":
+        return obj.get_serialized_item()
+
+    get_serialized_item.short_description = "Serialized item"  # type: ignore
+
 
 class ItemVersionRecordAdmin(admin.ModelAdmin):
     date_hierarchy = "date_created"
@@ -36,7 +42,41 @@ class SyncSessionRecordAdmin(admin.ModelAdmin):
         "status",
         "source_provider_id",
         "target_provider_id",
+        "get_num_batches",
+        "get_num_changes_applied",
+        "get_num_conflicts",
+        "get_num_deferred",
     )
+    readonly_fields = ("get_stage_seconds", "usage")
+
+    def get_num_batches(self, obj: "SyncSessionRecord") -> "int":
+        return int(obj.stats.get("batches", 0))
+
+    get_num_batches.short_description = "Batches"  # type: ignore
+
+    def get_num_changes_applied(self, obj: "SyncSessionRecord") -> "int":
+        return int(obj.stats.get("changes_applied", 0))
+
+    get_num_changes_applied.short_description = "Changes applied"  # type: ignore
+
+    def get_num_conflicts(self, obj: "SyncSessionRecord") -> "int":
+        return int(obj.stats.get("conflicts", 0))
+
+    get_num_conflicts.short_description = "Conflicts"  # type: ignore
+
+    def get_num_deferred(self, obj: "SyncSessionRecord") -> "int":
+        return int(obj.stats.get("deferred", 0))
+
+    get_num_deferred.short_description = "Deferred"  # type: ignore
+
+    def get_stage_seconds(self, obj: "SyncSessionRecord") -> "str":
+        return ", ".join(
+            "%s: %.3fs" % (key[: -len("_seconds")], value)
+            for key, value in sorted(obj.stats.items())
+            if key.endswith("_seconds")
+        )
+
+    get_stage_seconds.short_description = "Time per stage"  # type: ignore
 
 
 class ConflictLogRecordAdmin(admin.ModelAdmin):
@@ -1,10 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+from maestro.backends.django.settings import maestro_settings
+from maestro.backends.django.utils import model_registry
 from maestro.backends.django.contrib.signals import connect_signals
 
 
+def _clear_model_registry(**kwargs):
+    model_registry.clear()
+
+
 class DjangoBackendConfig(AppConfig):
     name = "maestro.backends.django"
     label = "maestro"
 
     def ready(self):
+        model_registry.register_models(app_models=maestro_settings.MODELS)
+        post_migrate.connect(
+            receiver=_clear_model_registry, dispatch_uid="maestro_clear_model_registry"
+        )
         connect_signals()
@@ -0,0 +1,159 @@
+from django.db import models, transaction
+from maestro.backends.django.contrib.factory import create_django_data_store
+from maestro.backends.django.store import ItemOperation
+from maestro.core.metadata import Operation
+from typing import (
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TYPE_CHECKING,
+)
+import functools
+import threading
+
+if TYPE_CHECKING:
+    from maestro.backends.django import DjangoDataStore
+
+
+class _BufferedOperation(NamedTuple):
+    first_operation: "Operation"
+    entity_name: "str"
+    item: "models.Model"
+
+
+class _ChangesBuffer:
+    """Stores the operations performed inside the outermost transaction.atomic block of a
+    connection so that their metadata is committed at once after the transaction is
+    committed. Multiple operations performed on the same item are merged into a single one.
+
+    Each operation registers a flush with transaction.on_commit, so Django discards the flush
+    along with the savepoint or the transaction that the operation was performed in if it's
+    rolled back. The first flush that runs therefore belongs to the first operation that was
+    committed, and it commits the operations performed from that one onwards. A later
+    savepoint that was rolled back can't be told apart, so the flush loads the items again
+    and records the state that was committed instead of the state seen by the signals. An
+    item that was only modified in such a savepoint gets a change with its unmodified state.
+    """
+
+    def __init__(self, using: "str"):
+        self.using = using
+        self.operations: "List[Tuple[Operation, str, models.Model]]" = []
+        self.is_flushed = False
+
+    def add(self, operation: "Operation", entity_name: "str", item: "models.Model"):
+        transaction.on_commit(
+            functools.partial(self.flush, start_idx=len(self.operations)),
+            using=self.using,
+        )
+        self.operations.append((operation, entity_name, item))
+
+    def get_item_operations(self, start_idx: "int" = 0) -> "List[ItemOperation]":
+        """Returns a single operation for each item, based on the first operation performed
+        on it and on whether it still exists.
+
+        Args:
+            start_idx (int, optional): Index of the first operation that wasn't rolled back.
+        """
+
+        buffered_operations: "Dict[Tuple[str, str], _BufferedOperation]" = {}
+        for operation, entity_name, item in self.operations[start_idx:]:
+            key = (entity_name, str(item.pk))
+            previous = buffered_operations.get(key)
+            buffered_operations[key] = _BufferedOperation(
+                first_operation=(
+                    operation if previous is None else previous.first_operation
+                ),
+                entity_name=entity_name,
+                item=item,
+            )
+
+        item_ids_by_model: "Dict[Type[models.Model], Set[Any]]" = {}
+        for buffered_operation in buffered_operations.values():
+            item = buffered_operation.item
+            item_ids_by_model.setdefault(type(item), set()).add(item.pk)
+
+        committed_items: "Dict[Tuple[Type[models.Model], str], models.Model]" = {}
+        for model, item_ids in item_ids_by_model.items():
+            for item in model._base_manager.using(self.using).filter(pk__in=item_ids):
+                committed_items[(model, str(item.pk))] = item
+
+        item_operations: "List[ItemOperation]" = []
+        for (entity_name, item_id), buffered_operation in buffered_operations.items():
+            existed = buffered_operation.first_operation != Operation.INSERT
+            committed_item = committed_items.get(
+                (type(buffered_operation.item), item_id)
+            )
+            if committed_item is not None:
+                operation = Operation.UPDATE if existed else Operation.INSERT
+                item = committed_item
+            elif existed:
+                operation = Operation.DELETE
+                item = buffered_operation.item
+            else:
+                # Inserted and deleted, or inserted in a savepoint that was rolled back
+                continue
+
+            item_operations.append(
+                ItemOperation(
+                    operation=operation,
+                    entity_name=entity_name,
+                    item_id=item_id,
+                    item=item,
+                )
+            )
+
+        return item_operations
+
+    def flush(self, start_idx: "int" = 0):
+        if self.is_flushed:
+            return
+
+        self.is_flushed = True
+        buffers = _get_buffers()
+        if buffers.get(self.using) is self:
+            del buffers[self.using]
+
+        item_operations = self.get_item_operations(start_idx=start_idx)
+        self.operations = []
+        if not item_operations:
+            return
+
+        data_store: "DjangoDataStore" = create_django_data_store()
+        with transaction.atomic():
+            data_store.commit_item_changes(item_operations=item_operations)
+
+
+_changes_buffers = threading.local()
+
+
+def _get_buffers() -> "Dict[str, _ChangesBuffer]":
+    if not hasattr(_changes_buffers, "items"):
+        _changes_buffers.items = {}
+    return _changes_buffers.items
+
+
+def get_changes_buffer(using: "str") -> "Optional[_ChangesBuffer]":
+    """Returns the buffer for the outermost transaction.atomic block currently open in the
+    given database or None if there's no transaction running.
+
+    Args:
+        using (str): The database alias.
+    """
+    connection = transaction.get_connection(using=using)
+    if not connection.in_atomic_block:
+        _get_buffers().pop(using, None)
+        return None
+
+    buffers = _get_buffers()
+    changes_buffer = buffers.get(using)
+    if changes_buffer is None:
+        # The buffer of a transaction that was rolled back is kept, since the flushes
+        # registered by the next transaction discard its operations
+        changes_buffer = _ChangesBuffer(using=using)
+        buffers[using] = changes_buffer
+    return changes_buffer
@@ -0,0 +1,177 @@
+from django.db import models, transaction
+from maestro.backends.django.settings import maestro_settings
+from maestro.backends.django.contrib.factory import create_django_data_store
+from maestro.backends.django.store import ItemOperation
+from maestro.backends.django.utils import model_to_entity_name
+from maestro.core.metadata import Operation
+from .middleware import _add_operation_to_queue
+from .buffer import get_changes_buffer
+from typing import Any, Dict, Type, List, Iterable, Optional, TYPE_CHECKING
+import copy
+
+if TYPE_CHECKING:
+    from maestro.backends.django import DjangoDataStore
+
+
+def _check_primary_keys(items: "List[models.Model]"):
+    for item in items:
+        if item.pk is None:
+            raise ValueError(
+                "Items must have their primary keys set to be synchronized!"
+            )
+
+
+def _check_bulk_create_options(options: "Dict[str, Any]"):
+    # The rows that conflict aren't inserted, so they can't be recorded as INSERTs
+    for option in ["ignore_conflicts", "update_conflicts"]:
+        if options.get(option):
+            raise ValueError(
+                f"bulk_create can't be synchronized with {option}=True!"
+            )
+
+
+def _commit_bulk_operation(
+    operation: "Operation", items: "List[models.Model]", using: "str"
+):
+    if not items:
+        return
+
+    entity_name = model_to_entity_name(items[0])
+    for item in items:
+        _add_operation_to_queue(operation=operation, item=item)
+
+    changes_buffer = (
+        get_changes_buffer(using=using)
+        if maestro_settings.BUFFER_SIGNAL_CHANGES
+        else None
+    )
+    if changes_buffer is not None:
+        for item in items:
+            changes_buffer.add(
+                operation=operation, entity_name=entity_name, item=copy.copy(item)
+            )
+        return
+
+    data_store: "DjangoDataStore" = create_django_data_store()
+    data_store.commit_item_changes(
+        item_operations=[
+            ItemOperation(
+                operation=operation,
+                entity_name=entity_name,
+                item_id=str(item.pk),
+                item=item,
+            )
+            for item in items
+        ]
+    )
+
+
+def bulk_create(
+    model: "Type[models.Model]", objs: "Iterable[models.Model]", **kwargs
+) -> "List[models.Model]":
+    """Runs the model's bulk_create and records the changes in bulk. The objects must have their
+    primary keys set before being created.
+
+    Args:
+        model (Type[models.Model]): The model whose objects are being created.
+        objs (Iterable[models.Model]): The objects being created.
+        **kwargs: Additional arguments passed to bulk_create. ignore_conflicts and
+            update_conflicts aren't supported.
+    """
+    queryset = model._default_manager.all()
+    objs = list(objs)
+    _check_primary_keys(items=objs)
+    _check_bulk_create_options(options=kwargs)
+    with transaction.atomic(using=queryset.db):
+        items = models.QuerySet.bulk_create(queryset, objs, **kwargs)
+        _commit_bulk_operation(
+            operation=Operation.INSERT, items=items, using=queryset.db
+        )
+    return items
+
+
+def bulk_update(
+    model: "Type[models.Model]",
+    objs: "Iterable[models.Model]",
+    fields: "List[str]",
+    **kwargs,
+) -> "Optional[int]":
+    """Runs the model's bulk_update and records the changes in bulk.
+
+    Args:
+        model (Type[models.Model]): The model whose objects are being updated.
+        objs (Iterable[models.Model]): The objects being updated.
+        fields (List[str]): The fields being updated.
+        **kwargs: Additional arguments passed to bulk_update.
+    """
+    queryset = model._default_manager.all()
+    objs = list(objs)
+    with transaction.atomic(using=queryset.db):
+        result = models.QuerySet.bulk_update(queryset, objs, fields, **kwargs)
+        _commit_bulk_operation(
+            operation=Operation.UPDATE, items=objs, using=queryset.db
+        )
+    return result
+
+
+def queryset_update(queryset: "models.QuerySet", **kwargs) -> "int":
+    """Runs QuerySet.update and records a change for each of the updated rows. The rows
+    are read again after the update so that the changes contain their final state.
+
+    Args:
+        queryset (models.QuerySet): The rows being updated.
+        **kwargs: The values passed to QuerySet.update.
+    """
+    with transaction.atomic(using=queryset.db):
+        pks = list(queryset.values_list("pk", flat=True))
+        count = models.QuerySet.update(queryset, **kwargs)
+        items = list(
+            queryset.model._default_manager.using(queryset.db).filter(pk__in=pks)
+        )
+        _commit_bulk_operation(
+            operation=Operation.UPDATE, items=items, using=queryset.db
+        )
+    return count
+
+
+class SyncQuerySet(models.QuerySet):
+    """A QuerySet whose bulk operations are recorded for synchronization."""
+
+    def bulk_create(self, objs, batch_size=None, **kwargs):
+        objs = list(objs)
+        _check_primary_keys(items=objs)
+        _check_bulk_create_options(options=kwargs)
+        with transaction.atomic(using=self.db):
+            items = super().bulk_create(objs, batch_size=batch_size, **kwargs)
+            _commit_bulk_operation(
+                operation=Operation.INSERT, items=items, using=self.db
+            )
+        return items
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            result = super().bulk_update(objs, fields, *args, **kwargs)
+            _commit_bulk_operation(
+                operation=Operation.UPDATE, items=objs, using=self.db
+            )
+        return result
+
+    def update(self, **kwargs):
+        return queryset_update(self, **kwargs)
+
+
+class SyncManagerMixin:
+    """Mixin for managers whose bulk operations must be recorded for synchronization.
+
+    Example:
+        class ItemManager(SyncManagerMixin, models.Manager):
+            pass
+    """
+
+    def get_queryset(self):
+        return SyncQuerySet(model=self.model, using=self._db, hints=self._hints)
+
+
+class SyncManager(SyncManagerMixin, models.Manager):
+    pass
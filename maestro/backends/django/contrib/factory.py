@@ -11,6 +11,7 @@ def create_django_data_store():
         item_change_metadata_converter=maestro_settings.DJANGO_PROVIDER.ITEM_CHANGE_METADATA_CONVERTER_CLASS(),
         conflict_log_metadata_converter=maestro_settings.DJANGO_PROVIDER.CONFLICT_LOG_METADATA_CONVERTER_CLASS(),
         vector_clock_metadata_converter=maestro_settings.DJANGO_PROVIDER.VECTOR_CLOCK_METADATA_CONVERTER_CLASS(),
+        tracked_query_metadata_converter=maestro_settings.DJANGO_PROVIDER.TRACKED_QUERY_METADATA_CONVERTER_CLASS(),
         item_serializer=maestro_settings.DJANGO_PROVIDER.ITEM_SERIALIZER_CLASS(),
     )
 
@@ -1,8 +1,14 @@
-from django.db import models
+from django.apps import apps as django_apps
+from django.apps.registry import Apps
+from django.db import connections, models, router, transaction
 from maestro.backends.django.contrib.factory import create_django_data_store
+from maestro.backends.django.converters import get_payload_hash
+from maestro.backends.django.settings import maestro_settings
 from maestro.backends.django.utils import model_to_entity_name
 from maestro.core.metadata import Operation
-from typing import Type, TYPE_CHECKING
+from typing import Type, List, TYPE_CHECKING
+import json
+import re
 
 if TYPE_CHECKING:
     from maestro.backends.django import DjangoDataStore
@@ -22,3 +28,181 @@ def commit_model_changes(model: "Type[models.Model]"):
             execute_operation=False,
         )
 
+
+
+def move_item_payloads(batch_size: "int" = 1000, apps: "Apps" = django_apps) -> "int":
+    """Moves the payloads of the existing changes to ItemPayloadRecord, which is where they're
+    stored when the STORE_PAYLOADS_SEPARATELY setting is enabled. Must be called after enabling
+    the setting, since the changes recorded before that keep their payloads inline. Each batch
+    is committed in its own transaction. Returns the number of changes updated.
+
+    Args:
+        batch_size (int, optional): Number of changes updated per transaction. Defaults to 1000.
+        apps (Apps, optional): The app registry, which must be given when called from a migration.
+    """
+    ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+    ItemPayloadRecord = apps.get_model("maestro", "ItemPayloadRecord")
+    num_moved = 0
+
+    while True:
+        with transaction.atomic():
+            records = list(
+                ItemChangeRecord.objects.filter(payload__isnull=True)
+                .only("id", "serialized_item")
+                .order_by("id")[:batch_size]
+            )
+            if not records:
+                break
+
+            payload_records = {}
+            for record in records:
+                payload_id = get_payload_hash(serialized_item=record.serialized_item)
+                payload_records[payload_id] = ItemPayloadRecord(
+                    id=payload_id, serialized_item=record.serialized_item
+                )
+                record.payload_id = payload_id
+                record.serialized_item = ""
+
+            ItemPayloadRecord.objects.bulk_create(
+                payload_records.values(), ignore_conflicts=True
+            )
+            ItemChangeRecord.objects.bulk_update(
+                records, fields=["payload", "serialized_item"]
+            )
+            num_moved += len(records)
+
+    return num_moved
+
+
+def inline_item_payloads(batch_size: "int" = 1000, apps: "Apps" = django_apps) -> "int":
+    """Stores the payloads of the existing changes in ItemChangeRecord again, undoing
+    move_item_payloads. Payloads no longer referenced by any change are deleted. Returns
+    the number of changes updated.
+
+    Args:
+        batch_size (int, optional): Number of changes updated per transaction. Defaults to 1000.
+        apps (Apps, optional): The app registry, which must be given when called from a migration.
+    """
+    ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+    ItemPayloadRecord = apps.get_model("maestro", "ItemPayloadRecord")
+    num_inlined = 0
+
+    while True:
+        with transaction.atomic():
+            records = list(
+                ItemChangeRecord.objects.filter(payload__isnull=False)
+                .select_related("payload")
+                .order_by("id")[:batch_size]
+            )
+            if not records:
+                break
+
+            for record in records:
+                record.serialized_item = record.payload.serialized_item
+                record.payload = None
+
+            ItemChangeRecord.objects.bulk_update(
+                records, fields=["payload", "serialized_item"]
+            )
+            num_inlined += len(records)
+
+    ItemPayloadRecord.objects.filter(itemchangerecord__isnull=True).delete()
+    return num_inlined
+
+
+def populate_item_data(batch_size: "int" = 1000, apps: "Apps" = django_apps) -> "int":
+    """Fills the JSONB copy of the serialized items of the existing changes, which is used to
+    filter queries when the JSONB_ITEM_DATA setting is enabled. Each batch is committed in its
+    own transaction. Returns the number of changes updated.
+
+    Args:
+        batch_size (int, optional): Number of changes updated per transaction. Defaults to 1000.
+        apps (Apps, optional): The app registry, which must be given when called from a migration.
+    """
+    ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+    num_populated = 0
+
+    while True:
+        with transaction.atomic():
+            records = list(
+                ItemChangeRecord.objects.filter(item_data__isnull=True)
+                .select_related("payload")
+                .order_by("id")[:batch_size]
+            )
+            if not records:
+                break
+
+            for record in records:
+                serialized_item = (
+                    record.payload.serialized_item
+                    if record.payload_id is not None
+                    else record.serialized_item
+                )
+                record.item_data = json.loads(serialized_item)
+
+            ItemChangeRecord.objects.bulk_update(records, fields=["item_data"])
+            num_populated += len(records)
+
+    return num_populated
+
+
+def _get_item_data_index_name(field_name: "str") -> "str":
+    return "maestro_item_data_" + re.sub(r"\W", "_", field_name)[:40]
+
+
+def create_item_data_indexes(field_names: "List[str]", using: "str" = "default"):
+    """Creates the PostgreSQL indexes used to filter queries by the JSONB copy of the
+    serialized items: a GIN index on the whole document, which is used for equality,
+    and an expression index for each of the given fields, which is used for ranges
+    and ordering.
+
+    Args:
+        field_names (List[str]): The item fields that need their own index.
+        using (str, optional): The database alias. Defaults to "default".
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS maestro_item_data_gin "
+            "ON maestro_itemchangerecord USING GIN (item_data jsonb_path_ops)"
+        )
+        for field_name in field_names:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {_get_item_data_index_name(field_name)} "
+                "ON maestro_itemchangerecord (content_type_id, (item_data -> %s))",
+                [field_name],
+            )
+
+
+def drop_item_data_indexes(field_names: "List[str]", using: "str" = "default"):
+    """Drops the indexes created by create_item_data_indexes.
+
+    Args:
+        field_names (List[str]): The item fields whose indexes were created.
+        using (str, optional): The database alias. Defaults to "default".
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS maestro_item_data_gin")
+        for field_name in field_names:
+            cursor.execute(
+                f"DROP INDEX IF EXISTS {_get_item_data_index_name(field_name)}"
+            )
+
+
+def setup_item_data(batch_size: "int" = 1000) -> "int":
+    """Prepares the database for the JSONB_ITEM_DATA setting: creates the indexes for the
+    fields in the JSONB_INDEXED_FIELDS setting and fills the JSONB copy of the changes
+    recorded before the setting was enabled. Must be called after enabling the setting and
+    whenever JSONB_INDEXED_FIELDS changes. Returns the number of changes updated.
+
+    Args:
+        batch_size (int, optional): Number of changes updated per transaction. Defaults to 1000.
+    """
+    ItemChangeRecord = django_apps.get_model("maestro", "ItemChangeRecord")
+    using = router.db_for_write(ItemChangeRecord)
+    if connections[using].vendor != "postgresql":
+        raise ValueError("The JSONB_ITEM_DATA setting requires PostgreSQL!")
+
+    create_item_data_indexes(
+        field_names=maestro_settings.JSONB_INDEXED_FIELDS, using=using
+    )
+    return populate_item_data(batch_size=batch_size)
@@ -1,17 +1,33 @@
 from django.apps import apps
 from django.db import models
 from django.db.models.signals import post_save, pre_delete
-from typing import Type, Optional, List, cast, TYPE_CHECKING
+from typing import Type, Optional, List, FrozenSet, cast, TYPE_CHECKING
 from maestro.backends.django.settings import maestro_settings
 from maestro.backends.django.contrib.factory import create_django_data_store
 from maestro.backends.django.utils import model_to_entity_name
 from maestro.core.metadata import Operation
 from .middleware import _add_operation_to_queue
+from .buffer import get_changes_buffer
+from contextvars import ContextVar, Token
 import copy
 
 if TYPE_CHECKING:
     from maestro.backends.django import DjangoDataStore
 
+# Labels of the models whose changes must not be tracked in the current context
+_suppressed_models: "ContextVar[FrozenSet[str]]" = ContextVar(
+    "maestro_suppressed_models", default=frozenset()
+)
+
+
+def _get_model_label(model: "Type[models.Model]") -> "str":
+    return cast("str", model._meta.concrete_model._meta.label_lower)
+
+
+def _is_suppressed(model: "Type[models.Model]") -> "bool":
+    suppressed_models = _suppressed_models.get()
+    return bool(suppressed_models) and _get_model_label(model) in suppressed_models
+
 
 def model_saved_signal(
     sender: "Type[models.Model]",
@@ -22,38 +38,67 @@ def model_saved_signal(
     update_fields: "Optional[List[str]]",
     **kwargs,
 ):
+    if _is_suppressed(model=sender):
+        return
+
     operation: "Operation"
     if created:
         operation = Operation.INSERT
     else:
         operation = Operation.UPDATE
 
-    data_store: "DjangoDataStore" = create_django_data_store()
     entity_name = model_to_entity_name(instance)
+    item = copy.deepcopy(instance)
+    changes_buffer = (
+        get_changes_buffer(using=using)
+        if maestro_settings.BUFFER_SIGNAL_CHANGES
+        else None
+    )
+    if changes_buffer is not None:
+        changes_buffer.add(operation=operation, entity_name=entity_name, item=item)
+        _add_operation_to_queue(operation=operation, item=item)
+        return
+
+    data_store: "DjangoDataStore" = create_django_data_store()
     data_store.commit_item_change(
         operation=operation,
         entity_name=entity_name,
         item_id=str(instance.pk),
-        item=copy.deepcopy(instance),
+        item=item,
         execute_operation=False,
     )
-    _add_operation_to_queue(operation=operation, item=copy.deepcopy(instance))
+    _add_operation_to_queue(operation=operation, item=item)
 
 
 def model_pre_delete_signal(
     sender: "Type[models.Model]", instance: "models.Model", using: "str", **kwargs
 ):
+    if _is_suppressed(model=sender):
+        return
 
-    data_store: "DjangoDataStore" = create_django_data_store()
     entity_name = model_to_entity_name(instance)
+    item = copy.deepcopy(instance)
+    changes_buffer = (
+        get_changes_buffer(using=using)
+        if maestro_settings.BUFFER_SIGNAL_CHANGES
+        else None
+    )
+    if changes_buffer is not None:
+        changes_buffer.add(
+            operation=Operation.DELETE, entity_name=entity_name, item=item
+        )
+        _add_operation_to_queue(operation=Operation.DELETE, item=item)
+        return
+
+    data_store: "DjangoDataStore" = create_django_data_store()
     data_store.commit_item_change(
         operation=Operation.DELETE,
         entity_name=entity_name,
         item_id=str(instance.pk),
-        item=copy.deepcopy(instance),
+        item=item,
         execute_operation=False,
     )
-    _add_operation_to_queue(operation=Operation.DELETE, item=copy.deepcopy(instance))
+    _add_operation_to_queue(operation=Operation.DELETE, item=item)
 
 
 def _connect_signal(model: "models.Model"):
@@ -79,35 +124,27 @@ def connect_signals():
         _connect_signal(model=model)
 
 
-def _disconnect_signal(model: "models.Model"):
-    full_label = (
-        cast("str", model._meta.app_label) + "_" + cast("str", model._meta.model_name)
-    )
-    post_save.disconnect(
-        receiver=model_saved_signal,
-        sender=model,
-        dispatch_uid=full_label + "_update_sync",
-    )
-    pre_delete.disconnect(
-        receiver=model_pre_delete_signal,
-        sender=model,
-        dispatch_uid=full_label + "_delete_sync",
-    )
-
-
 class _DisableSignalsContext:
     def __init__(self, model: "Type[models.Model]"):
         self.model = model
+        self.tokens: "List[Token]" = []
 
     def __enter__(self):
-        _disconnect_signal(model=self.model)
+        label = _get_model_label(model=self.model)
+        self.tokens.append(
+            _suppressed_models.set(_suppressed_models.get() | frozenset([label]))
+        )
 
     def __exit__(self, type, value, traceback):
-        label = self.model._meta.app_label + "." + self.model._meta.model_name
-        enabled_models = [label.lower() for label in maestro_settings.MODELS]
-        if label in enabled_models:
-            _connect_signal(model=self.model)
+        _suppressed_models.reset(self.tokens.pop())
 
 
 def temporarily_disable_signals(model: "Type[models.Model]"):
+    """Stops the changes made to the given model from being tracked while the context
+    is active. Only the current thread (or asyncio task) is affected, so the signals
+    remain connected for the rest of the process.
+
+    Args:
+        model (Type[models.Model]): The model whose changes shouldn't be tracked.
+    """
     return _DisableSignalsContext(model=model)
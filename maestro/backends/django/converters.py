@@ -1,4 +1,5 @@
 from django.apps import apps
+from django.db.models import prefetch_related_objects
 from maestro.core.utils import parse_datetime
 from maestro.core.utils import BaseMetadataConverter
 from maestro.core.metadata import (
@@ -14,9 +15,27 @@ from maestro.core.metadata import (
     Operation,
     SerializationResult,
 )
+from maestro.core.query.metadata import (
+    Query,
+    TrackedQuery,
+    Filter,
+    Comparison,
+    Comparator,
+    Connector,
+    SortOrder,
+)
+from .settings import maestro_settings
 import datetime as dt
-from .utils import entity_name_to_content_type, content_type_to_entity_name
-from typing import List, Dict, TYPE_CHECKING, cast, Optional
+import decimal
+import hashlib
+import json
+import uuid
+from .utils import (
+    entity_name_to_content_type,
+    content_type_id_to_entity_name,
+    use_jsonb_item_data,
+)
+from typing import Any, List, Dict, TYPE_CHECKING, cast, Optional, Union
 
 if TYPE_CHECKING:  # pragma: no cover
     from .models import (
@@ -24,9 +43,22 @@ if TYPE_CHECKING:  # pragma: no cover
         ItemVersionRecord,
         ItemChangeRecord,
         ConflictLogRecord,
+        TrackedQueryRecord,
     )
 
 
+def get_payload_hash(serialized_item: "str") -> "str":
+    """Returns the key used to store a payload out of line. Identical payloads share the same key."""
+    return hashlib.sha256(serialized_item.encode("utf-8")).hexdigest()
+
+
+def prefetch_payloads(item_change_records: "List[ItemChangeRecord]"):
+    """Loads with a single query the payloads of the given records that are stored out of line."""
+    records = [record for record in item_change_records if record.payload_id is not None]
+    if records:
+        prefetch_related_objects(records, "payload")
+
+
 class SyncSessionMetadataConverter(BaseMetadataConverter):
     def to_metadata(self, record: "SyncSessionRecord") -> "SyncSession":
         item_change_records = record.item_changes.all()
@@ -45,6 +77,8 @@ class SyncSessionMetadataConverter(BaseMetadataConverter):
             source_provider_id=record.source_provider_id,
             target_provider_id=record.target_provider_id,
             item_changes=item_changes,
+            usage=dict(record.usage),
+            stats=dict(record.stats),
         )
 
     def to_record(self, metadata_object: "SyncSession") -> "SyncSessionRecord":
@@ -56,6 +90,8 @@ class SyncSessionMetadataConverter(BaseMetadataConverter):
             status=metadata_object.status.value,
             source_provider_id=metadata_object.source_provider_id,
             target_provider_id=metadata_object.target_provider_id,
+            usage=dict(metadata_object.usage),
+            stats=dict(metadata_object.stats),
         )
         item_change_records: "List[ItemChangeRecord]" = []
         converter = ItemChangeMetadataConverter()
@@ -66,6 +102,19 @@ class SyncSessionMetadataConverter(BaseMetadataConverter):
         sync_session_record._item_changes = item_change_records
         return sync_session_record
 
+    def to_metadata_list(
+        self, records: "List[SyncSessionRecord]"
+    ) -> "List[SyncSession]":
+        prefetch_related_objects(records, "item_changes")
+        prefetch_payloads(
+            item_change_records=[
+                item_change_record
+                for record in records
+                for item_change_record in record.item_changes.all()
+            ]
+        )
+        return super().to_metadata_list(records=records)
+
 
 class ItemVersionMetadataConverter(BaseMetadataConverter):
     def to_metadata(self, record: "ItemVersionRecord") -> "ItemVersion":
@@ -100,6 +149,15 @@ class ItemVersionMetadataConverter(BaseMetadataConverter):
             date_created=metadata_object.date_created,
         )
 
+    def to_metadata_list(
+        self, records: "List[ItemVersionRecord]"
+    ) -> "List[ItemVersion]":
+        prefetch_related_objects(records, "current_item_change")
+        prefetch_payloads(
+            item_change_records=[record.current_item_change for record in records]
+        )
+        return super().to_metadata_list(records=records)
+
 
 class ItemChangeMetadataConverter(BaseMetadataConverter):
     def to_metadata(self, record: "ItemChangeRecord") -> "ItemChange":
@@ -112,11 +170,11 @@ class ItemChangeMetadataConverter(BaseMetadataConverter):
             provider_id=record.insert_provider_id,
             timestamp=record.insert_provider_timestamp,
         )
-        entity_name = content_type_to_entity_name(record.content_type)
+        entity_name = content_type_id_to_entity_name(record.content_type_id)
         serialization_result = SerializationResult(
             item_id=str(record.item_id),
             entity_name=entity_name,
-            serialized_item=record.serialized_item,
+            serialized_item=record.get_serialized_item(),
         )
         metadata_object = ItemChange(
             id=record.id,
@@ -140,7 +198,8 @@ class ItemChangeMetadataConverter(BaseMetadataConverter):
         content_type = entity_name_to_content_type(
             metadata_object.serialization_result.entity_name
         )
-        return ItemChangeRecord(
+        serialized_item = metadata_object.serialization_result.serialized_item
+        item_change_record = ItemChangeRecord(
             id=metadata_object.id,
             date_created=metadata_object.date_created,
             operation=metadata_object.operation.value,
@@ -150,12 +209,32 @@ class ItemChangeMetadataConverter(BaseMetadataConverter):
             provider_id=metadata_object.change_vector_clock_item.provider_id,
             insert_provider_timestamp=metadata_object.insert_vector_clock_item.timestamp,
             insert_provider_id=metadata_object.insert_vector_clock_item.provider_id,
-            serialized_item=metadata_object.serialization_result.serialized_item,
+            serialized_item=serialized_item,
             should_ignore=metadata_object.should_ignore,
             is_applied=metadata_object.is_applied,
             vector_clock=vector_clock,
         )
 
+        if use_jsonb_item_data():
+            item_change_record.item_data = json.loads(serialized_item)
+
+        item_change_record._payload = None
+        if maestro_settings.STORE_PAYLOADS_SEPARATELY:
+            ItemPayloadRecord = apps.get_model("maestro", "ItemPayloadRecord")
+            payload_record = ItemPayloadRecord(
+                id=get_payload_hash(serialized_item=serialized_item),
+                serialized_item=serialized_item,
+            )
+            item_change_record.serialized_item = ""
+            item_change_record.payload = payload_record
+            item_change_record._payload = payload_record
+
+        return item_change_record
+
+    def to_metadata_list(self, records: "List[ItemChangeRecord]") -> "List[ItemChange]":
+        prefetch_payloads(item_change_records=records)
+        return super().to_metadata_list(records=records)
+
 
 class ConflictLogMetadataConverter(BaseMetadataConverter):
     def to_metadata(self, record: "ConflictLogRecord") -> "ConflictLog":
@@ -182,6 +261,7 @@ class ConflictLogMetadataConverter(BaseMetadataConverter):
             status=ConflictStatus[record.status],
             conflict_type=ConflictType[record.conflict_type],
             description=record.description,
+            query_ids=list(record.query_ids),
         )
 
     def to_record(self, metadata_object: "ConflictLog") -> "ConflictLogRecord":
@@ -197,7 +277,22 @@ class ConflictLogMetadataConverter(BaseMetadataConverter):
             status=metadata_object.status.value,
             conflict_type=metadata_object.conflict_type.value,
             description=metadata_object.description,
+            query_ids=list(metadata_object.query_ids),
+        )
+
+    def to_metadata_list(
+        self, records: "List[ConflictLogRecord]"
+    ) -> "List[ConflictLog]":
+        prefetch_related_objects(records, "item_change_loser", "item_change_winner")
+        prefetch_payloads(
+            item_change_records=[record.item_change_loser for record in records]
+            + [
+                record.item_change_winner
+                for record in records
+                if record.item_change_winner_id is not None
+            ]
         )
+        return super().to_metadata_list(records=records)
 
 
 class VectorClockMetadataConverter(BaseMetadataConverter):
@@ -224,3 +319,144 @@ class VectorClockMetadataConverter(BaseMetadataConverter):
                 }
             )
         return items
+
+
+def _encode_comparison_value(value: "Any") -> "Dict":
+    """Converts a value used in a comparison to JSON, keeping its type so that the query
+    behaves the same after being loaded."""
+    if isinstance(value, (set, frozenset)):
+        return {"type": "set", "value": [_encode_comparison_value(v) for v in value]}
+    if isinstance(value, (list, tuple)):
+        return {"type": "list", "value": [_encode_comparison_value(v) for v in value]}
+    if isinstance(value, dt.datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    if isinstance(value, dt.date):
+        return {"type": "date", "value": value.isoformat()}
+    if isinstance(value, dt.time):
+        return {"type": "time", "value": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {"type": "decimal", "value": str(value)}
+    if isinstance(value, uuid.UUID):
+        return {"type": "uuid", "value": str(value)}
+    return {"type": "json", "value": value}
+
+
+def _decode_comparison_value(record: "Dict") -> "Any":
+    value_type = record["type"]
+    value = record["value"]
+    if value_type == "set":
+        return {_decode_comparison_value(v) for v in value}
+    if value_type == "list":
+        return [_decode_comparison_value(v) for v in value]
+    if value_type == "datetime":
+        return dt.datetime.fromisoformat(value)
+    if value_type == "date":
+        return dt.date.fromisoformat(value)
+    if value_type == "time":
+        return dt.time.fromisoformat(value)
+    if value_type == "decimal":
+        return decimal.Decimal(value)
+    if value_type == "uuid":
+        return uuid.UUID(value)
+    return value
+
+
+class SortOrderMetadataConverter(BaseMetadataConverter):
+    def to_metadata(self, record: "Dict") -> "SortOrder":
+        return SortOrder(
+            field_name=record["field_name"], descending=record["descending"]
+        )
+
+    def to_record(self, metadata_object: "SortOrder") -> "Dict":
+        return {
+            "field_name": metadata_object.field_name,
+            "descending": metadata_object.descending,
+        }
+
+
+class FilterMetadataConverter(BaseMetadataConverter):
+    def to_metadata(self, record: "Dict") -> "Filter":
+        children: "List[Union[Filter, Comparison]]" = []
+        for child in record["children"]:
+            if child["type"] == "filter":
+                children.append(self.to_metadata(record=child))
+            else:
+                children.append(
+                    Comparison(
+                        field_name=child["field_name"],
+                        comparator=Comparator(child["comparator"]),
+                        value=_decode_comparison_value(child["value"]),
+                    )
+                )
+
+        return Filter(connector=Connector[record["connector"]], children=children)
+
+    def to_record(self, metadata_object: "Filter") -> "Dict":
+        children: "List[Dict]" = []
+        for child in metadata_object.children:
+            if isinstance(child, Filter):
+                children.append(self.to_record(metadata_object=child))
+            else:
+                children.append(
+                    {
+                        "type": "comparison",
+                        "field_name": child.field_name,
+                        "comparator": child.comparator.value,
+                        "value": _encode_comparison_value(child.value),
+                    }
+                )
+
+        return {
+            "type": "filter",
+            "connector": metadata_object.connector.value,
+            "children": children,
+        }
+
+
+class QueryMetadataConverter(BaseMetadataConverter):
+    def to_metadata(self, record: "Dict") -> "Query":
+        filter_converter = FilterMetadataConverter()
+        sort_order_converter = SortOrderMetadataConverter()
+        return Query(
+            entity_name=record["entity_name"],
+            filter=filter_converter.to_metadata(record=record["filter"]),
+            ordering=sort_order_converter.to_metadata_list(records=record["ordering"]),
+            limit=record["limit"],
+            offset=record["offset"],
+        )
+
+    def to_record(self, metadata_object: "Query") -> "Dict":
+        filter_converter = FilterMetadataConverter()
+        sort_order_converter = SortOrderMetadataConverter()
+        return {
+            "entity_name": metadata_object.entity_name,
+            "filter": filter_converter.to_record(metadata_object=metadata_object.filter),
+            "ordering": [
+                sort_order_converter.to_record(metadata_object=sort_order)
+                for sort_order in metadata_object.ordering
+            ],
+            "limit": metadata_object.limit,
+            "offset": metadata_object.offset,
+        }
+
+
+class TrackedQueryMetadataConverter(BaseMetadataConverter):
+    def to_metadata(self, record: "TrackedQueryRecord") -> "TrackedQuery":
+        query_converter = QueryMetadataConverter()
+        vector_clock_converter = VectorClockMetadataConverter()
+        return TrackedQuery(
+            query=query_converter.to_metadata(record=record.query),
+            vector_clock=vector_clock_converter.to_metadata(record=record.vector_clock),
+        )
+
+    def to_record(self, metadata_object: "TrackedQuery") -> "TrackedQueryRecord":
+        TrackedQueryRecord = apps.get_model("maestro", "TrackedQueryRecord")
+        query_converter = QueryMetadataConverter()
+        vector_clock_converter = VectorClockMetadataConverter()
+        return TrackedQueryRecord(
+            id=metadata_object.query.get_id(),
+            query=query_converter.to_record(metadata_object=metadata_object.query),
+            vector_clock=vector_clock_converter.to_record(
+                metadata_object=metadata_object.vector_clock
+            ),
+        )
@@ -0,0 +1,49 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:15
+
+from django.db import migrations, models
+from maestro.backends.django.contrib.migrate import inline_item_payloads
+import django.db.models.deletion
+
+
+def reverse_func(apps, schema_editor):
+    inline_item_payloads(apps=apps)
+
+
+class Migration(migrations.Migration):
+    # Payloads are moved by calling contrib.migrate.move_item_payloads after enabling the
+    # STORE_PAYLOADS_SEPARATELY setting, so migrating doesn't depend on the settings. When
+    # unapplied, they're inlined again before ItemPayloadRecord is removed.
+    atomic = False
+
+    dependencies = [
+        ("maestro", "0002_sync_lock"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemPayloadRecord",
+            fields=[
+                (
+                    "id",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("serialized_item", models.TextField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="itemchangerecord",
+            name="serialized_item",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="itemchangerecord",
+            name="payload",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="maestro.itempayloadrecord",
+            ),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, reverse_func),
+    ]
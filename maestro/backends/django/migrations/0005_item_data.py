@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("maestro", "0003_item_payload_record"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="itemchangerecord",
+            name="item_data",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
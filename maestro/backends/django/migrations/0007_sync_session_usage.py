@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("maestro", "0005_item_data"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="syncsessionrecord",
+            name="usage",
+            field=models.JSONField(default=dict),
+        ),
+    ]
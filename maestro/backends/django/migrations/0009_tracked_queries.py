@@ -0,0 +1,29 @@
+# Generated by Django 3.1.14 on 2026-10-19 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("maestro", "0008_sync_session_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conflictlogrecord",
+            name="query_ids",
+            field=models.JSONField(default=list),
+        ),
+        migrations.CreateModel(
+            name="TrackedQueryRecord",
+            fields=[
+                (
+                    "id",
+                    models.CharField(max_length=200, primary_key=True, serialize=False),
+                ),
+                ("query", models.JSONField()),
+                ("vector_clock", models.JSONField(default=list)),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.1.14 on 2026-10-19 22:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def forwards_func(apps, schema_editor):
+    # The rows created by 0002_sync_lock don't hold any lease
+    SyncLockRecord = apps.get_model("maestro", "SyncLockRecord")
+    SyncLockRecord.objects.all().delete()
+
+
+def reverse_func(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("maestro", "0009_tracked_queries"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards_func, reverse_func),
+        migrations.AlterField(
+            model_name="synclockrecord",
+            name="key",
+            field=models.CharField(max_length=255, unique=True),
+        ),
+        migrations.AddField(
+            model_name="synclockrecord",
+            name="token",
+            field=models.CharField(default="", max_length=36),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="synclockrecord",
+            name="expires_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
-from typing import List
+from typing import List, Optional
 
 from maestro.core.metadata import (
     SyncSessionStatus,
@@ -11,6 +11,11 @@ from maestro.core.metadata import (
 )
 
 
+class ItemPayloadRecord(models.Model):
+    id = models.CharField(primary_key=True, max_length=64)  # SHA-256 of the payload
+    serialized_item = models.TextField(null=False)
+
+
 class ItemChangeRecord(models.Model):
     id = models.UUIDField(primary_key=True)
     date_created = models.DateTimeField(null=False)
@@ -29,19 +34,34 @@ class ItemChangeRecord(models.Model):
     provider_id = models.CharField(null=False, max_length=200)
     insert_provider_timestamp = models.DateTimeField(null=False)
     insert_provider_id = models.CharField(null=False, max_length=150)
-    serialized_item = models.TextField(null=False)
+    serialized_item = models.TextField(null=False, blank=True, default="")
+    payload = models.ForeignKey(
+        ItemPayloadRecord, null=True, blank=True, on_delete=models.PROTECT
+    )  # Set when the payload is stored out of line, in which case serialized_item is empty
+    item_data = models.JSONField(
+        null=True, blank=True
+    )  # Copy of the serialized item used for filtering queries on PostgreSQL (JSONB)
     should_ignore = models.BooleanField(null=False)
     is_applied = models.BooleanField(null=False)
     vector_clock = models.JSONField(
         default=list, null=False
     )  # [{"timestamp": "<timestamp in ISO 8601>", "provider_id": "<provider_id>"}]
 
+    _payload: "Optional[ItemPayloadRecord]"
+
     class Meta:
         ordering = ["date_created"]
 
+    def get_serialized_item(self) -> "str":
+        if self.payload_id is not None:
+            return self.payload.serialized_item
+        return self.serialized_item
+
 
 class SyncLockRecord(models.Model):
-    key = models.TextField()
+    key = models.CharField(max_length=255, unique=True)
+    token = models.CharField(max_length=36)
+    expires_at = models.DateTimeField()
 
 
 class ItemVersionRecord(models.Model):
@@ -111,11 +131,22 @@ class ConflictLogRecord(models.Model):
         ),
     )
     description = models.TextField(null=True)
+    query_ids = models.JSONField(
+        default=list, null=False
+    )  # Identifiers of the queries that tried to sync the losing change
 
     class Meta:
         ordering = ["created_at"]
 
 
+class TrackedQueryRecord(models.Model):
+    id = models.CharField(primary_key=True, max_length=200)  # Query.get_id()
+    query = models.JSONField(null=False)
+    vector_clock = models.JSONField(
+        default=list, null=False
+    )  # [{"timestamp": "<timestamp in ISO 8601>", "provider_id": "<provider_id>"}]
+
+
 class SyncSessionRecord(models.Model):
     id = models.UUIDField(primary_key=True)
     started_at = models.DateTimeField(null=False)
@@ -131,5 +162,7 @@ class SyncSessionRecord(models.Model):
     source_provider_id = models.TextField()
     target_provider_id = models.TextField()
     item_changes = models.ManyToManyField(ItemChangeRecord)
+    usage = models.JSONField(default=dict)
+    stats = models.JSONField(default=dict)
 
     _item_changes: "List[ItemChangeRecord]"
@@ -1,14 +1,47 @@
 from maestro.core.provider import BaseSyncProvider
 from maestro.core.metadata import ItemChangeBatch
 from maestro.core.query.metadata import Query
-from typing import Optional
+from django.db import DatabaseError
+from typing import Callable, List, Optional, TYPE_CHECKING
+import logging
+
+if TYPE_CHECKING:
+    from maestro.backends.django import DjangoDataStore
+
+logger = logging.getLogger(__name__)
 
 
 class DjangoSyncProvider(BaseSyncProvider):
+    data_store: "DjangoDataStore"
+
     def upload_changes(
         self, item_change_batch: "ItemChangeBatch", query: "Optional[Query]"
     ):
-        if query is not None:
-            raise ValueError("This backend doesn't support queries!")
+        if not item_change_batch.item_changes:
+            return
+
+        upload_changes = super().upload_changes
+        # The events are only published if the batch's transaction is committed
+        events: "List[Callable]" = []
+
+        def run_batch():
+            with self.events_manager.collect_events() as batch_events:
+                upload_changes(item_change_batch=item_change_batch, query=query)
+            events[:] = batch_events
+
+        try:
+            # The rows of the batch's items are locked together and stay locked until the
+            # whole batch is committed
+            self.data_store.run_batch_in_transaction(
+                item_changes=item_change_batch.item_changes, callback=run_batch,
+            )
+        except DatabaseError:
+            logger.warning(
+                "Failed to apply a batch of %d changes in a single transaction, applying each change separately.",
+                len(item_change_batch.item_changes),
+                exc_info=True,
+            )
+            upload_changes(item_change_batch=item_change_batch, query=query)
+            return
 
-        super().upload_changes(item_change_batch=item_change_batch, query=query)
+        self.events_manager.publish_events(events)
@@ -1,47 +1,135 @@
 from maestro.core.serializer import BaseItemSerializer
 from maestro.core.metadata import SerializationResult
 from django.db import models
-from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.encoding import is_protected_type
+from django.apps import apps
 import json
+from typing import Any, Dict, List, Tuple, Type
 from maestro.backends.django.utils import (
     app_model_to_entity_name,
     entity_name_to_app_model,
 )
 
+_FIELD = "field"
+_FOREIGN_KEY = "foreign_key"
+_MANY_TO_MANY = "many_to_many"
 
-class DjangoItemSerializer(BaseItemSerializer):
-    def serialize_item(self, item: "models.Model", entity_name: "str") -> "SerializationResult":
-        serialized_item = serializers.serialize("json", [item])
-        serialized_item = json.loads(serialized_item)
-        serialized_item = serialized_item[0]
-        app_model = serialized_item.pop("model")
-        entity_name = app_model_to_entity_name(app_model)
-        fields = serialized_item.pop("fields")
-        pk = serialized_item.pop("pk")
+
+def _value_from_field(item: "models.Model", field: "models.Field") -> "Any":
+    value = field.value_from_object(item)
+    # Same rule used by django.core.serializers: primitives are kept and other values are converted to strings.
+    return value if is_protected_type(value) else field.value_to_string(item)
+
+
+class _ModelCodec:
+    """Precomputed field information used to convert instances of a model to the same JSON
+    produced by django.core.serializers and back, without going through its generic machinery.
+    """
+
+    def __init__(self, model: "Type[models.Model]"):
+        self.model = model
+        self.app_model = str(model._meta)
+        self.entity_name = app_model_to_entity_name(self.app_model)
+        self.pk_field = model._meta.pk
+
+        concrete_model = model._meta.concrete_model
+        self.serialized_fields: "List[models.Field]" = [
+            field for field in concrete_model._meta.local_fields if field.serialize
+        ]
+        self.serialized_many_to_many: "List[models.Field]" = [
+            field
+            for field in concrete_model._meta.local_many_to_many
+            if field.serialize and field.remote_field.through._meta.auto_created
+        ]
+
+        self.deserialized_fields: "Dict[str, Tuple[str, Any]]" = {}
+        for field in model._meta.fields:
+            if isinstance(field.remote_field, models.ManyToOneRel):
+                self.deserialized_fields[field.name] = (_FOREIGN_KEY, field)
+            else:
+                self.deserialized_fields[field.name] = (_FIELD, field)
+
+        for field in model._meta.many_to_many:
+            self.deserialized_fields[field.name] = (_MANY_TO_MANY, field)
+
+    def serialize(self, item: "models.Model") -> "Tuple[Any, str]":
+        fields: "Dict[str, Any]" = {}
+        for field in self.serialized_fields:
+            fields[field.name] = _value_from_field(item=item, field=field)
+
+        for field in self.serialized_many_to_many:
+            fields[field.name] = [
+                _value_from_field(item=related, field=related._meta.pk)
+                for related in getattr(item, field.name).iterator()
+            ]
+
+        pk = _value_from_field(item=item, field=self.pk_field)
         fields["id"] = pk
         serialized_item = dict(sorted(fields.items()))
-        serialized_item_str = json.dumps(serialized_item)
+        serialized_item_str = json.dumps(serialized_item, cls=DjangoJSONEncoder)
+        return pk, serialized_item_str
+
+    def deserialize(self, item_id: "Any", serialized_item: "str") -> "models.Model":
+        data: "Dict[str, Any]" = {}
+        m2m_data: "Dict[str, List]" = {}
+        data[self.pk_field.attname] = self.pk_field.to_python(item_id)
+
+        for field_name, field_value in json.loads(serialized_item).items():
+            if field_name not in self.deserialized_fields:
+                continue
+
+            kind, field = self.deserialized_fields[field_name]
+            if kind == _MANY_TO_MANY:
+                related_pk_field = field.remote_field.model._meta.pk
+                m2m_data[field.name] = [
+                    related_pk_field.to_python(value) for value in field_value
+                ]
+            elif kind == _FOREIGN_KEY:
+                if field_value is not None:
+                    field_value = field.remote_field.model._meta.get_field(
+                        field.remote_field.field_name
+                    ).to_python(field_value)
+                data[field.attname] = field_value
+            else:
+                data[field.name] = field.to_python(field_value)
+
+        item = self.model(**data)
+        item.m2m_data = m2m_data
+        return item
+
+
+class DjangoItemSerializer(BaseItemSerializer):
+    _codecs: "Dict[str, _ModelCodec]" = {}
+
+    def _get_codec(self, app_model: "str") -> "_ModelCodec":
+        codec = self._codecs.get(app_model)
+        if codec is None:
+            codec = _ModelCodec(model=apps.get_model(app_model))
+            self._codecs[app_model] = codec
+        return codec
+
+    def serialize_item(
+        self, item: "models.Model", entity_name: "str"
+    ) -> "SerializationResult":
+        codec = self._get_codec(app_model=str(item._meta))
+        pk, serialized_item_str = codec.serialize(item=item)
         result = SerializationResult(
-            item_id=pk, entity_name=entity_name, serialized_item=serialized_item_str
+            item_id=pk,
+            entity_name=codec.entity_name,
+            serialized_item=serialized_item_str,
         )
         return result
 
     def deserialize_item(
         self, serialization_result: "SerializationResult"
     ) -> "models.Model":
-        raw_data = {
-            "model": entity_name_to_app_model(
+        codec = self._get_codec(
+            app_model=entity_name_to_app_model(
                 entity_name=serialization_result.entity_name
-            ),
-            "fields": json.loads(serialization_result.serialized_item),
-            "pk": serialization_result.item_id,
-        }
-        raw_data_list = [raw_data]
-        serialized_data = json.dumps(raw_data_list)
-        result_list = list(
-            serializers.deserialize("json", serialized_data, ignorenonexistent=True)
+            )
+        )
+        return codec.deserialize(
+            item_id=serialization_result.item_id,
+            serialized_item=serialization_result.serialized_item,
         )
-        result = result_list[0]
-        res_object = result.object
-        res_object.m2m_data = result.m2m_data
-        return res_object
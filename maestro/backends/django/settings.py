@@ -15,9 +15,20 @@ DEFAULTS: "Dict[str, Any]" = {
         "ITEM_CHANGE_METADATA_CONVERTER_CLASS": "maestro.backends.django.ItemChangeMetadataConverter",
         "CONFLICT_LOG_METADATA_CONVERTER_CLASS": "maestro.backends.django.ConflictLogMetadataConverter",
         "VECTOR_CLOCK_METADATA_CONVERTER_CLASS": "maestro.backends.django.VectorClockMetadataConverter",
+        "TRACKED_QUERY_METADATA_CONVERTER_CLASS": "maestro.backends.django.TrackedQueryMetadataConverter",
         "ITEM_SERIALIZER_CLASS": "maestro.backends.django.DjangoItemSerializer",
     },
-    "CHANGES_COMMITTED_CALLBACK": None
+    "CHANGES_COMMITTED_CALLBACK": None,
+    "BUFFER_SIGNAL_CHANGES": False,
+    # Changes recorded before enabling this keep their payloads inline until
+    # maestro.backends.django.contrib.migrate.move_item_payloads is called.
+    "STORE_PAYLOADS_SEPARATELY": False,
+    # Requires PostgreSQL. After enabling this, and whenever JSONB_INDEXED_FIELDS changes,
+    # call maestro.backends.django.contrib.migrate.setup_item_data to create the indexes
+    # and fill the JSONB copy of the existing changes.
+    "JSONB_ITEM_DATA": False,
+    "JSONB_INDEXED_FIELDS": [],
+    "SELECT_FOR_UPDATE_NOWAIT": False,
 }
 
 IMPORT_STRINGS = [
@@ -28,6 +39,7 @@ IMPORT_STRINGS = [
     "ITEM_CHANGE_METADATA_CONVERTER_CLASS",
     "CONFLICT_LOG_METADATA_CONVERTER_CLASS",
     "VECTOR_CLOCK_METADATA_CONVERTER_CLASS",
+    "TRACKED_QUERY_METADATA_CONVERTER_CLASS",
     "ITEM_SERIALIZER_CLASS",
     "CHANGES_COMMITTED_CALLBACK"
 ]
@@ -1,7 +1,9 @@
-from django.db import models, transaction
+from django.db import DatabaseError, connections, models, router, transaction
 from maestro.core.store import BaseDataStore
-from maestro.core.query.metadata import Query
+from maestro.core.query.metadata import Query, TrackedQuery
+from maestro.core.query.store import TrackQueriesStoreMixin
 from maestro.core.exceptions import ItemNotFoundException
+from maestro.core.utils import get_now_utc
 from maestro.core.metadata import (
     VectorClock,
     VectorClockItem,
@@ -12,6 +14,7 @@ from maestro.core.metadata import (
     ConflictLog,
     ConflictStatus,
     SyncSession,
+    SerializationResult,
 )
 from django.apps import apps
 from .converters import (
@@ -20,26 +23,61 @@ from .converters import (
     ItemChangeMetadataConverter,
     ConflictLogMetadataConverter,
     VectorClockMetadataConverter,
+    TrackedQueryMetadataConverter,
+    prefetch_payloads,
 )
 from .serializer import DjangoItemSerializer
-from typing import Optional, Any, Callable, List, Dict
+from .settings import maestro_settings
+from .utils import (
+    model_registry,
+    entity_name_to_content_type,
+    content_type_id_to_entity_name,
+    use_jsonb_item_data,
+    convert_to_django_filter,
+    convert_to_django_ordering,
+)
+from maestro.core.query.utils import query_filter_to_lambda
+from typing import Optional, Any, Callable, List, Dict, Set, Tuple, NamedTuple
+import datetime as dt
 import uuid
+import copy
 import operator
 from itertools import chain
 from functools import reduce
 
 
-class DjangoDataStore(BaseDataStore):
+class ItemOperation(NamedTuple):
+    operation: "Operation"
+    entity_name: "str"
+    item_id: "str"
+    item: "models.Model"
+
+
+class DjangoDataStore(TrackQueriesStoreMixin, BaseDataStore):
     sync_session_metadata_converter: "SyncSessionMetadataConverter"
     item_version_metadata_converter: "ItemVersionMetadataConverter"
     item_change_metadata_converter: "ItemChangeMetadataConverter"
     conflict_log_metadata_converter: "ConflictLogMetadataConverter"
     vector_clock_metadata_converter: "VectorClockMetadataConverter"
+    tracked_query_metadata_converter: "TrackedQueryMetadataConverter"
     item_serializer: "DjangoItemSerializer"
 
+    def __init__(self, *args, **kwargs):
+        self.tracked_query_metadata_converter = kwargs.pop(
+            "tracked_query_metadata_converter", TrackedQueryMetadataConverter()
+        )
+        self.item_field_getter: "Callable[[Any, str], Any]" = getattr
+        # The items locked by the batch that is running, by entity name and item id
+        self._locked_items: "Set[Tuple[str, str]]" = set()
+        super().__init__(*args, **kwargs)
+
     def get_local_vector_clock(self, query: "Optional[Query]" = None) -> "VectorClock":
         if query is not None:
-            raise ValueError("This backend doesn't support queries!")
+            tracked_query = self.get_tracked_query(query=query)
+            if tracked_query:
+                return tracked_query.vector_clock
+            else:
+                return VectorClock.create_empty(provider_ids=[self.local_provider_id])
 
         vector_clock = VectorClock.create_empty(provider_ids=[self.local_provider_id])
         ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
@@ -60,10 +98,176 @@ class DjangoDataStore(BaseDataStore):
                 )
         return vector_clock
 
+    def query_items(
+        self, query: "Query", vector_clock: "Optional[VectorClock]"
+    ) -> "List[Any]":
+        """Returns the items that match the query. On PostgreSQL with the JSONB_ITEM_DATA setting
+        enabled, the filter, ordering and pagination are performed by the database. Otherwise
+        the changes are loaded and filtered in Python."""
+
+        try:
+            entity_name_to_content_type(query.entity_name)
+        except LookupError:
+            # Entities without a model can't have changes stored in this backend
+            return []
+
+        if use_jsonb_item_data():
+            item_change_records = self._query_item_change_records(
+                query=query, vector_clock=vector_clock
+            )
+            return [
+                self._item_change_record_to_item(record=record)
+                for record in item_change_records
+            ]
+
+        return self._filter_items(query=query, vector_clock=vector_clock)
+
+    def get_item_ids_for_query(
+        self, query: "Query", vector_clock="VectorClock"
+    ) -> "Set[str]":
+        old_query_items = self.query_items(query=query, vector_clock=vector_clock)
+        current_query_items = self.query_items(query=query, vector_clock=None)
+        return {str(item.pk) for item in chain(old_query_items, current_query_items)}
+
+    def get_tracked_query(self, query: "Query") -> "Optional[TrackedQuery]":
+        TrackedQueryRecord = apps.get_model("maestro", "TrackedQueryRecord")
+        try:
+            tracked_query_record = TrackedQueryRecord.objects.get(id=query.get_id())
+        except TrackedQueryRecord.DoesNotExist:
+            return None
+
+        return self.tracked_query_metadata_converter.to_metadata(
+            record=tracked_query_record
+        )
+
+    def get_tracked_queries(self) -> "List[TrackedQuery]":
+        TrackedQueryRecord = apps.get_model("maestro", "TrackedQueryRecord")
+        return self.tracked_query_metadata_converter.to_metadata_list(
+            records=list(TrackedQueryRecord.objects.all())
+        )
+
+    def save_tracked_query(self, tracked_query: "TrackedQuery"):
+        tracked_query_record = self.tracked_query_metadata_converter.to_record(
+            metadata_object=tracked_query
+        )
+        tracked_query_record.save()
+
+    def _item_change_record_to_item(self, record: "models.Model") -> "models.Model":
+        return self.deserialize_item(
+            serialization_result=SerializationResult(
+                item_id=str(record.item_id),
+                entity_name=content_type_id_to_entity_name(record.content_type_id),
+                serialized_item=record.get_serialized_item(),
+            )
+        )
+
+    def _query_item_change_records(
+        self, query: "Query", vector_clock: "Optional[VectorClock]"
+    ) -> "List[models.Model]":
+        ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+        content_type = entity_name_to_content_type(query.entity_name)
+
+        if vector_clock is None:
+            ItemVersionRecord = apps.get_model("maestro", "ItemVersionRecord")
+            item_change_ids = ItemVersionRecord.objects.filter(
+                content_type=content_type
+            ).values("current_item_change_id")
+        else:
+            # The last change of each item created before the clock
+            fkwargs = [
+                models.Q(
+                    provider_id=vector_clock_item.provider_id,
+                    provider_timestamp__lte=vector_clock_item.timestamp,
+                )
+                for vector_clock_item in vector_clock
+            ]
+            if not fkwargs:
+                return []
+
+            item_change_ids = (
+                ItemChangeRecord.objects.filter(content_type=content_type)
+                .filter(reduce(operator.or_, fkwargs))
+                .order_by("item_id", "-date_created")
+                .distinct("item_id")
+                .values("id")
+            )
+
+        queryset = ItemChangeRecord.objects.filter(
+            content_type=content_type, id__in=item_change_ids
+        )
+        if query.filter.children:
+            queryset = queryset.filter(
+                convert_to_django_filter(filter=query.filter, field_name="item_data")
+            )
+
+        ordering = convert_to_django_ordering(
+            ordering=query.ordering, field_name="item_data"
+        )
+        queryset = queryset.order_by(*ordering, "insert_provider_timestamp")
+
+        start_idx = 0 if query.offset is None else query.offset
+        if query.limit is not None:
+            queryset = queryset[start_idx : start_idx + query.limit]
+        elif start_idx:
+            queryset = queryset[start_idx:]
+
+        item_change_records = list(queryset)
+        prefetch_payloads(item_change_records=item_change_records)
+        return item_change_records
+
+    def _filter_items(
+        self, query: "Query", vector_clock: "Optional[VectorClock]"
+    ) -> "List[models.Model]":
+        ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+        content_type = entity_name_to_content_type(query.entity_name)
+        item_change_records = list(
+            ItemChangeRecord.objects.filter(content_type=content_type).order_by(
+                "-date_created"
+            )
+        )
+        prefetch_payloads(item_change_records=item_change_records)
+
+        filter_lambda = query_filter_to_lambda(
+            filter=query.filter, item_field_getter=getattr
+        )
+        item_ids = set()
+        items_with_timestamps = []
+        for record in item_change_records:
+            if record.item_id in item_ids:
+                continue
+
+            if (
+                vector_clock is not None
+                and vector_clock.get_vector_clock_item(
+                    provider_id=record.provider_id
+                ).timestamp
+                < record.provider_timestamp
+            ):
+                continue
+
+            item_ids.add(record.item_id)
+            item = self._item_change_record_to_item(record=record)
+            if filter_lambda(item):
+                items_with_timestamps.append((item, record.insert_provider_timestamp))
+
+        items_with_timestamps.sort(key=lambda value: value[1])
+        items = [item for item, timestamp in items_with_timestamps]
+        for sort_order in reversed(query.ordering):
+            items.sort(
+                key=lambda item: getattr(item, sort_order.field_name),
+                reverse=sort_order.descending,
+            )
+
+        start_idx = 0 if query.offset is None else query.offset
+        end_idx = len(items) if query.limit is None else start_idx + query.limit
+        return items[start_idx:end_idx]
+
     def get_item_version(self, item_id: "str") -> "Optional[ItemVersion]":
         ItemVersionRecord = apps.get_model("maestro", "ItemVersionRecord")
         try:
-            item_version_record = ItemVersionRecord.objects.get(id=item_id)
+            item_version_record = ItemVersionRecord.objects.select_related(
+                "current_item_change", "current_item_change__payload"
+            ).get(id=item_id)
             item_version = self.item_version_metadata_converter.to_metadata(
                 record=item_version_record
             )
@@ -74,7 +278,9 @@ class DjangoDataStore(BaseDataStore):
     def get_item_change_by_id(self, id: "uuid.UUID") -> "ItemChange":
         ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
         try:
-            item_change_record = ItemChangeRecord.objects.get(id=id)
+            item_change_record = ItemChangeRecord.objects.select_related(
+                "payload"
+            ).get(id=id)
             item_change = self.item_change_metadata_converter.to_metadata(
                 record=item_change_record
             )
@@ -89,12 +295,9 @@ class DjangoDataStore(BaseDataStore):
         item_change_records = list(queryset[:max_num])
         is_last_batch = total_count == len(item_change_records)
 
-        item_changes = []
-        for item_change_record in item_change_records:
-            item_change = self.item_change_metadata_converter.to_metadata(
-                record=item_change_record
-            )
-            item_changes.append(item_change)
+        item_changes = self.item_change_metadata_converter.to_metadata_list(
+            records=item_change_records
+        )
 
         item_change_batch = ItemChangeBatch(
             item_changes=item_changes, is_last_batch=is_last_batch
@@ -111,6 +314,14 @@ class DjangoDataStore(BaseDataStore):
         provider_ids = ItemChangeRecord.objects.values_list(
             "provider_id", flat=True
         ).distinct()
+        item_id_filter = models.Q()
+        if query is not None:
+            item_id_filter = models.Q(
+                item_id__in=self.get_item_ids_for_query(
+                    query=query, vector_clock=vector_clock
+                )
+            )
+
         fkwargs = []
         for provider_id in provider_ids:
             vector_clock_item = vector_clock.get_vector_clock_item(
@@ -120,7 +331,7 @@ class DjangoDataStore(BaseDataStore):
                 provider_id=vector_clock_item.provider_id,
                 provider_timestamp__gt=vector_clock_item.timestamp,
             )
-            fkwargs.append(provider_filter)
+            fkwargs.append(provider_filter & item_id_filter)
 
         if fkwargs:
             queryset = ItemChangeRecord.objects.filter(
@@ -140,6 +351,10 @@ class DjangoDataStore(BaseDataStore):
         max_num: "int",
         query: "Optional[Query]" = None,
     ) -> "ItemChangeBatch":
+        conflict_log_filter = models.Q()
+        if query is not None:
+            conflict_log_filter = self._get_conflict_log_query_filter(query=query)
+
         fkwargs = []
         for vector_clock_item in vector_clock:
             provider_filter = models.Q(
@@ -148,7 +363,7 @@ class DjangoDataStore(BaseDataStore):
                 is_applied=False,
                 lost_conflicts__status=ConflictStatus.DEFERRED.value,
             )
-            fkwargs.append(provider_filter)
+            fkwargs.append(provider_filter & conflict_log_filter)
 
         ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
         queryset = ItemChangeRecord.objects.filter(
@@ -159,39 +374,160 @@ class DjangoDataStore(BaseDataStore):
         )
         return item_change_batch
 
+    def _get_conflict_log_query_filter(self, query: "Query") -> "models.Q":
+        """Returns a filter that selects the changes whose deferred conflicts happened while
+        syncing the given query. Databases that can't look inside JSON lists have the
+        conflict logs filtered in Python."""
+
+        query_id = query.get_id()
+        ConflictLogRecord = apps.get_model("maestro", "ConflictLogRecord")
+        connection = connections[router.db_for_read(ConflictLogRecord)]
+        if connection.features.supports_json_field_contains:
+            return models.Q(lost_conflicts__query_ids__contains=[query_id])
+
+        conflict_log_ids = [
+            conflict_log_id
+            for conflict_log_id, query_ids in ConflictLogRecord.objects.filter(
+                status=ConflictStatus.DEFERRED.value
+            ).values_list("id", "query_ids")
+            if query_id in query_ids
+        ]
+        return models.Q(lost_conflicts__id__in=conflict_log_ids)
+
     def save_item_change(
         self,
         item_change: "ItemChange",
         is_creating: "bool" = False,
         query: "Optional[Query]" = None,
     ) -> "ItemChange":
-
-        if query is not None:
-            raise ValueError("This backend doesn't support queries!")
-
         item_change_record = self.item_change_metadata_converter.to_record(
             metadata_object=item_change
         )
+        self._save_item_payloads(item_change_records=[item_change_record])
         item_change_record.save()
 
+        if is_creating and query is not None:
+            tracked_query = self.get_tracked_query(query=query)
+            if tracked_query is not None:
+                self.update_query_vector_clock(
+                    tracked_query=tracked_query, item_change=item_change
+                )
+
         return item_change
 
+    def _save_item_payloads(self, item_change_records: "List[models.Model]"):
+        """Saves the payloads of the given records that are stored out of line. Payloads that
+        already exist are kept, since they're identified by their content."""
+
+        payload_records = {
+            record._payload.id: record._payload
+            for record in item_change_records
+            if record._payload is not None
+        }
+        if payload_records:
+            ItemPayloadRecord = apps.get_model("maestro", "ItemPayloadRecord")
+            ItemPayloadRecord.objects.bulk_create(
+                payload_records.values(), ignore_conflicts=True
+            )
+
     def save_item(self, item: "models.Model"):
         item.save()
 
     def delete_item(self, item: "models.Model"):
         item.delete()
 
-    def run_in_transaction(self, item_change: "ItemChange", callback: "Callable"):
-        item = self.deserialize_item(
-            serialization_result=item_change.serialization_result
-        )
-        Model = item._meta.model
+    def lock_items(
+        self, item_changes: "List[ItemChange]", skip_locked: "bool" = False
+    ) -> "List[ItemChange]":
+        """Locks the rows of the items referenced by the changes using a single query per model.
+        Must be called inside a transaction. If the SELECT_FOR_UPDATE_NOWAIT setting is enabled,
+        a DatabaseError is raised when a row is already locked by another transaction.
+
+        Args:
+            item_changes (List[ItemChange]): The changes whose items must be locked.
+            skip_locked (bool, optional): Whether rows locked by other transactions should be skipped
+            instead of waited for. Defaults to False.
+
+        Returns:
+            List[ItemChange]: The changes whose items were locked or don't exist yet. When skip_locked
+            is True, changes whose items are locked by other transactions are left out.
+        """
+        item_ids_by_entity_name: "Dict[str, Set[str]]" = {}
+        for item_change in item_changes:
+            serialization_result = item_change.serialization_result
+            item_ids_by_entity_name.setdefault(
+                serialization_result.entity_name, set()
+            ).add(str(serialization_result.item_id))
+
+        unavailable_items: "Set[Tuple[str, str]]" = set()
+        for entity_name, item_ids in item_ids_by_entity_name.items():
+            model = model_registry.get_model(entity_name=entity_name)
+            queryset = model._default_manager.filter(pk__in=item_ids)
+            locked_ids = {
+                str(pk)
+                for pk in queryset.select_for_update(
+                    nowait=maestro_settings.SELECT_FOR_UPDATE_NOWAIT and not skip_locked,
+                    skip_locked=skip_locked,
+                ).values_list("pk", flat=True)
+            }
+
+            if skip_locked and len(locked_ids) < len(item_ids):
+                # Rows that weren't returned are either locked or don't exist
+                for pk in queryset.exclude(pk__in=locked_ids).values_list(
+                    "pk", flat=True
+                ):
+                    unavailable_items.add((entity_name, str(pk)))
+
+        return [
+            item_change
+            for item_change in item_changes
+            if (
+                item_change.serialization_result.entity_name,
+                str(item_change.serialization_result.item_id),
+            )
+            not in unavailable_items
+        ]
 
+    def run_in_transaction(self, item_change: "ItemChange", callback: "Callable"):
+        serialization_result = item_change.serialization_result
         with transaction.atomic():
-            Model.objects.select_for_update().filter(id=item.id)
+            if (
+                serialization_result.entity_name,
+                str(serialization_result.item_id),
+            ) not in self._locked_items:
+                self.lock_items(item_changes=[item_change])
             callback()
 
+    def run_batch_in_transaction(
+        self, item_changes: "List[ItemChange]", callback: "Callable"
+    ):
+        """Runs the callback that processes a batch of changes inside a single transaction.
+        The rows of the items of all the changes are locked at the beginning of the transaction
+        with lock_items, so the calls to run_in_transaction made by the callback for these
+        items only create savepoints.
+
+        Args:
+            item_changes (List[ItemChange]): The changes being processed.
+            callback (Callable): The function that processes the changes.
+        """
+        with transaction.atomic():
+            self.lock_items(item_changes=item_changes)
+            self._locked_items = {
+                (
+                    item_change.serialization_result.entity_name,
+                    str(item_change.serialization_result.item_id),
+                )
+                for item_change in item_changes
+            }
+            try:
+                callback()
+            finally:
+                self._locked_items = set()
+
+            if transaction.get_connection().needs_rollback:
+                # Committing would silently discard the batch's changes
+                raise DatabaseError("The batch's transaction can't be committed!")
+
     def save_conflict_log(self, conflict_log: "ConflictLog"):
         conflict_log_record = self.conflict_log_metadata_converter.to_record(
             metadata_object=conflict_log
@@ -227,6 +563,120 @@ class DjangoDataStore(BaseDataStore):
                 execute_operation=execute_operation,
             )
 
+    def commit_item_changes(
+        self, item_operations: "List[ItemOperation]"
+    ) -> "List[ItemChange]":
+        """Records the metadata of multiple operations that were already performed on the items,
+        using a fixed number of queries regardless of the number of operations. Each change
+        receives its own timestamp so that changes can still be paginated during synchronization.
+
+        Args:
+            item_operations (List[ItemOperation]): The operations performed, in the order they happened.
+        """
+        if not item_operations:
+            return []
+
+        ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+        ItemVersionRecord = apps.get_model("maestro", "ItemVersionRecord")
+
+        item_version_records = ItemVersionRecord.objects.select_related(
+            "current_item_change", "current_item_change__payload"
+        ).in_bulk([item_operation.item_id for item_operation in item_operations])
+        old_versions: "Dict[str, ItemVersion]" = {}
+        for item_id, item_version_record in item_version_records.items():
+            old_versions[str(item_id)] = self.item_version_metadata_converter.to_metadata(
+                record=item_version_record
+            )
+
+        # Changes must have increasing timestamps, also in relation to previous changes
+        now_utc = get_now_utc()
+        max_timestamp = ItemChangeRecord.objects.filter(
+            provider_id=self.local_provider_id
+        ).aggregate(max_timestamp=models.Max("provider_timestamp"))["max_timestamp"]
+        if max_timestamp is not None and max_timestamp >= now_utc:
+            now_utc = max_timestamp + dt.timedelta(microseconds=1)
+
+        item_changes: "List[ItemChange]" = []
+        old_item_changes: "List[Optional[ItemChange]]" = []
+        new_versions: "Dict[str, ItemVersion]" = {}
+        for idx, item_operation in enumerate(item_operations):
+            item_id = str(item_operation.item_id)
+            timestamp = now_utc + dt.timedelta(microseconds=idx)
+
+            old_version = new_versions.get(item_id, old_versions.get(item_id))
+            if old_version is None:
+                old_version = ItemVersion(
+                    current_item_change=None,
+                    item_id=item_id,
+                    vector_clock=VectorClock.create_empty(
+                        provider_ids=[self.local_provider_id]
+                    ),
+                    date_created=timestamp,
+                )
+
+            local_vector_clock = copy.deepcopy(old_version.vector_clock)
+            change_vector_clock_item = VectorClockItem(
+                provider_id=self.local_provider_id, timestamp=timestamp
+            )
+            local_vector_clock.update(change_vector_clock_item)
+
+            item_change = ItemChange(
+                id=uuid.uuid4(),
+                operation=item_operation.operation,
+                change_vector_clock_item=change_vector_clock_item,
+                insert_vector_clock_item=old_version.current_item_change.insert_vector_clock_item
+                if old_version.current_item_change
+                else change_vector_clock_item,
+                serialization_result=self.serialize_item(
+                    item=item_operation.item, entity_name=item_operation.entity_name
+                ),
+                should_ignore=False,
+                is_applied=True,
+                vector_clock=local_vector_clock,
+                date_created=timestamp,
+            )
+            item_changes.append(item_change)
+            old_item_changes.append(old_version.current_item_change)
+            new_versions[item_id] = ItemVersion(
+                item_id=item_id,
+                current_item_change=item_change,
+                date_created=old_version.date_created,
+            )
+
+        item_change_records = [
+            self.item_change_metadata_converter.to_record(metadata_object=item_change)
+            for item_change in item_changes
+        ]
+        self._save_item_payloads(item_change_records=item_change_records)
+        ItemChangeRecord.objects.bulk_create(item_change_records)
+
+        records_to_create = []
+        records_to_update = []
+        for item_id, item_version in new_versions.items():
+            item_version_record = self.item_version_metadata_converter.to_record(
+                metadata_object=item_version
+            )
+            if item_id in old_versions:
+                records_to_update.append(item_version_record)
+            else:
+                records_to_create.append(item_version_record)
+
+        ItemVersionRecord.objects.bulk_create(records_to_create)
+        ItemVersionRecord.objects.bulk_update(
+            records_to_update, fields=["current_item_change", "vector_clock"]
+        )
+
+        TrackedQueryRecord = apps.get_model("maestro", "TrackedQueryRecord")
+        if TrackedQueryRecord.objects.exists():
+            for item_change, old_item_change in zip(item_changes, old_item_changes):
+                self.check_tracked_query_vector_clocks(
+                    new_item_change=item_change,
+                    old_item_change=old_item_change,
+                    ignore_old_change_if_none=True,
+                )
+
+        return item_changes
+
     def execute_item_change(self, item_change: "ItemChange"):
         from .contrib.signals import temporarily_disable_signals
 
@@ -267,14 +717,11 @@ class DjangoDataStore(BaseDataStore):
             ConflictLogRecord.objects.filter(
                 item_change_loser_id=item_change_loser.id,
                 status=ConflictStatus.DEFERRED.value,
-            )
+            ).select_related("item_change_loser", "item_change_winner")
+        )
+        conflict_logs = self.conflict_log_metadata_converter.to_metadata_list(
+            records=conflict_log_records
         )
-        conflict_logs = []
-        for conflict_log_record in conflict_log_records:
-            conflict_log = self.conflict_log_metadata_converter.to_metadata(
-                record=conflict_log_record
-            )
-            conflict_logs.append(conflict_log)
 
         return conflict_logs
 
@@ -290,42 +737,38 @@ class DjangoDataStore(BaseDataStore):
     def get_item_changes(self):
         ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
         records = list(ItemChangeRecord.objects.order_by("date_created"))
-        metadata_objects = []
         converter = ItemChangeMetadataConverter()
-        for record in records:
-            metadata_object = converter.to_metadata(record)
-            metadata_objects.append(metadata_object)
-        return metadata_objects
+        return converter.to_metadata_list(records=records)
 
     def get_item_versions(self):
         ItemVersionRecord = apps.get_model("maestro", "ItemVersionRecord")
-        records = list(ItemVersionRecord.objects.order_by("date_created"))
-        metadata_objects = []
+        records = list(
+            ItemVersionRecord.objects.select_related("current_item_change").order_by(
+                "date_created"
+            )
+        )
         converter = ItemVersionMetadataConverter()
-        for record in records:
-            metadata_object = converter.to_metadata(record)
-            metadata_objects.append(metadata_object)
-        return metadata_objects
+        return converter.to_metadata_list(records=records)
 
     def get_sync_sessions(self):
         SyncSessionRecord = apps.get_model("maestro", "SyncSessionRecord")
-        records = list(SyncSessionRecord.objects.order_by("started_at"))
-        metadata_objects = []
+        records = list(
+            SyncSessionRecord.objects.prefetch_related("item_changes").order_by(
+                "started_at"
+            )
+        )
         converter = SyncSessionMetadataConverter()
-        for record in records:
-            metadata_object = converter.to_metadata(record)
-            metadata_objects.append(metadata_object)
-        return metadata_objects
+        return converter.to_metadata_list(records=records)
 
     def get_conflict_logs(self):
         ConflictLogRecord = apps.get_model("maestro", "ConflictLogRecord")
-        records = list(ConflictLogRecord.objects.order_by("created_at"))
-        metadata_objects = []
+        records = list(
+            ConflictLogRecord.objects.select_related(
+                "item_change_loser", "item_change_winner"
+            ).order_by("created_at")
+        )
         converter = ConflictLogMetadataConverter()
-        for record in records:
-            metadata_object = converter.to_metadata(record)
-            metadata_objects.append(metadata_object)
-        return metadata_objects
+        return converter.to_metadata_list(records=records)
 
     def item_to_dict(self, item: "Any") -> "Dict":
         opts = item._meta
@@ -1,9 +1,25 @@
 from django.apps import apps
-from django.db.models import Model
+from django.db import IntegrityError, connections, router
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import DecimalField, Model, Q, Transform
+from django.db.models.fields.json import KeyTransform
+from django.utils import timezone
 import django.db.transaction
-from typing import TYPE_CHECKING
-from django.core.cache import cache
-from maestro.core.utils import BaseSyncLock
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Type, Union, cast
+from maestro.core.utils import BaseSyncLock, DEFAULT_SYNC_LOCK_KEY
+from maestro.core.query.metadata import (
+    Filter,
+    Comparison,
+    Comparator,
+    Connector,
+    SortOrder,
+)
+from maestro.backends.django.settings import maestro_settings
+import datetime as dt
+import decimal
+import json
+import threading
+import uuid
 
 if TYPE_CHECKING:
     from django.contrib.contenttypes.models import ContentType
@@ -18,12 +34,83 @@ def entity_name_to_app_model(entity_name: "str") -> "str":
     return app_label + "." + model
 
 
+class ModelRegistry:
+    """Process-wide cache that maps entity names to their models and ContentTypes, so that
+    converting metadata doesn't need to query the database. The models are registered when
+    the app is ready and the ContentTypes are loaded with a single query the first time
+    one of them is needed. The ContentTypes are reloaded after migrations run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models_by_entity_name: "Dict[str, Type[Model]]" = {}
+        self._content_types_by_entity_name: "Dict[str, ContentType]" = {}
+        self._entity_names_by_content_type_id: "Dict[int, str]" = {}
+
+    def register_models(self, app_models: "Iterable[str]"):
+        """Registers the models that will be synchronized.
+
+        Args:
+            app_models (Iterable[str]): Models in the format "app_label.model_name".
+        """
+        with self._lock:
+            for app_model in app_models:
+                model = apps.get_model(app_model)._meta.concrete_model
+                self._models_by_entity_name[
+                    app_model_to_entity_name(model._meta.label_lower)
+                ] = model
+
+    def clear(self):
+        """Clears the cached ContentTypes. Registered models are kept."""
+        with self._lock:
+            self._content_types_by_entity_name = {}
+            self._entity_names_by_content_type_id = {}
+
+    def _load_content_types(self):
+        ContentType = apps.get_model("contenttypes", "ContentType")
+        content_types = ContentType.objects.get_for_models(
+            *self._models_by_entity_name.values()
+        )
+        with self._lock:
+            for model, content_type in content_types.items():
+                self._add_content_type(content_type=content_type)
+
+    def _add_content_type(self, content_type: "ContentType"):
+        entity_name = content_type_to_entity_name(content_type=content_type)
+        self._content_types_by_entity_name[entity_name] = content_type
+        self._entity_names_by_content_type_id[content_type.id] = entity_name
+
+    def get_model(self, entity_name: "str") -> "Type[Model]":
+        model = self._models_by_entity_name.get(entity_name)
+        if model is None:
+            model = apps.get_model(entity_name_to_app_model(entity_name))
+            with self._lock:
+                self._models_by_entity_name[entity_name] = model
+        return model
+
+    def get_content_type(self, entity_name: "str") -> "ContentType":
+        content_type = self._content_types_by_entity_name.get(entity_name)
+        if content_type is None:
+            self.get_model(entity_name=entity_name)
+            self._load_content_types()
+            content_type = self._content_types_by_entity_name[entity_name]
+        return content_type
+
+    def get_entity_name(self, content_type_id: "int") -> "str":
+        entity_name = self._entity_names_by_content_type_id.get(content_type_id)
+        if entity_name is None:
+            ContentType = apps.get_model("contenttypes", "ContentType")
+            content_type = ContentType.objects.get_for_id(content_type_id)
+            with self._lock:
+                self._add_content_type(content_type=content_type)
+            entity_name = content_type_to_entity_name(content_type=content_type)
+        return entity_name
+
+
+model_registry = ModelRegistry()
+
+
 def entity_name_to_content_type(entity_name: "str") -> "ContentType":
-    ContentType = apps.get_model("contenttypes", "ContentType")
-    app_model = entity_name_to_app_model(entity_name)
-    app, model = app_model.split(".")
-    content_type = ContentType.objects.get(app_label=app, model=model)
-    return content_type
+    return model_registry.get_content_type(entity_name=entity_name)
 
 
 def content_type_to_entity_name(content_type: "ContentType"):
@@ -32,22 +119,174 @@ def content_type_to_entity_name(content_type: "ContentType"):
     return entity_name
 
 
-def model_to_entity_name(model: "Model") -> "str":
-    ContentType = apps.get_model("contenttypes", "ContentType")
-    content_type = ContentType.objects.get_for_model(model)
-    return content_type_to_entity_name(content_type=content_type)
+def content_type_id_to_entity_name(content_type_id: "int") -> "str":
+    return model_registry.get_entity_name(content_type_id=content_type_id)
+
+
+def model_to_entity_name(model: "Union[Model, Type[Model]]") -> "str":
+    return app_model_to_entity_name(model._meta.concrete_model._meta.label_lower)
+
+
+def use_jsonb_item_data() -> "bool":
+    """Returns whether serialized items are also stored as JSONB so that queries can be
+    filtered by the database. This requires the JSONB_ITEM_DATA setting and PostgreSQL."""
+
+    if not maestro_settings.JSONB_ITEM_DATA:
+        return False
+
+    ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+    connection = connections[router.db_for_write(ItemChangeRecord)]
+    return connection.vendor == "postgresql"
+
+
+class KeyNumericTransform(Transform):
+    """Converts a JSONB value to numeric so that it's compared as a number. Decimals are
+    serialized as strings by DjangoJSONEncoder and would otherwise be compared
+    lexicographically."""
 
+    lookup_name = "maestro_numeric"
+    template = "(%(expressions)s #>> '{}')::numeric"
+    output_field = DecimalField()
 
-class DjangoSyncLockContext:
-    def __enter__(self, *args, **kwargs):
-        cache.set("maestro_running", True, timeout=None)
 
-    def __exit__(self, *args, **kwargs):
-        cache.set("maestro_running", False, timeout=None)
+KeyTransform.register_lookup(KeyNumericTransform)
+
+
+def _to_json_value(value: "Any") -> "Any":
+    """Converts a value to the representation stored by DjangoItemSerializer, which uses
+    DjangoJSONEncoder."""
+    if isinstance(value, (list, tuple, set)):
+        return [_to_json_value(item) for item in value]
+    if isinstance(value, dt.datetime) and timezone.is_aware(value):
+        # Stored datetimes are in UTC, which DjangoJSONEncoder represents with "Z"
+        value = value.astimezone(dt.timezone.utc)
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+
+_RANGE_COMPARATORS = (
+    Comparator.LESS_THAN,
+    Comparator.LESS_THAN_OR_EQUALS,
+    Comparator.GREATER_THAN,
+    Comparator.GREATER_THAN_OR_EQUALS,
+)
+
+
+def _is_numeric(value: "Any") -> "bool":
+    return isinstance(value, (int, float, decimal.Decimal)) and not isinstance(
+        value, bool
+    )
+
+
+def _comparison_to_django_filter(comparison: "Comparison", field_name: "str") -> "Q":
+    lookup = field_name + "__" + comparison.field_name
+    value = _to_json_value(comparison.value)
+
+    values = (
+        comparison.value if comparison.comparator == Comparator.IN else [comparison.value]
+    )
+    if values and all(_is_numeric(val) for val in values):
+        # Ranges and decimals are compared as numbers. The equality of ints and floats,
+        # which are stored as JSON numbers, can use the GIN index instead.
+        if comparison.comparator in _RANGE_COMPARATORS or any(
+            isinstance(val, decimal.Decimal) for val in values
+        ):
+            lookup += "__" + KeyNumericTransform.lookup_name
+            value = comparison.value
+
+    if comparison.comparator in (Comparator.EQUALS, Comparator.NOT_EQUALS):
+        if value is None or isinstance(value, (list, dict, decimal.Decimal)):
+            django_filter = Q(**{lookup: value})
+        else:
+            # Containment (@>) can use a GIN index on the whole column
+            django_filter = Q(**{field_name + "__contains": {comparison.field_name: value}})
+        return django_filter if comparison.comparator == Comparator.EQUALS else ~django_filter
+    elif comparison.comparator == Comparator.LESS_THAN:
+        return Q(**{lookup + "__lt": value})
+    elif comparison.comparator == Comparator.LESS_THAN_OR_EQUALS:
+        return Q(**{lookup + "__lte": value})
+    elif comparison.comparator == Comparator.GREATER_THAN:
+        return Q(**{lookup + "__gt": value})
+    elif comparison.comparator == Comparator.GREATER_THAN_OR_EQUALS:
+        return Q(**{lookup + "__gte": value})
+    elif comparison.comparator == Comparator.IN:
+        return Q(**{lookup + "__in": value})
+    else:
+        raise ValueError(f"Unknown comparator: {comparison.comparator}")
+
+
+def convert_to_django_filter(filter: "Filter", field_name: "str") -> "Q":
+    """Converts a query filter to lookups on a JSONField, which PostgreSQL translates
+    to JSONB operators.
+
+    Args:
+        filter (Filter): The filter being converted.
+        field_name (str): The lookup path to the JSONField that contains the items.
+    """
+    django_filter = Q()
+    for child in filter.children:
+        if isinstance(child, Filter):
+            child_filter = convert_to_django_filter(filter=child, field_name=field_name)
+        else:
+            child_filter = _comparison_to_django_filter(
+                comparison=cast("Comparison", child), field_name=field_name
+            )
+
+        if filter.connector == Connector.AND:
+            django_filter &= child_filter
+        else:
+            django_filter |= child_filter
+
+    return django_filter
+
+
+def convert_to_django_ordering(
+    ordering: "List[SortOrder]", field_name: "str"
+) -> "List[str]":
+    return [
+        ("-" if sort_order.descending else "")
+        + field_name
+        + "__"
+        + sort_order.field_name
+        for sort_order in ordering
+    ]
+
 
 class DjangoSyncLock(BaseSyncLock):
-    def is_running(self) -> "bool":
-        return cache.get("maestro_running", False)
+    """Sync lock stored as SyncLockRecord rows in the database, which is shared by all processes.
+    Every operation is a single statement filtered by key and token, so a session whose lease expired
+    can't renew or release the lock that another session acquired afterwards. Expiry dates come from
+    the clock of each process, which must be kept in sync."""
+
+    def acquire(self, key: "str") -> "Optional[str]":
+        SyncLockRecord = apps.get_model("maestro", "SyncLockRecord")
+        token = str(uuid.uuid4())
+        now = timezone.now()
+        SyncLockRecord.objects.filter(key=key, expires_at__lte=now).delete()
+        try:
+            with django.db.transaction.atomic(using=router.db_for_write(SyncLockRecord)):
+                SyncLockRecord.objects.create(
+                    key=key,
+                    token=token,
+                    expires_at=now + dt.timedelta(seconds=self.lease_seconds),
+                )
+        except IntegrityError:
+            return None
+        return token
+
+    def renew(self, key: "str", token: "str") -> "bool":
+        SyncLockRecord = apps.get_model("maestro", "SyncLockRecord")
+        now = timezone.now()
+        num_updated = SyncLockRecord.objects.filter(
+            key=key, token=token, expires_at__gt=now
+        ).update(expires_at=now + dt.timedelta(seconds=self.lease_seconds))
+        return num_updated == 1
+
+    def release(self, key: "str", token: "str"):
+        SyncLockRecord = apps.get_model("maestro", "SyncLockRecord")
+        SyncLockRecord.objects.filter(key=key, token=token).delete()
 
-    def lock(self):
-        return DjangoSyncLockContext()
+    def is_running(self, key: "str" = DEFAULT_SYNC_LOCK_KEY) -> "bool":
+        SyncLockRecord = apps.get_model("maestro", "SyncLockRecord")
+        return SyncLockRecord.objects.filter(
+            key=key, expires_at__gt=timezone.now()
+        ).exists()
@@ -6,6 +6,7 @@ from maestro.backends.base_nosql.converters import (
     ItemChangeMetadataConverter,
     ConflictLogMetadataConverter,
     VectorClockMetadataConverter,
+    TrackedQueryMetadataConverter,
 )
 from .serializer import FirestoreItemSerializer
 
@@ -6,6 +6,7 @@ from maestro.backends.firestore import (
     ItemChangeMetadataConverter,
     ConflictLogMetadataConverter,
     VectorClockMetadataConverter,
+    TrackedQueryMetadataConverter,
     FirestoreDataStore,
     FirestoreItemSerializer,
     FirestoreSyncProvider,
@@ -21,8 +22,11 @@ def create_firestore_provider(
     item_change_metadata_converter=None,
     conflict_log_metadata_converter=ConflictLogMetadataConverter(),
     vector_clock_metadata_converter=VectorClockMetadataConverter(),
+    tracked_query_metadata_converter=TrackedQueryMetadataConverter(),
     item_serializer=FirestoreItemSerializer(),
     events_manager_class=EventsManager,
+    cache_max_size=10000,
+    cache_ttl_seconds=None,
 ):  # pragma: no cover
 
     if item_change_metadata_converter is None:
@@ -39,7 +43,10 @@ def create_firestore_provider(
         conflict_log_metadata_converter=conflict_log_metadata_converter,
         vector_clock_metadata_converter=vector_clock_metadata_converter,
         item_serializer=item_serializer,
+        tracked_query_metadata_converter=tracked_query_metadata_converter,
         db=db,
+        cache_max_size=cache_max_size,
+        cache_ttl_seconds=cache_ttl_seconds,
     )
 
     sync_session_metadata_converter.data_store = data_store
@@ -9,10 +9,8 @@ class FirestoreSyncProvider(NoSQLSyncProvider):
     def upload_changes(
         self, item_change_batch: "ItemChangeBatch", query: "Optional[Query]"
     ):
-        if query is not None:
-            raise ValueError("This backend doesn't support queries!")
-
         firestore_data_store = cast("FirestoreDataStore", self.data_store)
-        super().upload_changes(item_change_batch=item_change_batch, query=query)
+        with firestore_data_store.batch_writes():
+            super().upload_changes(item_change_batch=item_change_batch, query=query)
         if firestore_data_store._usage.enabled:
             firestore_data_store._usage.show()
@@ -1,6 +1,15 @@
 from maestro.backends.base_nosql.store import NoSQLDataStore
+from maestro.backends.base_nosql.converters import TrackedQueryMetadataConverter
+from maestro.backends.firestore.utils import (
+    convert_to_firestore_filter,
+    FIRESTORE_MAX_BATCH_WRITES,
+    FIRESTORE_MAX_IN_VALUES,
+    FIRESTORE_MAX_PARALLEL_QUERIES,
+)
 from maestro.core.exceptions import ItemNotFoundException
-from maestro.core.query.metadata import Query
+from maestro.core.query.metadata import Query, TrackedQuery
+from maestro.core.query.store import TrackQueriesStoreMixin
+from maestro.core.query.utils import query_filter_to_lambda
 from maestro.core.metadata import (
     VectorClock,
     VectorClockItem,
@@ -10,6 +19,7 @@ from maestro.core.metadata import (
     ConflictLog,
     ConflictStatus,
     SyncSession,
+    SyncSessionStatus,
 )
 from maestro.backends.base_nosql.collections import (
     CollectionType,
@@ -22,16 +32,25 @@ from maestro.backends.base_nosql.utils import (
     type_to_collection,
     entity_name_to_collection,
 )
-import copy
-from typing import Dict, Optional, List, Any, Callable
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import heapq
+import itertools
+import math
+from typing import Dict, Optional, List, Any, Callable, Iterator, Set, Tuple
 import uuid
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
 class FirestoreUsage:
-    """
+    """Counts the operations billed by Firestore. The counters are always updated, since they
+    are recorded with each sync session and checked by SyncBudget. Calling reset enables
+    logging the usage after each uploaded batch.
+
         - writes:
             INSERT
             >>> 4 + 5/item
@@ -79,40 +98,64 @@ class FirestoreUsage:
         self.num_writes = 0
         self.num_reads = 0
         self.num_deletes = 0
+        self.num_commits = 0
+        self.num_discarded_reads = 0
+        self.num_cache_hits = 0
+        self.num_cache_misses = 0
 
     def register_write(self, collection_name, document_id):
-        if self.enabled:
-            self.num_writes += 1
-
-            if self.debug_writes:  # pragma: no cover
-                self._log(
-                    message="wrote document",
-                    collection_name=collection_name,
-                    document_id=document_id,
-                )
+        self.num_writes += 1
+
+        if self.enabled and self.debug_writes:  # pragma: no cover
+            self._log(
+                message="wrote document",
+                collection_name=collection_name,
+                document_id=document_id,
+            )
 
     def register_read(self, collection_name, document_id):
-        if self.enabled:
-            self.num_reads += 1
-
-            if self.debug_reads:  # pragma: no cover
-                self._log(
-                    message="read document",
-                    collection_name=collection_name,
-                    document_id=document_id,
-                )
+        self.num_reads += 1
+
+        if self.enabled and self.debug_reads:  # pragma: no cover
+            self._log(
+                message="read document",
+                collection_name=collection_name,
+                document_id=document_id,
+            )
 
     def register_delete(self):
-        if self.enabled:
-            self.num_deletes += 1
+        self.num_deletes += 1
 
-    def show(self, should_print=False):
+    def register_commit(self):
+        """Registers a request that committed writes, which may be a single write, a batch
+        or a transaction."""
+        self.num_commits += 1
+
+    def register_discarded_read(self):
+        """Registers a document that was read (and billed) but was discarded because it
+        didn't match a filter that had to be evaluated in memory."""
+        self.num_discarded_reads += 1
+
+    def register_cache_hit(self):
+        self.num_cache_hits += 1
 
-        usage = {
+    def register_cache_miss(self):
+        self.num_cache_misses += 1
+
+    def as_dict(self) -> "Dict[str, int]":
+        return {
             "reads": self.num_reads,
             "writes": self.num_writes,
             "deletes": self.num_deletes,
+            "commits": self.num_commits,
+            "discarded_reads": self.num_discarded_reads,
+            "cache_hits": self.num_cache_hits,
+            "cache_misses": self.num_cache_misses,
         }
+
+    def show(self, should_print=False):
+
+        usage = self.as_dict()
         if should_print:  # pragma: no cover
             from pprint import pprint
 
@@ -121,35 +164,240 @@ class FirestoreUsage:
             logger.info("Firestore usage: %s", str(usage))
 
 
+class FrozenDict(dict):
+    """A dict that can't be modified, used to share cached documents without copying them.
+    Copies made with copy.copy or copy.deepcopy are regular, mutable objects."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Cached documents can't be modified")
+
+    __setitem__ = __delitem__ = _readonly  # type: ignore
+    clear = pop = popitem = setdefault = update = _readonly  # type: ignore
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (thaw(self),))
+
+
+class FrozenList(tuple):
+    """A list that can't be modified. See FrozenDict."""
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (list, (thaw(self),))
+
+
+def freeze(value: "Any") -> "Any":
+    """Returns a copy of the value whose dicts and lists can't be modified. Values that are
+    already frozen are returned without being copied."""
+
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(val)) for key, val in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(val) for val in value)
+    return value
+
+
+def thaw(value: "Any") -> "Any":
+    """Returns a mutable copy of a value returned by freeze. Values that aren't frozen are
+    returned without being copied."""
+
+    if isinstance(value, FrozenDict):
+        return {key: thaw(val) for key, val in value.items()}
+    if isinstance(value, FrozenList):
+        return [thaw(val) for val in value]
+    return value
+
+
 class FirestoreCache:
-    def __init__(self):
-        self._cache = {}
+    """Caches the documents read and written by a FirestoreDataStore. Each collection keeps at
+    most max_size documents, discarding the least recently used ones, and documents expire
+    ttl_seconds after being saved. Values are frozen once when they are saved, so they are
+    returned without being copied and must be thawed before being handed to a converter.
+    """
+
+    def __init__(
+        self,
+        max_size: "int" = 10000,
+        ttl_seconds: "Optional[float]" = None,
+        usage: "Optional[FirestoreUsage]" = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.usage = usage
+        self._cache: "Dict[str, OrderedDict[str, Tuple[Optional[float], Any]]]" = {}
 
     def save(self, collection_name: "str", document_id: "str", value: "Any"):
-        collection_data = self._cache.get(collection_name, {})
-        collection_data[str(document_id)] = copy.deepcopy(value)
-        self._cache[collection_name] = collection_data
+        if self.max_size <= 0:
+            return
 
-    def get(self, collection_name: "str", document_id: "str"):
-        collection_data = self._cache.get(collection_name, {})
-        value = collection_data.get(str(document_id))
-        return copy.deepcopy(value)
+        expires_at = (
+            time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        )
+        collection_data = self._cache.setdefault(collection_name, OrderedDict())
+        document_id = str(document_id)
+        collection_data[document_id] = (expires_at, freeze(value))
+        collection_data.move_to_end(document_id)
+        while len(collection_data) > self.max_size:
+            collection_data.popitem(last=False)
+
+    def get(self, collection_name: "str", document_id: "str") -> "Any":
+        collection_data = self._cache.get(collection_name)
+        entry = collection_data.get(str(document_id)) if collection_data else None
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or time.monotonic() < expires_at:
+                collection_data.move_to_end(str(document_id))  # type: ignore
+                if self.usage is not None:
+                    self.usage.register_cache_hit()
+                return value
+
+            del collection_data[str(document_id)]  # type: ignore
+
+        if self.usage is not None:
+            self.usage.register_cache_miss()
+        return None
+
+    def delete(self, collection_name: "str", document_id: "str"):
+        collection_data = self._cache.get(collection_name)
+        if collection_data:
+            collection_data.pop(str(document_id), None)
+
+    def clear(self):
+        self._cache = {}
 
 
-class FirestoreDataStore(NoSQLDataStore):
+class FirestoreDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
     """ Reference: https://googleapis.dev/python/firestore/latest/collection.html"""
 
     def __init__(self, *args, **kwargs):
         self.db = kwargs.pop("db")
+        self.tracked_query_metadata_converter = kwargs.pop(
+            "tracked_query_metadata_converter", TrackedQueryMetadataConverter()
+        )
+        self.item_field_getter: "Callable[[Any, str], Any]" = lambda item, field_name: item[
+            field_name
+        ]
+        cache_max_size: "int" = kwargs.pop("cache_max_size", 10000)
+        cache_ttl_seconds: "Optional[float]" = kwargs.pop("cache_ttl_seconds", None)
         super().__init__(*args, **kwargs)
         self.current_transaction = None
         self._usage = FirestoreUsage()
-        self._cache = FirestoreCache()
+        self._cache = FirestoreCache(
+            max_size=cache_max_size, ttl_seconds=cache_ttl_seconds, usage=self._usage
+        )
+        self._session_cache: "Optional[FirestoreCache]" = None
+        self._pending_writes: "List[Tuple[Any, Optional[Dict]]]" = []
+        self._pending_collections: "Set[str]" = set()
+        self._batch_depth = 0
+        self._transaction_item_versions: "Dict[str, Dict]" = {}
+
+    def get_usage(self) -> "Dict[str, int]":
+        return self._usage.as_dict()
+
+    def start_session_cache(self):
+        """Starts caching the documents that are read repeatedly while a sync session runs:
+        item versions, provider ids and deferred conflict logs. Unlike item changes, these
+        documents may be modified by other processes, so they are only cached while the
+        session holds the synchronization lock. The store's own writes update the cache.
+
+        The lock doesn't stop the application from changing items, which also changes their
+        versions, so run_in_transaction reads the version of the item being changed through
+        the transaction and refreshes the cached one.
+        """
+        self._session_cache = FirestoreCache(
+            max_size=self._cache.max_size, usage=self._usage
+        )
+
+    def end_session_cache(self):
+        self._session_cache = None
+
+    def _get_cache(self, collection_name: "str") -> "Optional[FirestoreCache]":
+        """Returns the cache that keeps the documents of a collection by id or None if they
+        aren't cached. Provider ids and deferred conflict logs are cached as lists by the
+        methods that read them, and entity items are never cached."""
+
+        if collection_name == type_to_collection(key=CollectionType.ITEM_CHANGES):
+            return self._cache
+        if collection_name == type_to_collection(key=CollectionType.ITEM_VERSIONS):
+            return self._session_cache
+        return None
 
     def _get_collection_query(self, key: "CollectionType"):
         collection_name = type_to_collection(key=key)
+        if collection_name in self._pending_collections:
+            # Queries must see the writes that are still pending
+            self.flush_writes()
         return self.db.collection(collection_name)
 
+    @contextmanager
+    def batch_writes(self):
+        """Accumulates the writes performed outside transactions in the block so that they are
+        committed with WriteBatches of up to FIRESTORE_MAX_BATCH_WRITES writes. The pending
+        writes are committed when the outermost block ends, when a collection that was written
+        is queried, or together with the next transaction.
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush_writes()
+
+    def flush_writes(self):
+        """Commits the writes accumulated by batch_writes."""
+
+        pending_writes = self._pending_writes
+        self._pending_writes = []
+        self._pending_collections = set()
+        if not pending_writes:
+            return
+
+        batch = self.db.batch()
+        for doc_ref, instance in pending_writes:
+            if instance is None:
+                batch.delete(doc_ref)
+            else:
+                batch.set(doc_ref, instance)
+        batch.commit()
+        self._usage.register_commit()
+
+    def _write(self, collection: "str", pk: "str", instance: "Optional[Dict]"):
+        """Sets a document or deletes it if instance is None."""
+
+        doc_ref = self.db.collection(collection).document(str(pk))
+        if self.current_transaction is not None:
+            if instance is None:
+                self.current_transaction.delete(doc_ref)
+            else:
+                self.current_transaction.set(doc_ref, instance)
+
+        elif self._batch_depth > 0:
+            self._pending_writes.append((doc_ref, instance))
+            self._pending_collections.add(collection)
+            if len(self._pending_writes) >= FIRESTORE_MAX_BATCH_WRITES:
+                self.flush_writes()
+
+        else:
+            if instance is None:
+                doc_ref.delete()
+            else:
+                doc_ref.set(instance)
+            self._usage.register_commit()
+
     def _document_to_raw_instance(self, document, ignore_read=False):
         instance = document.to_dict()
         instance["id"] = document.id
@@ -162,53 +410,254 @@ class FirestoreDataStore(NoSQLDataStore):
 
     def _delete(self, instance: "Dict", collection: "str"):
         pk = instance.pop("id")
-        doc_ref = self.db.collection(collection).document(str(pk))
-        if self.current_transaction is None:
-            doc_ref.delete()
-        else:
-            self.current_transaction.delete(doc_ref)
+        cache = self._get_cache(collection_name=collection)
+        if cache is not None:
+            cache.delete(collection_name=collection, document_id=pk)
+        self._write(collection=collection, pk=pk, instance=None)
         self._usage.register_delete()
 
-    def _get_provider_ids(self) -> "List[str]":
+    def _get_provider_documents(self) -> "List[Dict]":
         collection_name = type_to_collection(key=CollectionType.PROVIDER_IDS)
-        docs = self.db.collection(collection_name).get()
-        provider_ids = [doc.id for doc in docs]
-        if not provider_ids:
+        if self._session_cache is not None:
+            instances = self._session_cache.get(
+                collection_name=collection_name, document_id=""
+            )
+            if instances is not None:
+                return instances
+
+        docs = self._get_collection_query(CollectionType.PROVIDER_IDS).get()
+        if not docs:
             self._usage.register_read(collection_name=collection_name, document_id="")
-        for provider_id in provider_ids:
-            self._usage.register_read(
-                collection_name=collection_name, document_id=provider_id
+        instances = [self._document_to_raw_instance(doc) for doc in docs]
+
+        if self._session_cache is not None:
+            self._session_cache.save(
+                collection_name=collection_name, document_id="", value=instances
             )
+        return instances
 
+    def _get_provider_ids(self) -> "List[str]":
+        provider_ids = [instance["id"] for instance in self._get_provider_documents()]
         if self.local_provider_id not in provider_ids:
             provider_ids.append(self.local_provider_id)
 
         return provider_ids
 
-    def _save(self, instance: "Dict", collection: "str"):
-        self._cache.save(
-            collection_name=collection, document_id=instance["id"], value=instance
+    def get_tracked_query(self, query: "Query") -> "Optional[TrackedQuery]":
+        doc = (
+            self._get_collection_query(CollectionType.TRACKED_QUERIES)
+            .document(query.get_id())
+            .get()
         )
-        pk = instance.pop("id")
-        doc_ref = self.db.collection(collection).document(str(pk))
+        if not doc.exists:
+            collection_name = type_to_collection(key=CollectionType.TRACKED_QUERIES)
+            self._usage.register_read(collection_name=collection_name, document_id="")
+            return None
 
-        if self.current_transaction is None:
-            doc_ref.set(instance)
-        else:
-            self.current_transaction.set(doc_ref, instance)
+        instance = self._document_to_raw_instance(doc)
+        tracked_query = self.tracked_query_metadata_converter.to_metadata(
+            record=instance
+        )
+        return tracked_query
+
+    def get_tracked_queries(self) -> "List[TrackedQuery]":
+        docs = self._get_collection_query(CollectionType.TRACKED_QUERIES).get()
+        if not docs:
+            collection_name = type_to_collection(key=CollectionType.TRACKED_QUERIES)
+            self._usage.register_read(collection_name=collection_name, document_id="")
+
+        tracked_queries: "List[TrackedQuery]" = []
+        for doc in docs:
+            instance = self._document_to_raw_instance(doc)
+            tracked_query = self.tracked_query_metadata_converter.to_metadata(
+                record=instance
+            )
+            tracked_queries.append(tracked_query)
+
+        return tracked_queries
+
+    def save_tracked_query(self, tracked_query: "TrackedQuery"):
+        instance = self.tracked_query_metadata_converter.to_record(
+            metadata_object=tracked_query
+        )
+        self._save(
+            instance=instance,
+            collection=type_to_collection(key=CollectionType.TRACKED_QUERIES),
+        )
+
+    def _is_after_vector_clock(
+        self, record: "ItemChangeRecord", vector_clock: "VectorClock"
+    ) -> "bool":
+        vector_clock_item = vector_clock.get_vector_clock_item(
+            provider_id=record["change_vector_clock_item"]["provider_id"]
+        )
+        return (
+            record["change_vector_clock_item"]["timestamp"]
+            > vector_clock_item.timestamp
+        )
+
+    def _get_last_item_change_records(
+        self, item_ids: "List[str]", vector_clock: "Optional[VectorClock]"
+    ) -> "List[ItemChangeRecord]":
+        """Returns the last change of each of the given items, ignoring the changes that happened
+        after the vector clock if one is given."""
+
+        records_by_item_id: "Dict[str, ItemChangeRecord]" = {}
+        for idx in range(0, len(item_ids), FIRESTORE_MAX_IN_VALUES):
+            docs = (
+                self._get_collection_query(CollectionType.ITEM_CHANGES)
+                .where("item_id", "in", item_ids[idx : idx + FIRESTORE_MAX_IN_VALUES])
+                .get()
+            )
+            for doc in docs:
+                record: "ItemChangeRecord" = self._document_to_raw_instance(doc)
+                if vector_clock and self._is_after_vector_clock(
+                    record=record, vector_clock=vector_clock
+                ):
+                    self._usage.register_discarded_read()
+                    continue
+
+                last_record = records_by_item_id.get(record["item_id"])
+                if last_record is not None:
+                    self._usage.register_discarded_read()
+                    if last_record["date_created"] >= record["date_created"]:
+                        continue
+
+                records_by_item_id[record["item_id"]] = record
+
+        return list(records_by_item_id.values())
+
+    def query_items(
+        self, query: "Query", vector_clock: "Optional[VectorClock]"
+    ) -> "List[Any]":
+        """Returns the items that match the query. The where clauses only select the items that
+        had a matching change at some point, so the last change of each of them is loaded
+        afterwards and the whole filter is evaluated against it."""
+
+        collection_name = entity_name_to_collection(query.entity_name)
+        firestore_filter = convert_to_firestore_filter(
+            filter=query.filter, field_prefix="serialized_item."
+        )
+        firestore_query = self._get_collection_query(CollectionType.ITEM_CHANGES).where(
+            "collection_name", "==", collection_name
+        )
+        for field_path, operator, value in firestore_filter.where_clauses:
+            firestore_query = firestore_query.where(field_path, operator, value)
+
+        docs = firestore_query.get()
+        if not docs:
+            self._usage.register_read(
+                collection_name=type_to_collection(key=CollectionType.ITEM_CHANGES),
+                document_id="",
+            )
+
+        candidate_item_ids: "Set[str]" = set()
+        for doc in docs:
+            record: "ItemChangeRecord" = self._document_to_raw_instance(doc)
+            if vector_clock and self._is_after_vector_clock(
+                record=record, vector_clock=vector_clock
+            ):
+                self._usage.register_discarded_read()
+                continue
+
+            candidate_item_ids.add(record["item_id"])
+
+        filter_check = query_filter_to_lambda(
+            filter=query.filter, item_field_getter=self.item_field_getter
+        )
+        items: "List[Dict]" = []
+        inserted_timestamps: "Dict[str, Any]" = {}
+        for record in self._get_last_item_change_records(
+            item_ids=sorted(candidate_item_ids), vector_clock=vector_clock
+        ):
+            # The item may have been updated after the matching change
+            if not filter_check(record["serialized_item"]):
+                self._usage.register_discarded_read()
+                continue
+
+            items.append(record["serialized_item"])
+            inserted_timestamps[record["item_id"]] = record["insert_vector_clock_item"][
+                "timestamp"
+            ]
+
+        # Sorting
+        items.sort(key=lambda item: inserted_timestamps[item["id"]])
+        for sort_order in reversed(query.ordering):
+            items.sort(
+                key=lambda item: item[sort_order.field_name],
+                reverse=sort_order.descending,
+            )
+
+        # Pagination
+        start_idx = 0 if query.offset is None else query.offset
+        end_idx = len(items) if query.limit is None else start_idx + query.limit
+        return items[start_idx:end_idx]
 
+    def _update_session_cache(self, instance: "Dict", collection: "str"):
+        """Updates the lists of documents cached during the sync session with a document that
+        is being saved."""
+
+        if self._session_cache is None:
+            return
+
+        if collection == type_to_collection(key=CollectionType.PROVIDER_IDS):
+            instances = self._session_cache.get(
+                collection_name=collection, document_id=""
+            )
+            if instances is not None:
+                self._session_cache.save(
+                    collection_name=collection,
+                    document_id="",
+                    value=[
+                        cached for cached in instances if cached["id"] != instance["id"]
+                    ]
+                    + [instance],
+                )
+
+        elif collection == type_to_collection(key=CollectionType.CONFLICT_LOGS):
+            lookup_collection_name = self._get_deferred_conflict_logs_cache_name()
+            item_change_loser_id = instance["item_change_loser_id"]
+            instances = self._session_cache.get(
+                collection_name=lookup_collection_name, document_id=item_change_loser_id
+            )
+            if instances is not None:
+                instances = [
+                    cached for cached in instances if cached["id"] != instance["id"]
+                ]
+                if instance["status"] == ConflictStatus.DEFERRED.value:
+                    instances.append(instance)
+                    instances.sort(key=lambda cached: cached["created_at"])
+                self._session_cache.save(
+                    collection_name=lookup_collection_name,
+                    document_id=item_change_loser_id,
+                    value=instances,
+                )
+
+    def _save(self, instance: "Dict", collection: "str"):
+        cache = self._get_cache(collection_name=collection)
+        if cache is not None or self._session_cache is not None:
+            frozen_instance = freeze(instance)
+            if cache is not None:
+                cache.save(
+                    collection_name=collection,
+                    document_id=instance["id"],
+                    value=frozen_instance,
+                )
+            self._update_session_cache(instance=frozen_instance, collection=collection)
+        pk = instance.pop("id")
+        self._write(collection=collection, pk=pk, instance=instance)
         self._usage.register_write(collection_name=collection, document_id=pk)
 
     def get_local_vector_clock(self, query: "Optional[Query]" = None) -> "VectorClock":
         if query is not None:
-            raise ValueError("This backend doesn't support queries!")
+            tracked_query = self.get_tracked_query(query=query)
+            if tracked_query:
+                return tracked_query.vector_clock
+            else:
+                return VectorClock.create_empty(provider_ids=[self.local_provider_id])
+
         vector_clock = VectorClock.create_empty(provider_ids=[self.local_provider_id])
-        docs = self._get_collection_query(CollectionType.PROVIDER_IDS).get()
-        if not docs:
-            collection_name = type_to_collection(key=CollectionType.PROVIDER_IDS)
-            self._usage.register_read(collection_name=collection_name, document_id="")
-        for doc in docs:
-            instance = self._document_to_raw_instance(doc)
+        for instance in self._get_provider_documents():
             vector_clock.update(
                 VectorClockItem(
                     provider_id=instance["id"], timestamp=instance["timestamp"]
@@ -216,28 +665,54 @@ class FirestoreDataStore(NoSQLDataStore):
             )
         return vector_clock
 
+    def _read_item_version_document(
+        self, item_id: "str", transaction: "Optional[Any]" = None
+    ) -> "Dict":
+        """Reads the document of an item's version, returning an empty document if the item
+        doesn't have a version yet. Missing versions are cached as empty documents."""
+
+        collection_name = type_to_collection(key=CollectionType.ITEM_VERSIONS)
+        doc = (
+            self.db.collection(collection_name)
+            .document(str(item_id))
+            .get(transaction=transaction)
+        )
+        if doc.exists:
+            instance = self._document_to_raw_instance(doc)
+        else:
+            instance = {}
+            self._usage.register_read(collection_name=collection_name, document_id="")
+
+        cache = self._get_cache(collection_name=collection_name)
+        if cache is not None:
+            cache.save(
+                collection_name=collection_name, document_id=item_id, value=instance
+            )
+        return instance
+
     def get_item_version(self, item_id: "str") -> "Optional[ItemVersion]":
         collection_name = type_to_collection(key=CollectionType.ITEM_VERSIONS)
-        instance = self._cache.get(collection_name=collection_name, document_id=item_id)
-        if not instance:
-            doc = (
-                self._get_collection_query(CollectionType.ITEM_VERSIONS)
-                .document(str(item_id))
-                .get()
+        cache = self._get_cache(collection_name=collection_name)
+        if (
+            self.current_transaction is not None
+            and str(item_id) in self._transaction_item_versions
+        ):
+            # Read by the transaction, since the application may have modified the item
+            instance = self._transaction_item_versions[str(item_id)]
+        else:
+            instance = (
+                cache.get(collection_name=collection_name, document_id=item_id)
+                if cache is not None
+                else None
             )
-            if doc.exists:
-                instance = self._document_to_raw_instance(doc)
-                self._cache.save(
-                    collection_name=collection_name, document_id=item_id, value=instance
-                )
-            else:
-                self._usage.register_read(
-                    collection_name=collection_name, document_id=""
-                )
+            if instance is None:
+                if collection_name in self._pending_collections:
+                    self.flush_writes()
+                instance = self._read_item_version_document(item_id=item_id)
 
         if instance:
             item_version = self.item_version_metadata_converter.to_metadata(
-                record=instance
+                record=thaw(instance)
             )
             return item_version
         else:
@@ -258,6 +733,84 @@ class FirestoreDataStore(NoSQLDataStore):
 
         raise ItemNotFoundException(item_type="ItemChangeRecord", id=str(id))
 
+    def _iterate_query(
+        self,
+        firestore_query: "Any",
+        first_page: "List[Any]",
+        page_size: "int",
+        max_num: "int",
+    ) -> "Iterator[ItemChangeRecord]":
+        """Iterates the documents returned by a query, starting with a page of page_size
+        documents that was already read. The next pages are only read if the documents of
+        the previous ones were consumed.
+        """
+        docs = first_page
+        num_read = 0
+        while True:
+            for doc in docs:
+                yield self._document_to_raw_instance(doc)
+
+            num_read += len(docs)
+            if len(docs) < page_size or num_read >= max_num:
+                return
+
+            # Only the documents that may still be selected are read
+            page_size = max_num - num_read
+            docs = firestore_query.start_after(docs[-1]).limit(page_size).get()
+
+    def _merge_provider_changes(
+        self, provider_queries: "List[List[Any]]", max_num: "int"
+    ) -> "List[ItemChangeRecord]":
+        """Selects the first changes returned by the queries of all providers and returns them
+        ordered by creation date. The first page of each query is read in parallel and is only
+        as large as needed for the providers to fill max_num together. The pages are merged
+        lazily by timestamp, which is how each query is ordered, so further pages are only read
+        for providers whose changes are selected. The changes selected from each query are
+        always the first ones it returns.
+
+        Args:
+            provider_queries (List[List[Any]]): For each provider, the queries that select
+                its changes ordered by timestamp.
+            max_num (int): Maximum number of changes selected.
+        """
+        firestore_queries = [
+            firestore_query
+            for firestore_queries in provider_queries
+            for firestore_query in firestore_queries
+        ]
+        if not firestore_queries or max_num <= 0:
+            return []
+
+        page_size = max(1, math.ceil(max_num / len(firestore_queries)))
+        with ThreadPoolExecutor(
+            max_workers=min(FIRESTORE_MAX_PARALLEL_QUERIES, len(firestore_queries))
+        ) as executor:
+            first_pages = list(
+                executor.map(
+                    lambda firestore_query: list(
+                        firestore_query.limit(page_size).get()
+                    ),
+                    firestore_queries,
+                )
+            )
+
+        query_streams = [
+            self._iterate_query(
+                firestore_query=firestore_query,
+                first_page=first_page,
+                page_size=page_size,
+                max_num=max_num,
+            )
+            for firestore_query, first_page in zip(firestore_queries, first_pages)
+        ]
+        merged = heapq.merge(
+            *query_streams,
+            key=lambda record: record["change_vector_clock_item"]["timestamp"],
+        )
+        item_change_records = list(itertools.islice(merged, max_num))
+        item_change_records.sort(key=lambda record: record["date_created"])
+        return item_change_records
+
     def select_changes(
         self,
         vector_clock: "VectorClock",
@@ -265,44 +818,55 @@ class FirestoreDataStore(NoSQLDataStore):
         query: "Optional[Query]" = None,
     ) -> "ItemChangeBatch":
 
-        if query is not None:
-            raise ValueError("This backend doesn't support queries!")
-
-        item_change_records: "List[ItemChangeRecord]" = []
-        provider_ids = self._get_provider_ids()
+        item_id_chunks: "List[Optional[List[str]]]" = [None]
+        if query:
+            filtered_item_ids = self.get_item_ids_for_query(
+                query=query, vector_clock=vector_clock
+            )
+            sorted_item_ids = sorted(filtered_item_ids)
+            item_id_chunks = [
+                sorted_item_ids[idx : idx + FIRESTORE_MAX_IN_VALUES]
+                for idx in range(0, len(sorted_item_ids), FIRESTORE_MAX_IN_VALUES)
+            ]
 
+        provider_ids = self._get_provider_ids() if item_id_chunks else []
+        provider_queries: "List[List[Any]]" = []
         for provider_id in provider_ids:
             vector_clock_item = vector_clock.get_vector_clock_item(
                 provider_id=provider_id
             )
-            docs = (
-                self._get_collection_query(CollectionType.ITEM_CHANGES)
-                .where(
-                    "change_vector_clock_item.provider_id",
-                    "==",
-                    vector_clock_item.provider_id,
+            firestore_queries = []
+            for item_ids in item_id_chunks:
+                firestore_query = (
+                    self._get_collection_query(CollectionType.ITEM_CHANGES)
+                    .where(
+                        "change_vector_clock_item.provider_id",
+                        "==",
+                        vector_clock_item.provider_id,
+                    )
+                    .where(
+                        "change_vector_clock_item.timestamp",
+                        ">",
+                        DatetimeWithNanoseconds.fromisoformat(
+                            vector_clock_item.timestamp.isoformat()
+                        ),
+                    )
                 )
-                .where(
-                    "change_vector_clock_item.timestamp",
-                    ">",
-                    DatetimeWithNanoseconds.fromisoformat(
-                        vector_clock_item.timestamp.isoformat()
-                    ),
+                if item_ids is not None:
+                    firestore_query = firestore_query.where("item_id", "in", item_ids)
+
+                firestore_queries.append(
+                    firestore_query.order_by("change_vector_clock_item.timestamp")
                 )
-                .order_by("change_vector_clock_item.timestamp")
-                .limit(max_num)
-                .get()
-            )
+            provider_queries.append(firestore_queries)
 
-            if docs:
-                query_instances = [self._document_to_raw_instance(doc) for doc in docs]
-                item_change_records += query_instances
+        item_change_records = self._merge_provider_changes(
+            provider_queries=provider_queries, max_num=max_num
+        )
 
         current_count = len(item_change_records)
         is_last_batch = current_count == 0
 
-        item_change_records.sort(key=lambda record: record["date_created"])
-
         item_changes = []
         for item_change_record in item_change_records:
             item_change = self.item_change_metadata_converter.to_metadata(
@@ -322,25 +886,21 @@ class FirestoreDataStore(NoSQLDataStore):
         query: "Optional[Query]" = None,
     ) -> "ItemChangeBatch":
 
-        if query is not None:
-            raise ValueError("This backend doesn't support queries!")
-
-        docs = (
-            self._get_collection_query(CollectionType.CONFLICT_LOGS)
-            .where("status", "==", ConflictStatus.DEFERRED.value)
-            .order_by("created_at")
-            .limit(max_num)
-            .get()
+        firestore_query = self._get_collection_query(CollectionType.CONFLICT_LOGS).where(
+            "status", "==", ConflictStatus.DEFERRED.value
         )
+        if query:
+            firestore_query = firestore_query.where(
+                "query_ids", "array_contains", query.get_id()
+            )
+
+        docs = firestore_query.order_by("created_at").limit(max_num).get()
         collection_name = type_to_collection(key=CollectionType.CONFLICT_LOGS)
         if not docs:
             self._usage.register_read(collection_name="", document_id=collection_name)
             return ItemChangeBatch(item_changes=[], is_last_batch=True)
 
         item_change_ids = []
-        if not docs:
-            self._usage.register_read(collection_name="", document_id=collection_name)
-
         for doc in docs:
             instance: "ConflictLogRecord" = self._document_to_raw_instance(doc)
             item_change_ids.append(instance["item_change_loser_id"])
@@ -371,51 +931,137 @@ class FirestoreDataStore(NoSQLDataStore):
         is_creating: "bool" = False,
         query: "Optional[Query]" = None,
     ) -> "ItemChange":
-        if query is not None:
-            raise ValueError("This backend doesn't support queries!")
-
-        return super().save_item_change(
+        super().save_item_change(
             item_change=item_change, is_creating=is_creating, query=query
         )
+        if is_creating and self._session_cache is not None:
+            # A change that was just created doesn't have conflict logs
+            self._session_cache.save(
+                collection_name=self._get_deferred_conflict_logs_cache_name(),
+                document_id=str(item_change.id),
+                value=[],
+            )
+
+        if is_creating and query is not None:
+            tracked_query = self.get_tracked_query(query=query)
+            if tracked_query is not None:
+                self.update_query_vector_clock(
+                    tracked_query=tracked_query, item_change=item_change
+                )
+        return item_change
 
     def run_in_transaction(self, item_change: "ItemChange", callback: "Callable"):
-        self.current_transaction = self.db.transaction()
+        if (
+            # Leaves room for the transaction's own writes
+            len(self._pending_writes) > FIRESTORE_MAX_BATCH_WRITES // 2
+            # The transaction must read the item versions that are still pending
+            or type_to_collection(key=CollectionType.ITEM_VERSIONS)
+            in self._pending_collections
+        ):
+            self.flush_writes()
+
         collection_name = entity_name_to_collection(
             entity_name=item_change.serialization_result.entity_name
         )
+        pending_writes = self._pending_writes
+
+        item_id = str(item_change.serialization_result.item_id)
 
         @firestore.transactional
         def in_transaction(transaction):
+            self.current_transaction = transaction
             try:
-                self.db.collection(collection_name).document(
-                    str(item_change.serialization_result.item_id)
-                ).get(transaction=self.current_transaction)
+                self.db.collection(collection_name).document(item_id).get(
+                    transaction=transaction
+                )
+                # The version used to check for conflicts must be read by the transaction
+                # instead of the cache, so that the item's changes made by the application
+                # meanwhile are detected
+                self._transaction_item_versions = {
+                    item_id: self._read_item_version_document(
+                        item_id=item_id, transaction=transaction
+                    )
+                }
+
+                # The pending writes are committed with the transaction. Firestore requires
+                # them to come after the transaction's reads.
+                for doc_ref, instance in pending_writes:
+                    if instance is None:
+                        transaction.delete(doc_ref)
+                    else:
+                        transaction.set(doc_ref, instance)
+
                 callback()
             finally:
                 self.current_transaction = None
-
-        in_transaction(self.current_transaction)
+                self._transaction_item_versions = {}
+
+        try:
+            in_transaction(self.db.transaction())
+            self._usage.register_commit()
+            if self._pending_writes is pending_writes:
+                self._pending_writes = []
+                self._pending_collections = set()
+        except Exception:
+            # The cached documents may contain writes that were not committed
+            self._cache.clear()
+            if self._session_cache is not None:
+                self._session_cache.clear()
+            raise
+
+    def _get_deferred_conflict_logs_cache_name(self) -> "str":
+        return type_to_collection(key=CollectionType.CONFLICT_LOGS) + "__deferred"
 
     def get_deferred_conflict_logs(
         self, item_change_loser: "ItemChange"
     ) -> "List[ConflictLog]":
-        docs = (
-            self._get_collection_query(key=CollectionType.CONFLICT_LOGS)
-            .order_by("created_at")
-            .where("item_change_loser_id", "==", str(item_change_loser.id))
-            .where("status", "==", ConflictStatus.DEFERRED.value)
-            .get()
+        lookup_collection_name = self._get_deferred_conflict_logs_cache_name()
+        item_change_loser_id = str(item_change_loser.id)
+        records = (
+            self._session_cache.get(
+                collection_name=lookup_collection_name, document_id=item_change_loser_id
+            )
+            if self._session_cache is not None
+            else None
         )
+
+        if records is None:
+            docs = (
+                self._get_collection_query(key=CollectionType.CONFLICT_LOGS)
+                .order_by("created_at")
+                .where("item_change_loser_id", "==", item_change_loser_id)
+                .where("status", "==", ConflictStatus.DEFERRED.value)
+                .get()
+            )
+            if not docs:
+                collection_name = type_to_collection(key=CollectionType.CONFLICT_LOGS)
+                self._usage.register_read(
+                    collection_name=collection_name, document_id=""
+                )
+            records = [self._document_to_raw_instance(doc) for doc in docs]
+            if self._session_cache is not None:
+                self._session_cache.save(
+                    collection_name=lookup_collection_name,
+                    document_id=item_change_loser_id,
+                    value=records,
+                )
+
         metadata_objects = []
-        if not docs:
-            collection_name = type_to_collection(key=CollectionType.CONFLICT_LOGS)
-            self._usage.register_read(collection_name=collection_name, document_id="")
-        for doc in docs:
-            record = self._document_to_raw_instance(doc)
-            metadata_object = self.conflict_log_metadata_converter.to_metadata(record)
+        for record in records:
+            metadata_object = self.conflict_log_metadata_converter.to_metadata(
+                record=thaw(record)
+            )
             metadata_objects.append(metadata_object)
         return metadata_objects
 
+    def save_sync_session(self, sync_session: "SyncSession"):
+        super().save_sync_session(sync_session=sync_session)
+        if sync_session.status == SyncSessionStatus.IN_PROGRESS:
+            self.start_session_cache()
+        else:
+            self.flush_writes()
+            self.end_session_cache()
+
     def get_item_changes(self) -> "List[ItemChange]":
         docs = (
             self._get_collection_query(key=CollectionType.ITEM_CHANGES)
@@ -472,7 +1118,7 @@ class FirestoreDataStore(NoSQLDataStore):
         metadata_objects = []
         for instance in instances:
             metadata_object = self.item_change_metadata_converter.to_metadata(
-                record=instance
+                record=thaw(instance)
             )
             metadata_objects.append(metadata_object)
 
@@ -0,0 +1,127 @@
+from maestro.core.query.metadata import (
+    Filter,
+    Comparison,
+    Comparator,
+    Connector,
+)
+from typing import Any, List, NamedTuple, Optional, Tuple, Union
+
+# Maximum number of values accepted by an "in" clause
+FIRESTORE_MAX_IN_VALUES = 10
+
+# Maximum number of writes committed by a batch or a transaction
+FIRESTORE_MAX_BATCH_WRITES = 500
+
+# Maximum number of queries sent at the same time when reading the changes of each provider
+FIRESTORE_MAX_PARALLEL_QUERIES = 10
+
+_FIRESTORE_OPERATORS = {
+    Comparator.EQUALS: "==",
+    Comparator.NOT_EQUALS: "!=",
+    Comparator.LESS_THAN: "<",
+    Comparator.LESS_THAN_OR_EQUALS: "<=",
+    Comparator.GREATER_THAN: ">",
+    Comparator.GREATER_THAN_OR_EQUALS: ">=",
+    Comparator.IN: "in",
+}
+
+_INEQUALITY_COMPARATORS = [
+    Comparator.NOT_EQUALS,
+    Comparator.LESS_THAN,
+    Comparator.LESS_THAN_OR_EQUALS,
+    Comparator.GREATER_THAN,
+    Comparator.GREATER_THAN_OR_EQUALS,
+]
+
+
+class FirestoreFilter(NamedTuple):
+    """Stores the result of splitting a Filter between Firestore and memory.
+
+    Attributes:
+        where_clauses (List[Tuple[str, str, Any]]): Clauses (field_path, operator, value) that can be chained with "where".
+        residual_filter (Optional[Filter]): The part of the filter that must be evaluated in memory or None if everything was pushed down.
+    """
+
+    where_clauses: "List[Tuple[str, str, Any]]"
+    residual_filter: "Optional[Filter]"
+
+
+def _flatten_and_children(filter: "Filter") -> "List[Union[Filter, Comparison]]":
+    children: "List[Union[Filter, Comparison]]" = []
+    for child in filter.children:
+        if isinstance(child, Filter) and (
+            child.connector == Connector.AND or len(child) == 1
+        ):
+            children.extend(_flatten_and_children(child))
+        else:
+            children.append(child)
+    return children
+
+
+def convert_to_firestore_filter(filter: "Filter", field_prefix: "str") -> "FirestoreFilter":
+    """Splits a Filter into "where" clauses that Firestore can run and a residual Filter that
+    must be evaluated in memory. Only the comparisons connected by AND at the top level are pushed down
+    and Firestore's limits are respected: a single field with inequalities, a single "!=" and a single "in"
+    with at most FIRESTORE_MAX_IN_VALUES values.
+
+    Args:
+        filter (Filter): The filter being converted.
+        field_prefix (str): Prefix added to every field name.
+    """
+    if not filter:
+        return FirestoreFilter(where_clauses=[], residual_filter=None)
+
+    if filter.connector == Connector.OR and len(filter) > 1:
+        return FirestoreFilter(where_clauses=[], residual_filter=filter)
+
+    where_clauses: "List[Tuple[str, str, Any]]" = []
+    residual_children: "List[Union[Filter, Comparison]]" = []
+    inequality_field: "Optional[str]" = None
+    has_not_equals = False
+    has_in = False
+
+    for child in _flatten_and_children(filter):
+        if not isinstance(child, Comparison):
+            residual_children.append(child)
+            continue
+
+        comparator = child.comparator
+        if comparator in _INEQUALITY_COMPARATORS:
+            if inequality_field is not None and inequality_field != child.field_name:
+                residual_children.append(child)
+                continue
+
+            if comparator == Comparator.NOT_EQUALS and (has_not_equals or has_in):
+                residual_children.append(child)
+                continue
+
+            inequality_field = child.field_name
+            has_not_equals = has_not_equals or comparator == Comparator.NOT_EQUALS
+
+        elif comparator == Comparator.IN:
+            if (
+                has_in
+                or has_not_equals
+                or not child.value
+                or len(child.value) > FIRESTORE_MAX_IN_VALUES
+            ):
+                residual_children.append(child)
+                continue
+
+            has_in = True
+
+        where_clauses.append(
+            (
+                field_prefix + child.field_name,
+                _FIRESTORE_OPERATORS[comparator],
+                list(child.value) if comparator == Comparator.IN else child.value,
+            )
+        )
+
+    residual_filter: "Optional[Filter]" = None
+    if residual_children:
+        residual_filter = Filter(children=residual_children, connector=Connector.AND)
+
+    return FirestoreFilter(
+        where_clauses=where_clauses, residual_filter=residual_filter
+    )
@@ -1,26 +1,52 @@
-from typing import ContextManager
-from maestro.core.utils import BaseSyncLock
-
-
-class InMemoryContextManager:
-    lock: "InMemorySyncLock"
-
-    def __init__(self, lock: "InMemorySyncLock"):
-        self.lock = lock
-
-    def __enter__(self):
-        self.lock._running = True
-
-    def __exit__(self, type, value, traceback):
-        self.lock._running = False
+from typing import Dict, Optional, Tuple
+from maestro.core.utils import BaseSyncLock, DEFAULT_SYNC_LOCK_KEY
+import threading
+import time
+import uuid
 
 
 class InMemorySyncLock(BaseSyncLock):
-    def __init__(self):
-        self._running = False
-
-    def is_running(self) -> "bool":
-        return self._running
-
-    def lock(self) -> "ContextManager":
-        return InMemoryContextManager(lock=self)
+    """Sync lock shared by the threads of a single process."""
+
+    def __init__(self, lease_seconds: "float" = 60):
+        super().__init__(lease_seconds=lease_seconds)
+        self._mutex = threading.Lock()
+        self._leases: "Dict[str, Tuple[str, float]]" = {}
+
+    def _get_token(self, key: "str") -> "Optional[str]":
+        lease = self._leases.get(key)
+        if lease is None:
+            return None
+
+        token, expires_at = lease
+        if expires_at <= time.monotonic():
+            del self._leases[key]
+            return None
+
+        return token
+
+    def acquire(self, key: "str") -> "Optional[str]":
+        with self._mutex:
+            if self._get_token(key=key) is not None:
+                return None
+
+            token = str(uuid.uuid4())
+            self._leases[key] = (token, time.monotonic() + self.lease_seconds)
+            return token
+
+    def renew(self, key: "str", token: "str") -> "bool":
+        with self._mutex:
+            if self._get_token(key=key) != token:
+                return False
+
+            self._leases[key] = (token, time.monotonic() + self.lease_seconds)
+            return True
+
+    def release(self, key: "str", token: "str"):
+        with self._mutex:
+            if self._get_token(key=key) == token:
+                del self._leases[key]
+
+    def is_running(self, key: "str" = DEFAULT_SYNC_LOCK_KEY) -> "bool":
+        with self._mutex:
+            return self._get_token(key=key) is not None
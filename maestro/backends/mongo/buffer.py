@@ -0,0 +1,140 @@
+from pymongo import UpdateOne, ReplaceOne, DeleteOne
+from typing import Dict, List, Optional, Tuple, Union, cast
+
+_SET = "set"
+_REPLACE = "replace"
+_DELETE = "delete"
+
+WriteRequest = Union[UpdateOne, ReplaceOne, DeleteOne]
+
+
+def _merge_write(
+    documents: "Dict[str, Tuple[str, Dict]]", pk: "str", kind: "str", fields: "Dict"
+):
+    previous = documents.get(pk)
+    if previous is None or kind != _SET:
+        documents[pk] = (kind, dict(fields))
+    elif previous[0] == _DELETE:
+        # The document must end up with only the new fields
+        documents[pk] = (_REPLACE, dict(fields))
+    else:
+        documents[pk] = (previous[0], {**previous[1], **fields})
+
+
+class WriteBuffer:
+    """Collects the writes performed on each collection so that they are sent to the database
+    with a single bulk_write. Consecutive writes to the same document are merged, which means
+    the requests sent for a collection don't depend on each other and can be executed unordered.
+
+    A buffer may be stacked on a parent buffer, whose pending writes it takes into account.
+    Its own writes are only added to the parent by merge_into_parent, so they can be discarded.
+    """
+
+    def __init__(self, parent: "Optional[WriteBuffer]" = None):
+        self.parent = parent
+        self.documents: "Dict[str, Dict[str, Tuple[str, Dict]]]" = {}
+        # Whether any of this buffer's own writes were popped to be sent to the database
+        self.was_flushed = False
+
+    def save(self, collection: "str", pk: "str", fields: "Dict"):
+        _merge_write(
+            self.documents.setdefault(collection, {}), pk=pk, kind=_SET, fields=fields
+        )
+
+    def delete(self, collection: "str", pk: "str"):
+        self.documents.setdefault(collection, {})[pk] = (_DELETE, {})
+
+    def has_write(self, collection: "str", pk: "str") -> "bool":
+        if pk in self.documents.get(collection, {}):
+            return True
+        return self.parent is not None and self.parent.has_write(
+            collection=collection, pk=pk
+        )
+
+    def overwrites(self, collection: "str", pk: "str") -> "bool":
+        """Checks if the pending write of a document doesn't depend on its stored fields."""
+        entry = self.documents.get(collection, {}).get(pk)
+        if entry is not None:
+            return entry[0] != _SET
+        return self.parent is not None and self.parent.overwrites(
+            collection=collection, pk=pk
+        )
+
+    def apply(
+        self, collection: "str", pk: "str", document: "Optional[Dict]"
+    ) -> "Optional[Dict]":
+        """Returns the document as it will be after the pending write is executed.
+
+        Args:
+            collection (str): The collection name.
+            pk (str): The document's id.
+            document (Optional[Dict]): The document currently stored or None if it doesn't exist.
+        """
+        if self.parent is not None:
+            document = self.parent.apply(
+                collection=collection, pk=pk, document=document
+            )
+
+        entry = self.documents.get(collection, {}).get(pk)
+        if entry is None:
+            return document
+
+        kind, fields = entry
+        if kind == _DELETE:
+            return None
+        if kind == _REPLACE or document is None:
+            return {**fields, "_id": pk}
+        return {**document, **fields}
+
+    def has_writes(self, collection: "str") -> "bool":
+        if self.documents.get(collection):
+            return True
+        return self.parent is not None and self.parent.has_writes(
+            collection=collection
+        )
+
+    def get_collections(self) -> "List[str]":
+        collections = self.parent.get_collections() if self.parent is not None else []
+        for collection, documents in self.documents.items():
+            if documents and collection not in collections:
+                collections.append(collection)
+        return collections
+
+    def _pop_documents(self, collection: "str") -> "Dict[str, Tuple[str, Dict]]":
+        documents = (
+            self.parent._pop_documents(collection=collection)
+            if self.parent is not None
+            else {}
+        )
+        own_documents = self.documents.pop(collection, {})
+        if own_documents:
+            self.was_flushed = True
+        for pk, (kind, fields) in own_documents.items():
+            _merge_write(documents, pk=pk, kind=kind, fields=fields)
+        return documents
+
+    def pop_requests(self, collection: "str") -> "List[WriteRequest]":
+        """Removes the pending writes of a collection, including the parent's, and returns them
+        as bulk_write requests.
+
+        Args:
+            collection (str): The collection name.
+        """
+        requests: "List[WriteRequest]" = []
+        for pk, (kind, fields) in self._pop_documents(collection=collection).items():
+            if kind == _DELETE:
+                requests.append(DeleteOne({"_id": pk}))
+            elif kind == _REPLACE:
+                requests.append(ReplaceOne({"_id": pk}, fields, upsert=True))
+            else:
+                requests.append(UpdateOne({"_id": pk}, {"$set": fields}, upsert=True))
+        return requests
+
+    def merge_into_parent(self):
+        """Adds the pending writes of this buffer to the parent's."""
+        parent = cast("WriteBuffer", self.parent)
+        for collection, documents in self.documents.items():
+            parent_documents = parent.documents.setdefault(collection, {})
+            for pk, (kind, fields) in documents.items():
+                _merge_write(parent_documents, pk=pk, kind=kind, fields=fields)
+        self.documents = {}
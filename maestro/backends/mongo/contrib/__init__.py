@@ -1 +1,2 @@
 from .factory import create_mongo_provider
+from .watcher import MongoChangesWatcher
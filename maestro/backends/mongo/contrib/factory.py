@@ -26,7 +26,10 @@ def create_mongo_provider(
     conflict_log_metadata_converter=ConflictLogMetadataConverter(),
     vector_clock_metadata_converter=VectorClockMetadataConverter(),
     item_serializer=MongoItemSerializer(),
+    tracked_query_metadata_converter=None,
     events_manager_class=EventsManager,
+    use_current_items_collection=False,
+    current_items_indexes=None,
 ):  # pragma: no cover
 
     if item_version_metadata_converter is None:
@@ -40,6 +43,11 @@ def create_mongo_provider(
             vector_clock_converter=vector_clock_metadata_converter,
         )
 
+    if tracked_query_metadata_converter is None:
+        tracked_query_metadata_converter = TrackedQueryMetadataConverter(
+            vector_clock_converter=vector_clock_metadata_converter
+        )
+
     client = MongoClient(connect_uri, tz_aware=True, tzinfo=dt.timezone.utc)
     db = client[database_name]
 
@@ -51,10 +59,19 @@ def create_mongo_provider(
         conflict_log_metadata_converter=conflict_log_metadata_converter,
         vector_clock_metadata_converter=vector_clock_metadata_converter,
         item_serializer=item_serializer,
+        tracked_query_metadata_converter=tracked_query_metadata_converter,
+        use_current_items_collection=use_current_items_collection,
         db=db,
         client=client,
     )
 
+    data_store.create_item_change_indexes()
+    if use_current_items_collection and current_items_indexes:
+        for entity_name, field_names in current_items_indexes.items():
+            data_store.create_current_items_indexes(
+                entity_name=entity_name, field_names=field_names
+            )
+
     sync_session_metadata_converter.data_store = data_store
     item_version_metadata_converter.data_store = data_store
     conflict_log_metadata_converter.data_store = data_store
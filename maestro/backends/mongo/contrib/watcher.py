@@ -0,0 +1,195 @@
+from maestro.backends.base_nosql.collections import CollectionType
+from maestro.backends.base_nosql.utils import type_to_collection
+from maestro.core.metadata import Operation
+from maestro.core.query.metadata import Query
+from maestro.core.query.utils import query_filter_to_lambda
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+import logging
+import threading
+import time
+
+if TYPE_CHECKING:  # pragma: no cover
+    from maestro.backends.mongo import MongoDataStore
+    from maestro.core.orchestrator import SyncOrchestrator
+
+logger = logging.getLogger(__name__)
+
+
+class MongoChangesWatcher:
+    """Watches the changes saved to a MongoDataStore with a change stream and synchronizes them
+    with the remote provider as soon as they are committed, instead of relying on polling.
+
+    Bursts of changes are debounced: a synchronization starts when no new change arrives for
+    debounce_seconds or when max_delay_seconds have passed since the first pending change. The
+    stream's resume token is stored after each synchronization, so a watcher that is restarted
+    also synchronizes the changes committed while it was stopped.
+
+    Attributes:
+        data_store (MongoDataStore): The data store being watched.
+        orchestrator (SyncOrchestrator): The orchestrator that synchronizes the data store with the remote provider.
+        remote_provider_id (str): The identifier of the remote provider. Changes received from it don't trigger synchronizations.
+        queries (Optional[List[Query]]): The queries that are synchronized. If None, the whole data store is synchronized.
+        name (str): Identifies the watcher's resume token, which allows multiple watchers to run for the same data store.
+        debounce_seconds (float): How long the watcher waits for new changes before synchronizing.
+        max_delay_seconds (float): Maximum time a change waits to be synchronized during a burst.
+    """
+
+    def __init__(
+        self,
+        data_store: "MongoDataStore",
+        orchestrator: "SyncOrchestrator",
+        remote_provider_id: "str",
+        queries: "Optional[List[Query]]" = None,
+        name: "str" = "default",
+        debounce_seconds: "float" = 0.5,
+        max_delay_seconds: "float" = 5.0,
+    ):
+        self.data_store = data_store
+        self.orchestrator = orchestrator
+        self.remote_provider_id = remote_provider_id
+        self.queries = queries
+        self.name = name
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._pending_queries: "Dict[str, Optional[Query]]" = {}
+        self._stop_event = threading.Event()
+
+    def _get_resume_tokens_collection(self):
+        return self.data_store.db[type_to_collection(key=CollectionType.RESUME_TOKENS)]
+
+    def load_resume_token(self) -> "Optional[Dict]":
+        """Returns the resume token stored by the last synchronization or None if there isn't one."""
+
+        doc = self._get_resume_tokens_collection().find_one({"_id": self.name})
+        if doc is None:
+            return None
+        return doc["resume_token"]
+
+    def save_resume_token(self, resume_token: "Optional[Dict]"):
+        self._get_resume_tokens_collection().update_one(
+            filter={"_id": self.name},
+            update={"$set": {"resume_token": resume_token}},
+            upsert=True,
+        )
+
+    def _get_pipeline(self) -> "List[Dict]":
+        # Changes received from the remote provider don't have to be sent back
+        return [
+            {
+                "$match": {
+                    "operationType": "insert",
+                    "fullDocument.change_vector_clock_item.provider_id": {
+                        "$ne": self.remote_provider_id
+                    },
+                }
+            }
+        ]
+
+    def _get_affected_queries(self, document: "Dict") -> "List[Optional[Query]]":
+        """Returns the queries whose synchronization must include the change stored in the
+        given document."""
+
+        if self.queries is None:
+            return [None]
+
+        instance = self.data_store._document_to_raw_instance(document=document)
+        item_change = self.data_store.item_change_metadata_converter.to_metadata(
+            record=instance
+        )
+        item: "Any" = None
+        affected_queries: "List[Optional[Query]]" = []
+        for query in self.queries:
+            if item_change.serialization_result.entity_name != query.entity_name:
+                continue
+
+            # Items that are updated or deleted may have been part of the query before
+            if item_change.operation != Operation.INSERT:
+                affected_queries.append(query)
+                continue
+
+            if item is None:
+                item = self.data_store.deserialize_item(
+                    serialization_result=item_change.serialization_result
+                )
+            filter_check = query_filter_to_lambda(
+                filter=query.filter, item_field_getter=self.data_store.item_field_getter
+            )
+            if filter_check(item):
+                affected_queries.append(query)
+
+        return affected_queries
+
+    def add_change(self, document: "Dict"):
+        """Marks the queries affected by a change as pending synchronization.
+
+        Args:
+            document (Dict): The change's document, as returned by the change stream.
+        """
+        for query in self._get_affected_queries(document=document):
+            query_id = query.get_id() if query is not None else ""
+            self._pending_queries[query_id] = query
+
+    def has_pending_changes(self) -> "bool":
+        return bool(self._pending_queries)
+
+    def synchronize(self) -> "bool":
+        """Synchronizes the queries with pending changes. Queries that couldn't be synchronized
+        completely, e.g. because another synchronization was running, the lock was lost, the
+        budget was exhausted or an exception was raised, remain pending.
+
+        Returns:
+            bool: True if all the pending queries were synchronized.
+        """
+        for query_id, query in list(self._pending_queries.items()):
+            try:
+                synchronized = self.orchestrator.run(
+                    initial_source_provider_id=self.data_store.local_provider_id,
+                    query=query,
+                )
+            except Exception:
+                logger.exception("Failed to synchronize changes detected by %s", self)
+                synchronized = False
+
+            if synchronized:
+                del self._pending_queries[query_id]
+
+        return not self._pending_queries
+
+    def run(self):
+        """Watches the changes until stop is called."""
+
+        self._stop_event.clear()
+        collection = self.data_store.db[type_to_collection(key=CollectionType.ITEM_CHANGES)]
+        with collection.watch(
+            pipeline=self._get_pipeline(),
+            resume_after=self.load_resume_token(),
+            max_await_time_ms=max(1, int(self.debounce_seconds * 1000)),
+        ) as stream:
+            first_change_at: "Optional[float]" = None
+            while not self._stop_event.is_set() and stream.alive:
+                # Waits up to debounce_seconds for a new change
+                change = stream.try_next()
+                if change is not None:
+                    self.add_change(document=change["fullDocument"])
+                    if first_change_at is None and self.has_pending_changes():
+                        first_change_at = time.monotonic()
+
+                if first_change_at is None:
+                    continue
+
+                if (
+                    change is None
+                    or time.monotonic() - first_change_at >= self.max_delay_seconds
+                ):
+                    resume_token = stream.resume_token
+                    if self.synchronize():
+                        self.save_resume_token(resume_token=resume_token)
+                        first_change_at = None
+
+    def stop(self):
+        """Makes run return after the change being processed."""
+
+        self._stop_event.set()
+
+    def __repr__(self):
+        return f"MongoChangesWatcher(name='{self.name}')"
@@ -1,5 +1,47 @@
 from maestro.backends.base_nosql.provider import NoSQLSyncProvider
+from maestro.core.metadata import ItemChangeBatch
+from maestro.core.query.metadata import Query
+from pymongo.errors import PyMongoError
+from typing import Callable, List, Optional, TYPE_CHECKING
+import logging
+
+if TYPE_CHECKING:
+    from maestro.backends.mongo import MongoDataStore
+
+logger = logging.getLogger(__name__)
 
 
 class MongoSyncProvider(NoSQLSyncProvider):
-    pass
+    data_store: "MongoDataStore"
+
+    def upload_changes(
+        self, item_change_batch: "ItemChangeBatch", query: "Optional[Query]"
+    ):
+        if not item_change_batch.item_changes:
+            return
+
+        upload_changes = super().upload_changes
+        # The transaction may be retried, so only the events of the attempt that was committed
+        # are published
+        events: "List[Callable]" = []
+
+        def run_attempt():
+            with self.events_manager.collect_events() as attempt_events:
+                upload_changes(item_change_batch=item_change_batch, query=query)
+            events[:] = attempt_events
+
+        try:
+            # The whole batch is applied in a single transaction whose writes are sent together at the end
+            self.data_store.run_batch_in_transaction(
+                item_changes=item_change_batch.item_changes, callback=run_attempt,
+            )
+        except PyMongoError:
+            logger.warning(
+                "Failed to apply a batch of %d changes in a single transaction, applying each change separately.",
+                len(item_change_batch.item_changes),
+                exc_info=True,
+            )
+            upload_changes(item_change_batch=item_change_batch, query=query)
+            return
+
+        self.events_manager.publish_events(events)
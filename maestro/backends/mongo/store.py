@@ -3,6 +3,7 @@ from maestro.backends.base_nosql.utils import (
     entity_name_to_collection,
 )
 from maestro.backends.base_nosql.store import NoSQLDataStore
+from maestro.backends.mongo.buffer import WriteBuffer
 from maestro.backends.mongo.converters import DateConverter
 from maestro.backends.mongo.utils import convert_to_mongo_filter, convert_to_mongo_sort
 from maestro.core.exceptions import ItemNotFoundException
@@ -22,12 +23,21 @@ from maestro.backends.base_nosql.collections import (
     CollectionType,
     ItemChangeRecord,
     ConflictLogRecord,
+    CurrentItemRecord,
 )
-from typing import Dict, Optional, List, Callable, Any, Set
+from typing import Dict, Optional, List, Callable, Any, Set, Iterator, cast
+from pymongo.client_session import ClientSession
+from pymongo.errors import PyMongoError
+import contextlib
 import uuid
 import pymongo
 
 
+class DiscardedWritesError(PyMongoError):
+    """Raised at the end of a batch when a change that failed had some of its writes sent to
+    the database inside the batch's transaction, which therefore can't be committed."""
+
+
 class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
     def __init__(self, *args, **kwargs):
         self.db = kwargs.pop("db")
@@ -35,16 +45,122 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
         self.tracked_query_metadata_converter = kwargs.pop(
             "tracked_query_metadata_converter"
         )
+        self.use_current_items_collection: "bool" = kwargs.pop(
+            "use_current_items_collection", False
+        )
         self.item_field_getter: "Callable[[Any, str], Any]" = lambda item, field_name: item[
             field_name
         ]
         super().__init__(*args, **kwargs)
         self.session = None
         self.date_converter = DateConverter()
+        self._write_buffer: "Optional[WriteBuffer]" = None
+        self._pending_validity_ranges: "List[ItemChangeRecord]" = []
+        self._batch_error: "Optional[PyMongoError]" = None
+
+    def _get_collection(self, collection_name: "str"):
+        self._flush_collection(collection_name=collection_name)
+        return self.db[collection_name]
 
     def _get_collection_query(self, key: "CollectionType"):
         collection_name = type_to_collection(key=key)
-        return self.db[collection_name]
+        return self._get_collection(collection_name=collection_name)
+
+    def _find_document(self, collection_name: "str", pk: "str") -> "Optional[Dict]":
+        """Finds a document by its id, taking into account the writes that weren't sent
+        to the database yet.
+
+        Args:
+            collection_name (str): The collection name.
+            pk (str): The document's id.
+        """
+        write_buffer = self._write_buffer
+        if write_buffer is None or not write_buffer.has_write(
+            collection=collection_name, pk=pk
+        ):
+            return self.db[collection_name].find_one({"_id": pk}, session=self.session)
+
+        document = None
+        if not write_buffer.overwrites(collection=collection_name, pk=pk):
+            document = self.db[collection_name].find_one(
+                {"_id": pk}, session=self.session
+            )
+        return write_buffer.apply(collection=collection_name, pk=pk, document=document)
+
+    @contextlib.contextmanager
+    def buffer_writes(self) -> "Iterator[None]":
+        """Buffers the writes performed inside the block and sends them with one unordered
+        bulk_write per collection when the outermost block ends. Documents read by id include
+        the pending writes and any other read sends the pending writes of the collection
+        being read first. Each nested block has its own buffer, whose writes are discarded
+        if the block raises an exception.
+        """
+        if self._write_buffer is None:
+            self._write_buffer = WriteBuffer()
+            try:
+                yield
+                self.flush_writes()
+            finally:
+                self._write_buffer = None
+                self._pending_validity_ranges = []
+        else:
+            parent_buffer = self._write_buffer
+            write_buffer = WriteBuffer(parent=parent_buffer)
+            pending_validity_ranges = list(self._pending_validity_ranges)
+            self._write_buffer = write_buffer
+            try:
+                yield
+            except BaseException:
+                self._pending_validity_ranges = pending_validity_ranges
+                if write_buffer.was_flushed and self._batch_error is None:
+                    # A read already sent some of the discarded writes to the database
+                    self._batch_error = DiscardedWritesError(
+                        "The writes of a block that failed were already sent"
+                    )
+                raise
+            else:
+                write_buffer.merge_into_parent()
+            finally:
+                self._write_buffer = parent_buffer
+
+    def flush_writes(self):
+        """Sends the buffered writes to the database. Changes and VectorClocks are written
+        last so that, if a write fails, the changes are received again in the next
+        synchronization.
+        """
+        if self._write_buffer is None:
+            return
+
+        last_collection_names = [
+            type_to_collection(key=CollectionType.ITEM_CHANGES),
+            type_to_collection(key=CollectionType.PROVIDER_IDS),
+        ]
+        collection_names = [
+            collection_name
+            for collection_name in self._write_buffer.get_collections()
+            if collection_name not in last_collection_names
+        ]
+        for collection_name in collection_names + last_collection_names:
+            self._flush_collection(collection_name=collection_name)
+
+    def _flush_collection(self, collection_name: "str"):
+        if self._write_buffer is None:
+            return
+
+        requests = self._write_buffer.pop_requests(collection=collection_name)
+        if requests:
+            self.db[collection_name].bulk_write(
+                requests, ordered=False, session=self.session
+            )
+
+        if (
+            self._pending_validity_ranges
+            and collection_name == type_to_collection(key=CollectionType.ITEM_CHANGES)
+        ):
+            item_change_records = self._pending_validity_ranges
+            self._pending_validity_ranges = []
+            for item_change_record in item_change_records:
+                self._update_validity_ranges(item_change_record=item_change_record)
 
     def _document_to_raw_instance(self, document):
         document["id"] = document.pop("_id")
@@ -53,12 +169,18 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
         return document
 
     def _delete(self, instance: "Dict", collection: "str"):
-        pk = instance.pop("id")
-        self.db[collection].delete_one({"_id": str(pk)}, session=self.session)
+        pk = str(instance.pop("id"))
+        if self._write_buffer is not None:
+            self._write_buffer.delete(collection=collection, pk=pk)
+            return
+
+        self.db[collection].delete_one({"_id": pk}, session=self.session)
 
     def _get_provider_ids(self) -> "List[str]":
         collection_name = type_to_collection(key=CollectionType.PROVIDER_IDS)
-        docs = self.db[collection_name].find()
+        docs = self._get_collection(collection_name=collection_name).find(
+            session=self.session
+        )
         provider_ids = [doc["_id"] for doc in docs]
 
         if self.local_provider_id not in provider_ids:
@@ -67,8 +189,9 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
         return provider_ids
 
     def get_tracked_query(self, query: "Query") -> "Optional[TrackedQuery]":
-        doc = self._get_collection_query(CollectionType.TRACKED_QUERIES).find_one(
-            {"_id": query.get_id()}
+        doc = self._find_document(
+            collection_name=type_to_collection(key=CollectionType.TRACKED_QUERIES),
+            pk=query.get_id(),
         )
         if not doc:
             return None
@@ -81,7 +204,8 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
 
     def get_tracked_queries(self) -> "List[TrackedQuery]":
         docs = self._get_collection_query(CollectionType.TRACKED_QUERIES).find(
-            filter={}
+            filter={},
+            session=self.session,
         )
 
         tracked_queries: "List[TrackedQuery]" = []
@@ -94,90 +218,267 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
 
         return tracked_queries
 
+    def _get_current_items_collection_name(self, collection_name: "str") -> "str":
+        return (
+            type_to_collection(key=CollectionType.CURRENT_ITEMS)
+            + "__"
+            + collection_name
+        )
+
+    def _save_current_item(self, item_version: "ItemVersion"):
+        item_change_record = self.item_change_metadata_converter.to_record(
+            metadata_object=item_version.current_item_change
+        )
+        current_item_record: "CurrentItemRecord" = {
+            "id": item_change_record["item_id"],
+            "item_change_id": item_change_record["id"],
+            "inserted_timestamp": item_change_record["insert_vector_clock_item"][
+                "timestamp"
+            ],
+            "serialized_item": item_change_record["serialized_item"],
+        }
+        self._save(
+            instance=cast("Dict", current_item_record),
+            collection=self._get_current_items_collection_name(
+                collection_name=item_change_record["collection_name"]
+            ),
+        )
+
+    def create_current_items_indexes(
+        self, entity_name: "str", field_names: "List[str]"
+    ):
+        """Creates the indexes used by queries that read from the current items collection
+        of an entity. Should be called once for each field that is used in query filters
+        or ordering.
+
+        Args:
+            entity_name (str): The entity whose collection is being indexed.
+            field_names (List[str]): Names of the item fields that should be indexed.
+        """
+        collection_name = self._get_current_items_collection_name(
+            collection_name=entity_name_to_collection(entity_name)
+        )
+        collection = self.db[collection_name]
+        collection.create_index([("inserted_timestamp", pymongo.ASCENDING)])
+        for field_name in field_names:
+            collection.create_index(
+                [("serialized_item." + field_name, pymongo.ASCENDING)]
+            )
+
+    def rebuild_current_items(self, entity_name: "str"):
+        """Rebuilds the current items collection of an entity from its ItemVersions. Must
+        be called once for existing data after enabling the current items collection.
+
+        Args:
+            entity_name (str): The entity whose current items are being rebuilt.
+        """
+        collection_name = entity_name_to_collection(entity_name)
+        docs = self._get_collection_query(CollectionType.ITEM_VERSIONS).find(
+            filter={"collection_name": {"$eq": collection_name}},
+            session=self.session,
+        )
+        for doc in docs:
+            instance = self._document_to_raw_instance(doc)
+            item_version = self.item_version_metadata_converter.to_metadata(
+                record=instance
+            )
+            self._save_current_item(item_version=item_version)
+
+    def _query_current_items(self, query: "Query") -> "List[Any]":
+        mongo_filter = convert_to_mongo_filter(
+            filter=query.filter, field_prefix="serialized_item."
+        )
+
+        mongo_sort = {}
+        if query.ordering:
+            mongo_sort_ordering = convert_to_mongo_sort(
+                ordering=query.ordering, field_prefix="serialized_item."
+            )
+            mongo_sort.update(mongo_sort_ordering)
+
+        mongo_sort.update({"inserted_timestamp": pymongo.ASCENDING})
+
+        collection_name = self._get_current_items_collection_name(
+            collection_name=entity_name_to_collection(query.entity_name)
+        )
+        docs = self._get_collection(collection_name=collection_name).find(
+            filter=mongo_filter,
+            sort=list(mongo_sort.items()),
+            skip=query.offset or 0,
+            limit=query.limit or 0,
+            session=self.session,
+        )
+
+        items = [doc["serialized_item"] for doc in docs]
+
+        return items
+
     def query_items(
         self, query: "Query", vector_clock: "Optional[VectorClock]"
     ) -> "List[Any]":
 
+        if vector_clock is None and self.use_current_items_collection:
+            return self._query_current_items(query=query)
+
         collection_name = entity_name_to_collection(query.entity_name)
-        mongo_filter: "Dict" = {
-            "collection_name": {"$eq": collection_name},
-        }
-        item_mongo_filter = convert_to_mongo_filter(
-            filter=query.filter, field_prefix="serialized_item."
-        )
-        mongo_filter.update(item_mongo_filter)
+        and_expressions: "List[Dict]" = [
+            {"collection_name": {"$eq": collection_name}},
+        ]
+        if query.filter.children:
+            and_expressions.append(
+                convert_to_mongo_filter(
+                    filter=query.filter, field_prefix="serialized_item."
+                )
+            )
 
         if vector_clock:
+            # The change must have been created before the clock and not superseded by
+            # any change that was also created before the clock
             or_expressions: "List[Dict]" = []
+            superseded_expressions: "List[Dict]" = []
             provider_ids = []
             for vector_clock_item in vector_clock:
                 provider_ids.append(vector_clock_item.provider_id)
+                timestamp = self.date_converter.serialize_date(
+                    vector_clock_item.timestamp
+                )
                 or_expressions.append(
                     {
-                        "$and": [
-                            {
-                                "change_vector_clock_item.provider_id": vector_clock_item.provider_id,
-                                "change_vector_clock_item.timestamp": {
-                                    "$lte": self.date_converter.serialize_date(
-                                        vector_clock_item.timestamp
-                                    )
-                                },
-                            }
-                        ]
+                        "change_vector_clock_item.provider_id": vector_clock_item.provider_id,
+                        "change_vector_clock_item.timestamp": {"$lte": timestamp},
+                    }
+                )
+                superseded_expressions.append(
+                    {
+                        "provider_id": vector_clock_item.provider_id,
+                        "timestamp": {"$lte": timestamp},
                     }
                 )
             or_expressions.append(
                 {"change_vector_clock_item.provider_id": {"$nin": provider_ids}}
             )
+            superseded_expressions.append({"provider_id": {"$nin": provider_ids}})
 
-            mongo_filter["$or"] = or_expressions
-
-        pipeline = [
-            {"$match": mongo_filter,},
-            {
-                "$setWindowFields": {
-                    "partitionBy": "$item_id",
-                    "sortBy": {"date_created": pymongo.DESCENDING},
-                    "output": {"serialized_item": {"$first": "$serialized_item"}},
-                },
-            },
-            {
-                "$group": {
-                    "_id": "$item_id",
-                    "item": {"$first": "$$ROOT.serialized_item"},
-                    "inserted_timestamp": {
-                        "$first": "$$ROOT.insert_vector_clock_item.timestamp"
-                    },
-                },
-            },
-        ]
+            and_expressions.append({"$or": or_expressions})
+            and_expressions.append(
+                {
+                    "superseded_at": {
+                        "$not": {"$elemMatch": {"$or": superseded_expressions}}
+                    }
+                }
+            )
+        else:
+            and_expressions.append({"superseded_at.0": {"$exists": False}})
 
         mongo_sort = {}
 
         if query.ordering:
             mongo_sort_ordering = convert_to_mongo_sort(
-                ordering=query.ordering, field_prefix="item."
+                ordering=query.ordering, field_prefix="serialized_item."
             )
             mongo_sort.update(mongo_sort_ordering)
 
-        mongo_sort.update({"inserted_timestamp": pymongo.ASCENDING})
+        mongo_sort.update({"insert_vector_clock_item.timestamp": pymongo.ASCENDING})
 
-        pipeline.append({"$sort": mongo_sort})
-        pipeline.append({"$replaceRoot": {"newRoot": "$item"},},)
+        docs = self._get_collection_query(CollectionType.ITEM_CHANGES).find(
+            filter={"$and": and_expressions},
+            projection={"serialized_item": True},
+            sort=list(mongo_sort.items()),
+            skip=query.offset or 0,
+            limit=query.limit or 0,
+            session=self.session,
+        )
 
-        if query.offset:
-            pipeline.append({"$skip": query.offset})
+        items = [doc["serialized_item"] for doc in docs]
+
+        return items
 
-        if query.limit:
-            pipeline.append({"$limit": query.limit})
+    def _update_validity_ranges(self, item_change_record: "ItemChangeRecord"):
+        """Updates the validity ranges of the changes associated with the same item as
+        the given change. Each change stores in "superseded_at" the first timestamp, per provider,
+        of the changes that replaced it, so that the change that was current at a given
+        VectorClock can be found with a single indexed query.
 
-        docs = self._get_collection_query(CollectionType.ITEM_CHANGES).aggregate(
-            pipeline
+        Args:
+            item_change_record (ItemChangeRecord): The change that was just saved.
+        """
+        collection = self._get_collection_query(CollectionType.ITEM_CHANGES)
+        change_vector_clock_item = item_change_record["change_vector_clock_item"]
+
+        # Changes created before this one are superseded by it
+        collection.update_many(
+            filter={
+                "item_id": {"$eq": item_change_record["item_id"]},
+                "date_created": {"$lt": item_change_record["date_created"]},
+                "superseded_at.provider_id": {
+                    "$ne": change_vector_clock_item["provider_id"]
+                },
+            },
+            update={"$push": {"superseded_at": change_vector_clock_item}},
+            session=self.session,
         )
 
-        items = [doc for doc in docs]
+        # This change is superseded by the ones created after it
+        docs = collection.find(
+            filter={
+                "item_id": {"$eq": item_change_record["item_id"]},
+                "date_created": {"$gt": item_change_record["date_created"]},
+            },
+            projection={"change_vector_clock_item": True},
+            sort=[["date_created", pymongo.ASCENDING]],
+            session=self.session,
+        )
+        superseded_at: "Dict[str, Dict]" = {}
+        for doc in docs:
+            provider_id = doc["change_vector_clock_item"]["provider_id"]
+            if provider_id not in superseded_at:
+                superseded_at[provider_id] = doc["change_vector_clock_item"]
 
-        return items
+        collection.update_one(
+            filter={"_id": str(item_change_record["id"])},
+            update={"$set": {"superseded_at": list(superseded_at.values())}},
+            session=self.session,
+        )
+
+    def rebuild_validity_ranges(self):
+        """Recalculates the validity ranges of all changes. Must be called once for changes
+        that were stored before validity ranges were introduced.
+        """
+        collection = self._get_collection_query(CollectionType.ITEM_CHANGES)
+        docs = collection.find(
+            filter={},
+            projection={"item_id": True, "change_vector_clock_item": True},
+            sort=[["item_id", pymongo.ASCENDING], ["date_created", pymongo.DESCENDING]],
+        )
+
+        current_item_id = None
+        superseded_at: "Dict[str, Dict]" = {}
+        for doc in docs:
+            if doc["item_id"] != current_item_id:
+                current_item_id = doc["item_id"]
+                superseded_at = {}
+
+            collection.update_one(
+                filter={"_id": doc["_id"]},
+                update={"$set": {"superseded_at": list(superseded_at.values())}},
+            )
+            change_vector_clock_item = doc["change_vector_clock_item"]
+            superseded_at[change_vector_clock_item["provider_id"]] = change_vector_clock_item
+
+    def create_item_change_indexes(self):
+        """Creates the indexes used when selecting changes and running time-travel queries."""
+        collection = self._get_collection_query(CollectionType.ITEM_CHANGES)
+        collection.create_index(
+            [("item_id", pymongo.ASCENDING), ("date_created", pymongo.ASCENDING)]
+        )
+        collection.create_index(
+            [
+                ("collection_name", pymongo.ASCENDING),
+                ("change_vector_clock_item.provider_id", pymongo.ASCENDING),
+                ("change_vector_clock_item.timestamp", pymongo.ASCENDING),
+            ]
+        )
+        collection.create_index([("date_created", pymongo.ASCENDING)])
 
     def save_tracked_query(self, tracked_query: "TrackedQuery"):
         instance = self.tracked_query_metadata_converter.to_record(
@@ -189,9 +490,13 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
         )
 
     def _save(self, instance: "Dict", collection: "str"):
-        pk = instance.pop("id")
+        pk = str(instance.pop("id"))
+        if self._write_buffer is not None:
+            self._write_buffer.save(collection=collection, pk=pk, fields=instance)
+            return
+
         self.db[collection].update_one(
-            filter={"_id": str(pk)},
+            filter={"_id": pk},
             update={"$set": instance},
             upsert=True,
             session=self.session,
@@ -206,7 +511,9 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
                 return VectorClock.create_empty(provider_ids=[self.local_provider_id])
 
         vector_clock = VectorClock.create_empty(provider_ids=[self.local_provider_id])
-        docs = self._get_collection_query(CollectionType.PROVIDER_IDS).find()
+        docs = self._get_collection_query(CollectionType.PROVIDER_IDS).find(
+            session=self.session
+        )
         for doc in docs:
             instance = self._document_to_raw_instance(doc)
             timestamp = self.date_converter.deserialize_date(
@@ -217,9 +524,15 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
             )
         return vector_clock
 
+    def save_item_version(self, item_version: "ItemVersion"):
+        super().save_item_version(item_version=item_version)
+        if self.use_current_items_collection:
+            self._save_current_item(item_version=item_version)
+
     def get_item_version(self, item_id: "str") -> "Optional[ItemVersion]":
-        doc = self._get_collection_query(CollectionType.ITEM_VERSIONS).find_one(
-            {"_id": str(item_id)}
+        doc = self._find_document(
+            collection_name=type_to_collection(key=CollectionType.ITEM_VERSIONS),
+            pk=str(item_id),
         )
         if doc:
             instance = self._document_to_raw_instance(doc)
@@ -231,8 +544,9 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
             return None
 
     def get_item_change_by_id(self, id: "uuid.UUID") -> "ItemChange":
-        doc = self._get_collection_query(CollectionType.ITEM_CHANGES).find_one(
-            filter={"_id": str(id)}
+        doc = self._find_document(
+            collection_name=type_to_collection(key=CollectionType.ITEM_CHANGES),
+            pk=str(id),
         )
         if doc:
             instance = self._document_to_raw_instance(doc)
@@ -256,42 +570,44 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
                 query=query, vector_clock=vector_clock
             )
 
-        item_change_records: "List[ItemChangeRecord]" = []
-        provider_ids = self._get_provider_ids()
-
-        for provider_id in provider_ids:
-            vector_clock_item = vector_clock.get_vector_clock_item(
-                provider_id=provider_id
+        # A single query selects the changes of all providers
+        or_expressions: "List[Dict]" = []
+        provider_ids = []
+        for vector_clock_item in vector_clock:
+            provider_ids.append(vector_clock_item.provider_id)
+            or_expressions.append(
+                {
+                    "change_vector_clock_item.provider_id": {
+                        "$eq": vector_clock_item.provider_id
+                    },
+                    "change_vector_clock_item.timestamp": {
+                        "$gt": self.date_converter.serialize_date(
+                            vector_clock_item.timestamp
+                        )
+                    },
+                }
             )
-            mongo_filter = {
-                "change_vector_clock_item.provider_id": {
-                    "$eq": vector_clock_item.provider_id
-                },
-                "change_vector_clock_item.timestamp": {
-                    "$gt": self.date_converter.serialize_date(
-                        vector_clock_item.timestamp
-                    )
-                },
-            }
-
-            if filtered_item_ids is not None:
-                mongo_filter["item_id"] = {"$in": list(filtered_item_ids)}
+        or_expressions.append(
+            {"change_vector_clock_item.provider_id": {"$nin": provider_ids}}
+        )
 
-            docs = self._get_collection_query(CollectionType.ITEM_CHANGES).find(
-                filter=mongo_filter,
-                limit=max_num,
-                sort=[["change_vector_clock_item.timestamp", pymongo.ASCENDING]],
-            )
+        mongo_filter: "Dict" = {"$or": or_expressions}
+        if filtered_item_ids is not None:
+            mongo_filter["item_id"] = {"$in": list(filtered_item_ids)}
 
-            if docs:
-                query_instances = [self._document_to_raw_instance(doc) for doc in docs]
-                item_change_records += query_instances
+        docs = self._get_collection_query(CollectionType.ITEM_CHANGES).find(
+            filter=mongo_filter,
+            limit=max_num,
+            sort=[["date_created", pymongo.ASCENDING]],
+            session=self.session,
+        )
+        item_change_records: "List[ItemChangeRecord]" = [
+            self._document_to_raw_instance(doc) for doc in docs
+        ]
 
         current_count = len(item_change_records)
         is_last_batch = current_count == 0
 
-        item_change_records.sort(key=lambda record: record["date_created"])
-
         item_changes = []
         for item_change_record in item_change_records:
             item_change = self.item_change_metadata_converter.to_metadata(
@@ -320,6 +636,7 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
             filter=mongo_filter,
             sort=[["created_at", pymongo.ASCENDING]],
             limit=max_num,
+            session=self.session,
         )
         if not docs:
             return ItemChangeBatch(item_changes=[], is_last_batch=True)
@@ -350,22 +667,87 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
 
         return item_change_batch
 
-    def run_in_transaction(self, item_change: "ItemChange", callback: "Callable"):
-        collection_name = entity_name_to_collection(
-            entity_name=item_change.serialization_result.entity_name
-        )
+    def _lock_items(self, item_changes: "List[ItemChange]"):
+        """Writes to the items associated with the changes so that concurrent transactions
+        that modify them fail with a write conflict. A single update is performed for the
+        items of each collection.
 
-        with self.client.start_session() as self.session:
-            with self.session.start_transaction():
-                try:
-                    self.db[collection_name].find_one_and_update(
-                        filter={"_id": str(item_change.serialization_result.item_id)},
-                        update={"$set": {"_lock": uuid.uuid4()}},
-                        session=self.session,
-                    )
+        Args:
+            item_changes (List[ItemChange]): The changes whose items are locked.
+        """
+        item_ids_by_collection: "Dict[str, List[str]]" = {}
+        for item_change in item_changes:
+            collection_name = entity_name_to_collection(
+                entity_name=item_change.serialization_result.entity_name
+            )
+            item_ids = item_ids_by_collection.setdefault(collection_name, [])
+            item_id = str(item_change.serialization_result.item_id)
+            if item_id not in item_ids:
+                item_ids.append(item_id)
+
+        for collection_name, item_ids in item_ids_by_collection.items():
+            self.db[collection_name].update_many(
+                filter={"_id": {"$in": item_ids}},
+                update={"$set": {"_lock": uuid.uuid4()}},
+                session=self.session,
+            )
+
+    def _run_with_transaction(
+        self, item_changes: "List[ItemChange]", callback: "Callable"
+    ):
+        def in_transaction(session: "ClientSession"):
+            self.session = session
+            try:
+                self._lock_items(item_changes=item_changes)
+                with self.buffer_writes():
                     callback()
-                finally:
-                    self.session = None
+            finally:
+                self.session = None
+
+        # with_transaction retries the callback and the commit when a transient error occurs
+        with self.client.start_session() as session:
+            session.with_transaction(in_transaction)
+
+    def run_in_transaction(self, item_change: "ItemChange", callback: "Callable"):
+        if self.session is not None:
+            # Part of a batch whose items were already locked
+            try:
+                with self.buffer_writes():
+                    callback()
+            except PyMongoError as e:
+                # The transaction can't be used anymore, so the whole batch must fail
+                if self._batch_error is None:
+                    self._batch_error = e
+                raise
+            return
+
+        self._run_with_transaction(item_changes=[item_change], callback=callback)
+
+    def run_batch_in_transaction(
+        self, item_changes: "List[ItemChange]", callback: "Callable"
+    ):
+        """Runs the callback that processes a batch of changes inside a single transaction.
+        The items of all the changes are locked at the beginning of the transaction and the
+        calls to run_in_transaction made by the callback become part of it. A database error
+        raised while processing any of the changes makes the whole batch fail, as does a change
+        that fails after some of its writes were sent to the database. The callback is called
+        again if the transaction is retried.
+
+        Args:
+            item_changes (List[ItemChange]): The changes being processed.
+            callback (Callable): The function that processes the changes.
+        """
+
+        def run_batch():
+            self._batch_error = None
+            try:
+                callback()
+                if self._batch_error is not None:
+                    raise self._batch_error
+            finally:
+                self._batch_error = None
+
+        self._run_with_transaction(item_changes=item_changes, callback=run_batch)
 
     def get_deferred_conflict_logs(
         self, item_change_loser: "ItemChange"
@@ -376,6 +758,7 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
                 "status": {"$eq": ConflictStatus.DEFERRED.value,},
             },
             sort=[["created_at", pymongo.ASCENDING]],
+            session=self.session,
         )
         metadata_objects = []
 
@@ -396,6 +779,16 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
         super().save_item_change(
             item_change=item_change, is_creating=is_creating, query=query
         )
+        if is_creating:
+            item_change_record = self.item_change_metadata_converter.to_record(
+                metadata_object=item_change
+            )
+            if self._write_buffer is not None:
+                # The ranges are updated after the change is written
+                self._pending_validity_ranges.append(item_change_record)
+            else:
+                self._update_validity_ranges(item_change_record=item_change_record)
+
         if is_creating and query is not None:
             tracked_query = self.get_tracked_query(query=query)
             if tracked_query is not None:
@@ -406,7 +799,9 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
 
     def get_item_changes(self) -> "List[ItemChange]":
         docs = self._get_collection_query(key=CollectionType.ITEM_CHANGES).find(
-            filter={}, sort=[["date_created", pymongo.ASCENDING]]
+            filter={},
+            sort=[["date_created", pymongo.ASCENDING]],
+            session=self.session,
         )
         metadata_objects = []
 
@@ -424,6 +819,7 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
 
         docs = self._get_collection_query(key=CollectionType.ITEM_CHANGES).find(
             {"_id": {"$in": ids}},
+            session=self.session,
         )
         for doc in docs:
             instance = self._document_to_raw_instance(doc)
@@ -444,7 +840,9 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
 
     def get_item_versions(self) -> "List[ItemVersion]":
         docs = self._get_collection_query(key=CollectionType.ITEM_VERSIONS).find(
-            filter={}, sort=[["date_created", pymongo.ASCENDING]]
+            filter={},
+            sort=[["date_created", pymongo.ASCENDING]],
+            session=self.session,
         )
         metadata_objects = []
 
@@ -456,7 +854,9 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
 
     def get_sync_sessions(self) -> "List[SyncSession]":
         docs = self._get_collection_query(key=CollectionType.SYNC_SESSIONS).find(
-            filter={}, sort=[["started_at", pymongo.ASCENDING]]
+            filter={},
+            sort=[["started_at", pymongo.ASCENDING]],
+            session=self.session,
         )
         metadata_objects = []
 
@@ -468,7 +868,9 @@ class MongoDataStore(TrackQueriesStoreMixin, NoSQLDataStore):
 
     def get_conflict_logs(self) -> "List[ConflictLog]":
         docs = self._get_collection_query(key=CollectionType.CONFLICT_LOGS).find(
-            filter={}, sort=[["created_at", pymongo.ASCENDING]]
+            filter={},
+            sort=[["created_at", pymongo.ASCENDING]],
+            session=self.session,
         )
         metadata_objects = []
 
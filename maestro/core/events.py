@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
 from .query.metadata import Query
 from .metadata import (
     ItemChange,
@@ -8,10 +8,12 @@ from .metadata import (
     SyncSession,
     SyncSessionStatus,
 )
-from .utils import cast_away_optional, get_now_utc
+from .utils import cast_away_optional, get_now_utc, subtract_usage
+from contextlib import contextmanager
 import uuid
 import traceback
 import sys
+import time
 
 if TYPE_CHECKING:  # pragma: no cover
     from .store import BaseDataStore
@@ -22,10 +24,53 @@ class EventsManager:
 
     data_store: "BaseDataStore"
     current_sync_session: "Optional[SyncSession]"
+    _initial_usage: "Dict[str, int]"
+    _collected_events: "Optional[List[Callable]]"
 
     def __init__(self, data_store: "BaseDataStore"):
         self.data_store = data_store
         self.current_sync_session = None
+        self._initial_usage = {}
+        self._collected_events = None
+
+    def publish(self, event: "Callable"):
+        """Publishes an event, i.e. calls the function that records it, unless events are
+        being collected by collect_events.
+
+        Args:
+            event (Callable): The function that records the event, e.g. by updating the running
+            sync session or calling an event handler.
+        """
+        if self._collected_events is not None:
+            self._collected_events.append(event)
+        else:
+            event()
+
+    @contextmanager
+    def collect_events(self) -> "Iterator[List[Callable]]":
+        """Collects the events published inside the block instead of publishing them. This is
+        used when the block may be run again, e.g. a transaction that is retried, so that the
+        events are only published once with publish_events after it succeeds.
+
+        Yields:
+            List[Callable]: The events collected, in the order they were published.
+        """
+        previous_collected_events = self._collected_events
+        collected_events: "List[Callable]" = []
+        self._collected_events = collected_events
+        try:
+            yield collected_events
+        finally:
+            self._collected_events = previous_collected_events
+
+    def publish_events(self, events: "List[Callable]"):
+        """Publishes the events collected by collect_events.
+
+        Args:
+            events (List[Callable]): The events collected.
+        """
+        for event in events:
+            self.publish(event)
 
     def on_start_sync_session(
         self,
@@ -39,6 +84,7 @@ class EventsManager:
             source_provider_id (str): Source provider id.
             target_provider_id (str): Target provider id.
         """
+        self._initial_usage = self.data_store.get_usage()
         now_utc = get_now_utc()
         sync_session = SyncSession(
             id=uuid.uuid4(),
@@ -53,6 +99,40 @@ class EventsManager:
         self.data_store.save_sync_session(sync_session=sync_session)
         self.current_sync_session = sync_session
 
+    def increment_stat(self, key: "str", value: "float" = 1):
+        """Adds a value to one of the running sync session's stats. Nothing is recorded
+        outside sync sessions.
+
+        Args:
+            key (str): The stat's name, e.g. "changes_applied".
+            value (float): The value that is added.
+        """
+        def update_stat():
+            if self.current_sync_session is None:
+                return
+
+            stats = self.current_sync_session.stats
+            stats[key] = stats.get(key, 0) + value
+
+        self.publish(update_stat)
+
+    @contextmanager
+    def measure_stage(self, stage: "str"):
+        """Adds the time spent in the block to the running sync session's stat named
+        "<stage>_seconds". Stages may be nested, e.g. "upload_changes" includes
+        "check_conflict" and "execute_item_change".
+
+        Args:
+            stage (str): The stage's name.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.increment_stat(
+                key=stage + "_seconds", value=time.perf_counter() - start_time
+            )
+
     def on_conflict_resolved(
         self,
         conflict_type: "ConflictType",
@@ -135,7 +215,11 @@ class EventsManager:
         Args:
             item_change (ItemChange): ItemChange saved to the data store
         """
-        cast_away_optional(self.current_sync_session).item_changes.append(item_change)
+        self.publish(
+            lambda: cast_away_optional(self.current_sync_session).item_changes.append(
+                item_change
+            )
+        )
 
     def on_item_change_applied(self, item_change: "ItemChange"):
         """Called after an ItemChange was executed successfully.
@@ -170,6 +254,9 @@ class EventsManager:
         cast_away_optional(
             self.current_sync_session
         ).status = SyncSessionStatus.FINISHED
+        cast_away_optional(self.current_sync_session).usage = subtract_usage(
+            usage=self.data_store.get_usage(), initial_usage=self._initial_usage
+        )
         self.data_store.save_sync_session(sync_session=self.current_sync_session)
         self.current_sync_session = None
 
@@ -180,6 +267,9 @@ class EventsManager:
         now_utc = get_now_utc()
         cast_away_optional(self.current_sync_session).ended_at = now_utc
         cast_away_optional(self.current_sync_session).status = SyncSessionStatus.FAILED
+        cast_away_optional(self.current_sync_session).usage = subtract_usage(
+            usage=self.data_store.get_usage(), initial_usage=self._initial_usage
+        )
         self.data_store.save_sync_session(
             sync_session=cast_away_optional(self.current_sync_session)
         )
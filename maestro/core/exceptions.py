@@ -9,4 +9,15 @@ class ItemNotFoundException(Exception):
     def __init__(self, item_type: "str", id: "str"):
         super(ItemNotFoundException, self).__init__(
             f"Item of type '{item_type}' and ID '{id}' not found."
-        )
\ No newline at end of file
+        )
+
+class SyncLockedException(Exception):
+    def __init__(self, key: "str"):
+        super().__init__(f"The sync lock '{key}' is held by another session.")
+
+
+class SyncLockLostException(Exception):
+    def __init__(self, key: "str"):
+        super().__init__(
+            f"The lease of the sync lock '{key}' expired or was taken by another session."
+        )
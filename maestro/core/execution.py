@@ -6,6 +6,7 @@ from maestro.core.metadata import (
     Operation,
     ItemVersion,
 )
+from maestro.core.tracing import get_tracer
 
 if TYPE_CHECKING:  # pragma: no cover
     from maestro.core.store import BaseDataStore
@@ -119,6 +120,19 @@ class ChangesExecutor:
             query (Optional[Query]): The query that is being synced
 
         """
+        with get_tracer().span(
+            "process_remote_change",
+            item_change_id=str(item_change.id),
+            item_id=item_change.serialization_result.item_id,
+            entity_name=item_change.serialization_result.entity_name,
+            operation=item_change.operation.value,
+            provider_id=item_change.change_vector_clock_item.provider_id,
+        ):
+            self._process_remote_change(item_change=item_change, query=query)
+
+    def _process_remote_change(
+        self, item_change: "ItemChange", query: "Optional[Query]"
+    ):
         item_change = self.data_store.get_or_create_item_change(
             item_change=item_change, query=query
         )
@@ -132,10 +146,13 @@ class ChangesExecutor:
             return
 
         post_transaction_callback: "Callable"
+        has_conflict = False
 
         def in_transaction():
-            nonlocal post_transaction_callback
-            result = self.check_conflict(remote_item_change=item_change)
+            nonlocal post_transaction_callback, has_conflict
+            with self.events_manager.measure_stage("check_conflict"):
+                result = self.check_conflict(remote_item_change=item_change)
+            has_conflict = result.has_conflict
             if result.has_conflict:
                 post_transaction_callback = self.handle_conflict(
                     conflict_type=result.conflict_type,
@@ -155,11 +172,42 @@ class ChangesExecutor:
             self.data_store.run_in_transaction(
                 item_change=item_change, callback=in_transaction
             )
-            post_transaction_callback()
+            if has_conflict:
+                self.events_manager.increment_stat(key="conflicts")
+            else:
+                self.events_manager.increment_stat(key="changes_applied")
         except Exception as e:
             self.handle_exception(
                 remote_item_change=item_change, query=query, exception=e
             )
+            return
+
+        self._publish_post_transaction_events(
+            item_change=item_change, query=query, callback=post_transaction_callback
+        )
+
+    def _publish_post_transaction_events(
+        self, item_change: "ItemChange", query: "Optional[Query]", callback: "Callable"
+    ):
+        """Publishes the events of a change after the transaction that applied it. The events are
+        collected instead if the transaction is part of a larger one that wasn't committed yet.
+
+        Args:
+            item_change (ItemChange): The change that was applied.
+            query (Optional[Query]): The query that is being synced.
+            callback (Callable): The function that publishes the events.
+        """
+
+        def publish():
+            try:
+                with self.events_manager.measure_stage("events"):
+                    callback()
+            except Exception as e:
+                self.handle_exception(
+                    remote_item_change=item_change, query=query, exception=e
+                )
+
+        self.events_manager.publish(publish)
 
     def check_conflict(self, remote_item_change: "ItemChange") -> "ConflictCheckResult":
         """Checks if the remote change causes a conflict.
@@ -272,6 +320,9 @@ class ChangesExecutor:
         )
         item_change_winner = conflict_resolution.item_change_winner
         item_change_loser = conflict_resolution.item_change_loser
+        get_tracer().get_current_span(name="process_remote_change").set_attribute(
+            "conflict_type", conflict_type.value
+        )
 
         item_change_loser.is_applied = True
         item_change_loser.should_ignore = True
@@ -303,9 +354,13 @@ class ChangesExecutor:
             query (Optional[Query]): The query that was being synced
 
         """
-        self.events_manager.on_exception(
-            remote_item_change=remote_item_change, exception=exception, query=query
-        )
+        self.events_manager.increment_stat(key="deferred")
+        span = get_tracer().get_current_span(name="process_remote_change")
+        span.set_attribute("error", repr(exception))
+        with self.events_manager.measure_stage("events"):
+            self.events_manager.on_exception(
+                remote_item_change=remote_item_change, exception=exception, query=query
+            )
 
     def apply_item_change(self, item_change: "ItemChange", old_version: "ItemVersion"):
         """Applies a change. This consists of:
@@ -329,7 +384,8 @@ class ChangesExecutor:
             self.data_store.save_item_version(item_version=new_version)
             return
 
-        self.data_store.execute_item_change(item_change=item_change)
+        with self.events_manager.measure_stage("execute_item_change"):
+            self.data_store.execute_item_change(item_change=item_change)
         item_change.is_applied = True
         self.data_store.save_item_change(item_change=item_change)
         self.data_store.save_item_version(item_version=new_version)
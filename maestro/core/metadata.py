@@ -524,6 +524,8 @@ class SyncSession:
         target_provider_id (str): The target provider's identifier.
         item_changes (List[ItemChange]): The list of changes that were exchanged in this session (either sent or received).
         query_id (Optional[str]): The ID of the query that synced in this session.
+        usage (Dict[str, int]): The number of operations of each kind (e.g. "reads", "writes") performed by the data store during this session. It's empty for data stores that don't track their usage.
+        stats (Dict[str, float]): Counters (e.g. "batches", "changes_applied", "conflicts", "deferred") and the time in seconds spent in each stage of this session (e.g. "download_changes_seconds").
 
     """
 
@@ -535,6 +537,8 @@ class SyncSession:
     target_provider_id: "str"
     item_changes: "List[ItemChange]"
     query_id: "Optional[str]"
+    usage: "Dict[str, int]"
+    stats: "Dict[str, float]"
 
     def __init__(
         self,
@@ -546,6 +550,8 @@ class SyncSession:
         target_provider_id: "str",
         item_changes: "List[ItemChange]",
         query_id: "Optional[str]" = None,
+        usage: "Optional[Dict[str, int]]" = None,
+        stats: "Optional[Dict[str, float]]" = None,
     ):
         """
         Args:
@@ -557,6 +563,8 @@ class SyncSession:
             target_provider_id (str): The target provider's identifier.
             item_changes (List[ItemChange]): The list of changes that were exchanged in this session (either sent or received).
             query_id (Optional[str]): The ID of the query that synced in this session.
+            usage (Optional[Dict[str, int]]): The number of operations of each kind performed by the data store during this session.
+            stats (Optional[Dict[str, float]]): Counters and the time in seconds spent in each stage of this session.
         """
         self.id = id
         self.started_at = started_at
@@ -566,9 +574,11 @@ class SyncSession:
         self.target_provider_id = target_provider_id
         self.item_changes = item_changes
         self.query_id = query_id
+        self.usage = usage if usage is not None else {}
+        self.stats = stats if stats is not None else {}
 
     def __repr__(self):  # pragma: no cover
-        return f"SyncSession(id='{self.id}', started_at='{self.started_at}', ended_at='{self.ended_at}', status={self.status}, source_provider_id={self.source_provider_id}, target_provider_id={self.target_provider_id}, item_changes=[...{len(self.item_changes)} changes], query_id={self.query_id})"
+        return f"SyncSession(id='{self.id}', started_at='{self.started_at}', ended_at='{self.ended_at}', status={self.status}, source_provider_id={self.source_provider_id}, target_provider_id={self.target_provider_id}, item_changes=[...{len(self.item_changes)} changes], query_id={self.query_id}, usage={self.usage}, stats={self.stats})"
 
     def __eq__(self, other: "object"):
         assert isinstance(other, SyncSession)
@@ -582,6 +592,8 @@ class SyncSession:
             "target_provider_id",
             "item_changes",
             "query_id",
+            "usage",
+            "stats",
         ]:
             if not getattr(self, param) == getattr(other, param):
                 return False
@@ -0,0 +1,288 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+from abc import ABC, abstractmethod
+from .metadata import (
+    ItemChange,
+    ItemChangeBatch,
+    ItemVersion,
+    ConflictLog,
+    SyncSession,
+)
+from .utils import add_usage
+import functools
+import inspect
+import threading
+import time
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .store import BaseDataStore
+
+# Upper bounds, in milliseconds, of the latency histogram's buckets
+LATENCY_BUCKETS_MS: "Tuple[int, ...]" = (1, 5, 10, 50, 100, 500, 1000)
+
+# Methods that are not instrumented because they report the metrics themselves
+_IGNORED_METHODS = ["get_usage", "show"]
+
+
+class BaseMetricsSink(ABC):
+    """Receives the calls made to an instrumented data store. Implementations can export them
+    to a monitoring system, so they must be cheap since they are called for every call.
+    """
+
+    @abstractmethod
+    def record_call(
+        self,
+        method_name: "str",
+        duration_seconds: "float",
+        num_rows: "int",
+        num_bytes: "int",
+        is_error: "bool",
+    ):  # pragma: no cover
+        """Records a call to a data store method.
+
+        Args:
+            method_name (str): The name of the method that was called.
+            duration_seconds (float): How long the call took, including the methods it called.
+            num_rows (int): The number of metadata objects or items returned.
+            num_bytes (int): The size, in bytes, of the serialized items that were received or returned.
+            is_error (bool): Whether the call raised an exception.
+        """
+
+
+class MethodMetrics:
+    """The metrics aggregated for a data store method.
+
+    Attributes:
+        num_calls (int): The number of calls.
+        total_ms (float): The total time spent in the calls, in milliseconds.
+        latency_buckets (List[int]): The number of calls whose latency was at most the bound with the same index in LATENCY_BUCKETS_MS. The last position counts the slower calls.
+        num_rows (int): The number of metadata objects or items returned.
+        num_bytes (int): The size, in bytes, of the serialized items that were received or returned.
+        num_errors (int): The number of calls that raised an exception.
+    """
+
+    def __init__(self):
+        self.num_calls = 0
+        self.total_ms = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.num_rows = 0
+        self.num_bytes = 0
+        self.num_errors = 0
+
+
+class DataStoreMetrics(BaseMetricsSink):
+    """Aggregates the calls made to a data store in memory. Since the aggregated values only
+    grow, they are reported through BaseDataStore.get_usage and each SyncSession stores the
+    difference between the values at its start and end.
+    """
+
+    methods: "Dict[str, MethodMetrics]"
+
+    def __init__(self):
+        self.methods = {}
+
+    def record_call(
+        self,
+        method_name: "str",
+        duration_seconds: "float",
+        num_rows: "int",
+        num_bytes: "int",
+        is_error: "bool",
+    ):
+        method_metrics = self.methods.get(method_name)
+        if method_metrics is None:
+            method_metrics = MethodMetrics()
+            self.methods[method_name] = method_metrics
+
+        duration_ms = duration_seconds * 1000
+        bucket_idx = 0
+        while (
+            bucket_idx < len(LATENCY_BUCKETS_MS)
+            and duration_ms > LATENCY_BUCKETS_MS[bucket_idx]
+        ):
+            bucket_idx += 1
+
+        method_metrics.num_calls += 1
+        method_metrics.total_ms += duration_ms
+        method_metrics.latency_buckets[bucket_idx] += 1
+        method_metrics.num_rows += num_rows
+        method_metrics.num_bytes += num_bytes
+        if is_error:
+            method_metrics.num_errors += 1
+
+    def get_usage(self) -> "Dict[str, int]":
+        """Returns the metrics in the format of BaseDataStore.get_usage. The totals are stored in
+        the keys "calls", "rows", "bytes" and "errors" and the metrics of each method are stored in keys
+        prefixed by the method's name, e.g. "select_changes.calls", "select_changes.ms" and
+        "select_changes.le_10ms".
+        """
+        usage = {"calls": 0, "rows": 0, "bytes": 0, "errors": 0}
+        for method_name, method_metrics in self.methods.items():
+            usage["calls"] += method_metrics.num_calls
+            usage["rows"] += method_metrics.num_rows
+            usage["bytes"] += method_metrics.num_bytes
+            usage["errors"] += method_metrics.num_errors
+            usage[method_name + ".calls"] = method_metrics.num_calls
+            usage[method_name + ".ms"] = round(method_metrics.total_ms)
+            usage[method_name + ".rows"] = method_metrics.num_rows
+            usage[method_name + ".bytes"] = method_metrics.num_bytes
+            usage[method_name + ".errors"] = method_metrics.num_errors
+            for bound, num_calls in zip(
+                LATENCY_BUCKETS_MS, method_metrics.latency_buckets
+            ):
+                usage[method_name + ".le_%dms" % (bound)] = num_calls
+            usage[method_name + ".gt_%dms" % (LATENCY_BUCKETS_MS[-1])] = (
+                method_metrics.latency_buckets[-1]
+            )
+        return usage
+
+
+def _get_payload_size(value: "Any") -> "int":
+    if isinstance(value, ItemChange):
+        return len(value.serialization_result.serialized_item.encode())
+    if isinstance(value, ItemVersion):
+        if value.current_item_change is None:
+            return 0
+        return _get_payload_size(value.current_item_change)
+    if isinstance(value, ConflictLog):
+        return _get_payload_size(value.item_change_loser)
+    if isinstance(value, ItemChangeBatch):
+        return _get_payload_size(value.item_changes)
+    if isinstance(value, SyncSession):
+        return 0
+    if isinstance(value, (list, tuple)):
+        return sum(_get_payload_size(val) for val in value)
+    return 0
+
+
+def _get_num_rows(result: "Any") -> "int":
+    if result is None or isinstance(result, (bool, str)):
+        return 0
+    if isinstance(result, ItemChangeBatch):
+        return len(result.item_changes)
+    if isinstance(result, (list, tuple, set)):
+        return len(result)
+    return 1
+
+
+def _measure_callback(callback: "Callable", call_state: "threading.local") -> "Callable":
+    """Returns a callback that measures the calls made inside it, e.g. the callback passed to
+    run_in_transaction. They are made by the caller, not by the data store itself."""
+
+    @functools.wraps(callback)
+    def measured_callback(*args, **kwargs):
+        depth = call_state.depth
+        call_state.depth = 0
+        try:
+            return callback(*args, **kwargs)
+        finally:
+            call_state.depth = depth
+
+    return measured_callback
+
+
+def _instrument_method(
+    method: "Callable",
+    method_name: "str",
+    sinks: "List[BaseMetricsSink]",
+    call_state: "threading.local",
+) -> "Callable":
+    @functools.wraps(method)
+    def instrumented(*args, **kwargs):
+        # The calls made by the method to other methods of the data store are part of this
+        # call, so measuring them would count their payloads again
+        if getattr(call_state, "depth", 0) > 0:
+            return method(*args, **kwargs)
+
+        if callable(kwargs.get("callback")):
+            kwargs["callback"] = _measure_callback(
+                callback=kwargs["callback"], call_state=call_state
+            )
+
+        result = None
+        is_error = False
+        call_state.depth = 1
+        start_time = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+            return result
+        except BaseException:
+            is_error = True
+            raise
+        finally:
+            duration_seconds = time.perf_counter() - start_time
+            call_state.depth = 0
+
+            num_bytes = _get_payload_size(result)
+            for value in kwargs.values():
+                num_bytes += _get_payload_size(value)
+            for value in args:
+                num_bytes += _get_payload_size(value)
+
+            num_rows = 0 if is_error else _get_num_rows(result)
+            for sink in sinks:
+                sink.record_call(
+                    method_name=method_name,
+                    duration_seconds=duration_seconds,
+                    num_rows=num_rows,
+                    num_bytes=num_bytes,
+                    is_error=is_error,
+                )
+
+    return instrumented
+
+
+def wrap_data_store_methods(
+    data_store: "BaseDataStore", wrapper: "Callable[[Callable, str], Callable]"
+):
+    """Replaces every public method of the data store with the result of
+    wrapper(method, method_name). Since the replacements are set on the instance, the calls
+    the data store makes to its own methods also go through them.
+    """
+    for method_name, _ in inspect.getmembers(
+        type(data_store), predicate=inspect.isfunction
+    ):
+        if method_name.startswith("_") or method_name in _IGNORED_METHODS:
+            continue
+
+        method = getattr(data_store, method_name)
+        setattr(data_store, method_name, wrapper(method, method_name))
+
+
+def instrument_data_store(
+    data_store: "BaseDataStore", sinks: "Optional[List[BaseMetricsSink]]" = None
+) -> "DataStoreMetrics":
+    """Measures the calls to every public method of the data store. The calls the data store
+    makes to its own methods are included in the calls that made them and aren't recorded
+    separately, while the calls made by callbacks passed to the data store, such as the one
+    given to run_in_transaction, are recorded. The metrics are aggregated by a
+    DataStoreMetrics, which is added to the data store's usage so that they are stored with
+    each SyncSession, and are also sent to the given sinks.
+
+    Calls that raise an exception are recorded with is_error set.
+
+    Args:
+        data_store (BaseDataStore): The data store that will be instrumented.
+        sinks (Optional[List[BaseMetricsSink]]): Additional sinks that receive each call.
+
+    Returns:
+        DataStoreMetrics: The metrics aggregated for the data store.
+    """
+    metrics = DataStoreMetrics()
+    all_sinks: "List[BaseMetricsSink]" = [metrics] + list(sinks or [])
+    call_state = threading.local()
+
+    wrap_data_store_methods(
+        data_store=data_store,
+        wrapper=lambda method, method_name: _instrument_method(
+            method=method,
+            method_name=method_name,
+            sinks=all_sinks,
+            call_state=call_state,
+        ),
+    )
+
+    get_usage = data_store.get_usage
+    setattr(
+        data_store, "get_usage", lambda: add_usage(get_usage(), metrics.get_usage())
+    )
+    return metrics
@@ -1,35 +1,52 @@
 from typing import TYPE_CHECKING, List, Dict, Optional
-from .utils import SyncTimer, BaseSyncLock
+from .utils import (
+    SyncTimer,
+    SyncBudget,
+    BaseSyncLock,
+    SyncLease,
+    get_sync_lock_key,
+    add_usage,
+    subtract_usage,
+)
 from .metadata import VectorClock
+from .tracing import get_tracer
+import logging
 
 if TYPE_CHECKING:  # pragma: no cover
+    from maestro.core.metadata import ItemChangeBatch
     from maestro.core.provider import BaseSyncProvider
     from maestro.core.query.metadata import Query
 
+logger = logging.getLogger(__name__)
+
 
 class SyncOrchestrator:
     """Synchronizes data between two providers.
 
     Attributes:
-        sync_lock (BaseSyncLock): Lock used to make sure multiple synchronizations don't happen in parallel.
+        sync_lock (BaseSyncLock): Lock used to make sure multiple synchronizations of the same providers and query don't happen in parallel.
         maximum_duration_seconds (int): The maximum duration in seconds that the sync session can last. If the session doesn't end by that time, an exception of type SyncTimeoutException is raised.
+        budget (Optional[SyncBudget]): Limits the operations performed by the providers' data stores. Sessions end before the next batch once it's exhausted.
     """
 
     sync_lock: "BaseSyncLock"
     _providers_by_id: "Dict[str, BaseSyncProvider]"
     maximum_duration_seconds: "int"
+    budget: "Optional[SyncBudget]"
 
     def __init__(
         self,
         sync_lock: "BaseSyncLock",
         providers: "List[BaseSyncProvider]",
         maximum_duration_seconds: "int",
+        budget: "Optional[SyncBudget]" = None,
     ):
         """
         Args:
-            sync_lock (BaseSyncLock): Lock used to make sure multiple synchronizations don't happen in parallel.
+            sync_lock (BaseSyncLock): Lock used to make sure multiple synchronizations of the same providers and query don't happen in parallel.
             providers (List[BaseSyncProvider]): Lista of providers that will be synchronized.
             maximum_duration_seconds (int): The maximum duration in seconds that the sync session can last. If the session doesn't end by that time, an exception of type SyncTimeoutException is raised.
+            budget (Optional[SyncBudget]): Limits the operations performed by the providers' data stores. Sessions end before the next batch once it's exhausted.
         """
         assert len(providers) == 2, "Synchronization is limited to 2 providers"
 
@@ -38,18 +55,68 @@ class SyncOrchestrator:
             provider.provider_id: provider for provider in providers
         }
         self.maximum_duration_seconds = maximum_duration_seconds
+        self.budget = budget
+
+    def _get_usage(self) -> "Dict[str, int]":
+        return add_usage(
+            *[
+                provider.data_store.get_usage()
+                for provider in self._providers_by_id.values()
+            ]
+        )
+
+    def _is_budget_exhausted(self, initial_usage: "Dict[str, int]") -> "bool":
+        if self.budget is None:
+            return False
+
+        session_usage = subtract_usage(
+            usage=self._get_usage(), initial_usage=initial_usage
+        )
+        if self.budget.is_exhausted(session_usage=session_usage):
+            logger.warning(
+                "The synchronization budget was exhausted, the remaining changes will be synchronized by the next session. Session usage: %s",
+                session_usage,
+            )
+            return True
+        return False
+
+    def _upload_changes(
+        self,
+        target_provider: "BaseSyncProvider",
+        item_change_batch: "ItemChangeBatch",
+        query: "Optional[Query]",
+    ):
+        events_manager = target_provider.events_manager
+        if item_change_batch.item_changes:
+            events_manager.increment_stat(key="batches")
+
+        with get_tracer().span(
+            "batch",
+            target_provider_id=target_provider.provider_id,
+            batch_size=len(item_change_batch.item_changes),
+            is_last_batch=item_change_batch.is_last_batch,
+        ), events_manager.measure_stage("upload_changes"):
+            target_provider.upload_changes(
+                item_change_batch=item_change_batch, query=query
+            )
 
     def synchronize_providers(
         self,
         source_provider_id: "str",
         target_provider_id: "str",
         query: "Optional[Query]" = None,
-    ):
+        sync_lease: "Optional[SyncLease]" = None,
+    ) -> "bool":
         """Retrieves data from the source provider and sends them to the target provider.
 
         Args:
             source_provider_id (str): Source provider's identifier.
             target_provider_id (str): Target provider's identifier.
+            query (Optional[Query], optional): The query being synchronized.
+            sync_lease (Optional[SyncLease], optional): The lock held by the session, which is renewed after each batch.
+
+        Returns:
+            bool: False if the session ended before all the changes were synchronized because the budget was exhausted or an exception was raised.
         """
 
         # Finding providers
@@ -61,6 +128,38 @@ class SyncOrchestrator:
         if not target_provider:
             raise ValueError("Unknown provider: %s" % (target_provider_id))
 
+        initial_usage = self._get_usage()
+        if self._is_budget_exhausted(initial_usage=initial_usage):
+            return False
+
+        query_id = query.get_id() if query is not None else None
+        with get_tracer().span(
+            "sync_session",
+            source_provider_id=source_provider_id,
+            target_provider_id=target_provider_id,
+            query_id=query_id,
+        ) as span:
+            is_complete = self._run_sync_session(
+                source_provider=source_provider,
+                target_provider=target_provider,
+                query=query,
+                sync_lease=sync_lease,
+                initial_usage=initial_usage,
+            )
+            span.set_attribute("is_complete", is_complete)
+        return is_complete
+
+    def _run_sync_session(
+        self,
+        source_provider: "BaseSyncProvider",
+        target_provider: "BaseSyncProvider",
+        query: "Optional[Query]",
+        sync_lease: "Optional[SyncLease]",
+        initial_usage: "Dict[str, int]",
+    ) -> "bool":
+        source_provider_id = source_provider.provider_id
+        target_provider_id = target_provider.provider_id
+
         # Start event
         target_provider.events_manager.on_start_sync_session(
             source_provider_id=source_provider_id,
@@ -76,6 +175,7 @@ class SyncOrchestrator:
 
         # Synchronization
 
+        is_complete = True
         try:
             # Deferred changes
             deferred_vector_clock = VectorClock.create_empty(
@@ -84,12 +184,21 @@ class SyncOrchestrator:
 
             while True:
                 sync_timer.tick()
+                if sync_lease is not None:
+                    sync_lease.heartbeat()
 
-                item_change_batch = target_provider.get_deferred_changes(
-                    vector_clock=deferred_vector_clock, query=query
-                )
-                target_provider.upload_changes(
-                    item_change_batch=item_change_batch, query=query
+                if self._is_budget_exhausted(initial_usage=initial_usage):
+                    is_complete = False
+                    break
+
+                with target_provider.events_manager.measure_stage("deferred_changes"):
+                    item_change_batch = target_provider.get_deferred_changes(
+                        vector_clock=deferred_vector_clock, query=query
+                    )
+                self._upload_changes(
+                    target_provider=target_provider,
+                    item_change_batch=item_change_batch,
+                    query=query,
                 )
 
                 new_deferred_vector_clock = item_change_batch.get_vector_clock_after_done(
@@ -106,19 +215,28 @@ class SyncOrchestrator:
 
             # New changes
             target_vector_clock = target_provider.get_vector_clock(query=query)
-            while True:
+            while is_complete:
                 sync_timer.tick()
+                if sync_lease is not None:
+                    sync_lease.heartbeat()
 
-                item_change_batch = source_provider.download_changes(
-                    vector_clock=target_vector_clock, query=query
-                )
+                if self._is_budget_exhausted(initial_usage=initial_usage):
+                    is_complete = False
+                    break
+
+                with source_provider.events_manager.measure_stage("download_changes"):
+                    item_change_batch = source_provider.download_changes(
+                        vector_clock=target_vector_clock, query=query
+                    )
 
                 source_provider.events_manager.on_item_changes_sent(
                     item_changes=item_change_batch.item_changes
                 )
 
-                target_provider.upload_changes(
-                    item_change_batch=item_change_batch, query=query
+                self._upload_changes(
+                    target_provider=target_provider,
+                    item_change_batch=item_change_batch,
+                    query=query,
                 )
 
                 new_target_vector_clock = item_change_batch.get_vector_clock_after_done(
@@ -137,34 +255,67 @@ class SyncOrchestrator:
             target_provider.events_manager.on_end_sync_session()
             source_provider.events_manager.on_end_sync_session()
         except Exception as e:
+            is_complete = False
             target_provider.events_manager.on_failed_sync_session(exception=e)
             source_provider.events_manager.on_failed_sync_session(exception=e)
 
-    def run(self, initial_source_provider_id: "str"):
+        if self.budget is not None:
+            self.budget.register_session(
+                session_usage=subtract_usage(
+                    usage=self._get_usage(), initial_usage=initial_usage
+                )
+            )
+        return is_complete
+
+    def run(
+        self, initial_source_provider_id: "str", query: "Optional[Query]" = None
+    ) -> "bool":
         """Runs two synchronization sessions:
             1) initial_source_provider_id => other_provider
             2) other_provider => initial_source_provider_id
 
+        The sessions hold the lock of the providers and query being synchronized, so
+        synchronizations of other queries can run at the same time.
+
         Args:
             initial_source_provider_id (str): The identifier of the provider that will first send data.
+            query (Optional[Query], optional): The query being synchronized.
+
+        Returns:
+            bool: True if all the changes were synchronized in both directions. False if the synchronization didn't run because another one with the same key was running, if the lock was lost or if a session ended early.
         """
-        if self.sync_lock.is_running():
-            return
+        sync_lease = self.sync_lock.lock(
+            key=get_sync_lock_key(
+                provider_ids=list(self._providers_by_id.keys()), query=query
+            )
+        )
+        if not sync_lease.acquire():
+            return False
 
-        with self.sync_lock.lock():
+        try:
             other_provider_id = [
                 val
                 for val in self._providers_by_id.keys()
                 if val != initial_source_provider_id
             ][0]
 
-            self.synchronize_providers(
+            is_complete = self.synchronize_providers(
                 source_provider_id=initial_source_provider_id,
                 target_provider_id=other_provider_id,
-                query=None,
-            )
-            self.synchronize_providers(
-                source_provider_id=other_provider_id,
-                target_provider_id=initial_source_provider_id,
-                query=None,
+                query=query,
+                sync_lease=sync_lease,
             )
+            if not sync_lease.is_lost:
+                is_complete = (
+                    self.synchronize_providers(
+                        source_provider_id=other_provider_id,
+                        target_provider_id=initial_source_provider_id,
+                        query=query,
+                        sync_lease=sync_lease,
+                    )
+                    and is_complete
+                )
+        finally:
+            sync_lease.release()
+
+        return is_complete and not sync_lease.is_lost
@@ -352,6 +352,14 @@ class BaseDataStore(ABC):
             sync_session (SyncSession): Sync session being saved.
         """
 
+    def get_usage(self) -> "Dict[str, int]":
+        """Returns the number of operations of each kind (e.g. "reads", "writes") performed by
+        the data store since it was created. Data stores that are billed per operation should
+        override this so that sync sessions can record their usage and be limited by a
+        SyncBudget. The default implementation doesn't track any operation.
+        """
+        return {}
+
     # The methods below are only used in tests
     def get_items(self) -> "List[Any]":  # pragma: no cover
         """Returns a list with all the items in the data store.
@@ -0,0 +1,241 @@
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, TYPE_CHECKING
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from .metrics import wrap_data_store_methods
+import functools
+import json
+import threading
+import time
+import uuid
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .store import BaseDataStore
+
+
+class Span:
+    """A timed operation of the sync pipeline, such as a session, a batch, the application of a
+    change or a data store call. Spans started while another one is running are its children.
+
+    Attributes:
+        name (str): The operation's name, e.g. "sync_session".
+        span_id (str): This span's unique identifier.
+        trace_id (str): The identifier of the root span, shared by all its descendants.
+        parent_id (Optional[str]): The identifier of the span that was running when this one started.
+        attributes (Dict[str, Any]): Details of the operation, e.g. provider ids and item ids.
+        start_time (float): When the span started (seconds since epoch).
+        duration_seconds (Optional[float]): How long the span lasted. None while it's running.
+        error (Optional[str]): The exception raised by the operation, if any.
+    """
+
+    def __init__(
+        self,
+        name: "str",
+        trace_id: "Optional[str]",
+        parent_id: "Optional[str]",
+        attributes: "Dict[str, Any]",
+    ):
+        self.name = name
+        self.span_id = uuid.uuid4().hex
+        self.trace_id = trace_id if trace_id is not None else self.span_id
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration_seconds: "Optional[float]" = None
+        self.error: "Optional[str]" = None
+        self._start_counter = time.perf_counter()
+
+    def set_attribute(self, key: "str", value: "Any"):
+        self.attributes[key] = value
+
+    def end(self, error: "Optional[BaseException]" = None):
+        self.duration_seconds = time.perf_counter() - self._start_counter
+        if error is not None:
+            self.error = repr(error)
+
+    def to_dict(self) -> "Dict[str, Any]":
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "trace_id": self.trace_id,
+            "parent_id": self.parent_id,
+            "attributes": self.attributes,
+            "start_time": self.start_time,
+            "duration_seconds": self.duration_seconds,
+            "error": self.error,
+        }
+
+    def __repr__(self):  # pragma: no cover
+        return f"Span(name='{self.name}', duration_seconds={self.duration_seconds}, attributes={self.attributes})"
+
+
+class NoOpSpan(Span):
+    """The span returned when tracing is disabled. It doesn't record anything."""
+
+    def __init__(self):
+        super().__init__(name="", trace_id=None, parent_id=None, attributes={})
+
+    def set_attribute(self, key: "str", value: "Any"):
+        pass
+
+
+class BaseSpanExporter(ABC):
+    """Receives the spans that ended."""
+
+    @abstractmethod
+    def export(self, span: "Span"):  # pragma: no cover
+        """Exports a span that ended.
+
+        Args:
+            span (Span): The span.
+        """
+
+
+class InMemorySpanExporter(BaseSpanExporter):
+    """Keeps the spans in a list, which is useful in tests."""
+
+    spans: "List[Span]"
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span: "Span"):
+        with self._lock:
+            self.spans.append(span)
+
+    def get_spans(self, name: "Optional[str]" = None) -> "List[Span]":
+        """Returns the spans that ended, optionally only the ones with the given name."""
+
+        return [span for span in self.spans if name is None or span.name == name]
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+
+
+class JSONLinesSpanExporter(BaseSpanExporter):
+    """Appends each span to a file as a line of JSON, which can be loaded later to look for
+    slow operations.
+
+    Attributes:
+        path (str): The file's path.
+    """
+
+    def __init__(self, path: "str"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: "Span"):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+_NO_OP_SPAN = NoOpSpan()
+_NO_OP_SPAN_CONTEXT = nullcontext(_NO_OP_SPAN)
+
+
+class Tracer:
+    """Creates spans and sends them to an exporter when they end. Without an exporter, the
+    tracer is a no-op whose spans cost almost nothing.
+
+    Attributes:
+        exporter (Optional[BaseSpanExporter]): The exporter that receives the spans.
+    """
+
+    def __init__(self, exporter: "Optional[BaseSpanExporter]" = None):
+        self.exporter = exporter
+        self._local = threading.local()
+
+    def _get_stack(self) -> "List[Span]":
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+        return stack
+
+    def get_current_span(self, name: "Optional[str]" = None) -> "Span":
+        """Returns the innermost span running in the current thread, optionally the innermost
+        one with the given name, or a NoOpSpan if there isn't one, so that attributes can be
+        added to it."""
+
+        for span in reversed(self._get_stack()):
+            if name is None or span.name == name:
+                return span
+        return _NO_OP_SPAN
+
+    def span(self, name: "str", **attributes: "Any") -> "ContextManager[Span]":
+        """Runs the block inside a span. Spans started in the block, in the same thread, are
+        its children.
+
+        Args:
+            name (str): The operation's name.
+            **attributes (Any): The span's initial attributes.
+        """
+        if self.exporter is None:
+            return _NO_OP_SPAN_CONTEXT
+        return self._span(name=name, attributes=attributes)
+
+    @contextmanager
+    def _span(self, name: "str", attributes: "Dict[str, Any]") -> "Iterator[Span]":
+        stack = self._get_stack()
+        parent = stack[-1] if stack else None
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent is not None else None,
+            parent_id=parent.span_id if parent is not None else None,
+            attributes=attributes,
+        )
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(error=e)
+            raise
+        else:
+            span.end()
+        finally:
+            stack.pop()
+            if self.exporter is not None:
+                self.exporter.export(span)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> "Tracer":
+    """Returns the tracer used by the sync pipeline."""
+
+    return _tracer
+
+
+def set_tracer(tracer: "Tracer"):
+    """Replaces the tracer used by the sync pipeline, e.g. with Tracer(exporter=JSONLinesSpanExporter(path))."""
+
+    global _tracer
+    _tracer = tracer
+
+
+def trace_data_store(data_store: "BaseDataStore"):
+    """Creates a span named "data_store.<method name>" for each call to a public method of the
+    data store, without changing its implementation. The spans use the tracer that is set
+    when each call is made.
+
+    Args:
+        data_store (BaseDataStore): The data store that will be traced.
+    """
+
+    def wrapper(method, method_name):
+        span_name = "data_store." + method_name
+
+        @functools.wraps(method)
+        def traced(*args, **kwargs):
+            with get_tracer().span(
+                span_name, provider_id=data_store.local_provider_id
+            ):
+                return method(*args, **kwargs)
+
+        return traced
+
+    wrap_data_store_methods(data_store=data_store, wrapper=wrapper)
@@ -1,25 +1,156 @@
-from typing import ContextManager, Any, TypeVar, Optional
+from typing import Any, Deque, Dict, TypeVar, Optional, List, Tuple, TYPE_CHECKING
 import dateutil.parser
 from abc import ABC, abstractmethod
-from maestro.core.exceptions import SyncTimeoutException
+from maestro.core.exceptions import (
+    SyncTimeoutException,
+    SyncLockedException,
+    SyncLockLostException,
+)
+from collections import deque
 import time
 import datetime as dt
 import re
 
+if TYPE_CHECKING:  # pragma: no cover
+    from maestro.core.query.metadata import Query
+
+
+DEFAULT_SYNC_LOCK_KEY = "sync"
+
+
+def get_sync_lock_key(provider_ids: "List[str]", query: "Optional[Query]" = None) -> "str":
+    """Returns the key of the lock that protects the synchronization of the given providers.
+    Sessions between other providers or for other queries use different keys, so they can run
+    in parallel.
+
+    Args:
+        provider_ids (List[str]): The identifiers of the providers being synchronized.
+        query (Optional[Query], optional): The query being synchronized, if any.
+    """
+    query_id = query.get_id() if query is not None else "all"
+    return ":".join(sorted(provider_ids) + [query_id])
+
 
 class BaseSyncLock(ABC):
-    """Prevents two synchronization sessions from running at the same time."""
+    """Prevents two synchronization sessions with the same key from running at the same time.
+    Locks are leases: they expire after lease_seconds unless they're renewed by their holder,
+    so that a crashed session doesn't block the key forever.
+
+    Attributes:
+        lease_seconds (float): Number of seconds after which a lock that wasn't renewed expires.
+    """
+
+    lease_seconds: "float"
+
+    def __init__(self, lease_seconds: "float" = 60):
+        self.lease_seconds = lease_seconds
 
     @abstractmethod
-    def is_running(self) -> "bool":  # pragma: no cover
+    def acquire(self, key: "str") -> "Optional[str]":  # pragma: no cover
+        """Atomically acquires the lock for the given key.
+
+        Args:
+            key (str): The key being locked.
+
+        Returns:
+            Optional[str]: A token that identifies the holder of the lock or None if the lock is held by someone else.
         """
-        Indicates whether a synchronization is running.
+
+    @abstractmethod
+    def renew(self, key: "str", token: "str") -> "bool":  # pragma: no cover
+        """Extends the lease of a lock that is still held.
+
+        Args:
+            key (str): The key that was locked.
+            token (str): The token returned by acquire.
+
+        Returns:
+            bool: False if the lease was lost.
+        """
+
+    @abstractmethod
+    def release(self, key: "str", token: "str"):  # pragma: no cover
+        """Releases the lock if it's still held by the given token.
+
+        Args:
+            key (str): The key that was locked.
+            token (str): The token returned by acquire.
         """
 
     @abstractmethod
-    def lock(self) -> "ContextManager":
-        """Returns a ContextManager that locks the execution.
+    def is_running(self, key: "str" = DEFAULT_SYNC_LOCK_KEY) -> "bool":  # pragma: no cover
+        """
+        Indicates whether a synchronization is running for the given key.
+        """
+
+    def lock(self, key: "str" = DEFAULT_SYNC_LOCK_KEY) -> "SyncLease":
+        """Returns a SyncLease for the given key, which acquires the lock when used as a ContextManager.
+
+        Args:
+            key (str, optional): The key being locked.
+        """
+        return SyncLease(sync_lock=self, key=key)
+
+
+class SyncLease:
+    """The lock held by a synchronization session.
+
+    Attributes:
+        sync_lock (BaseSyncLock): The lock that was acquired.
+        key (str): The key that was locked.
+        token (Optional[str]): The token that identifies the holder or None if the lock wasn't acquired.
+        is_lost (bool): Whether the lease expired or was taken by another session.
+    """
+
+    sync_lock: "BaseSyncLock"
+    key: "str"
+    token: "Optional[str]"
+    is_lost: "bool"
+
+    def __init__(self, sync_lock: "BaseSyncLock", key: "str"):
+        self.sync_lock = sync_lock
+        self.key = key
+        self.token = None
+        self.is_lost = False
+        self._last_renewed_at = 0.0
+
+    def acquire(self) -> "bool":
+        """Tries to acquire the lock. Returns whether it was acquired."""
+        self.token = self.sync_lock.acquire(key=self.key)
+        self._last_renewed_at = time.monotonic()
+        return self.token is not None
+
+    def heartbeat(self):
+        """Renews the lease if a third of it has elapsed since it was last renewed.
+
+        Raises:
+            SyncLockLostException: If the lease was lost.
         """
+        if self.token is None or self.is_lost:
+            raise SyncLockLostException(key=self.key)
+
+        now = time.monotonic()
+        if now - self._last_renewed_at < self.sync_lock.lease_seconds / 3:
+            return
+
+        if not self.sync_lock.renew(key=self.key, token=self.token):
+            self.is_lost = True
+            raise SyncLockLostException(key=self.key)
+
+        self._last_renewed_at = now
+
+    def release(self):
+        if self.token is not None:
+            self.sync_lock.release(key=self.key, token=self.token)
+            self.token = None
+
+    def __enter__(self) -> "SyncLease":
+        if not self.acquire():
+            raise SyncLockedException(key=self.key)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.release()
 
 
 class BaseMetadataConverter(ABC):
@@ -47,6 +178,19 @@ class BaseMetadataConverter(ABC):
             (Any): Data store native object.
         """
 
+    def to_metadata_list(self, records: "List[Any]") -> "List[Any]":
+        """Converts multiple records from the data store to metadata objects. Converters may override this method
+        to load the data required by all records at once.
+
+        Args:
+            records (List[Any]): Data store native objects.
+
+        Returns:
+            (List[Any]): Metadata objects in the same order as the records.
+        """
+        return [self.to_metadata(record=record) for record in records]
+
+
 class SyncTimer:
 
     """Times the sync session to make sure it finishes before the timeout.
@@ -77,6 +221,76 @@ class SyncTimer:
             )
 
 
+def add_usage(*usages: "Dict[str, int]") -> "Dict[str, int]":
+    """Returns the sum of the given usages, as returned by BaseDataStore.get_usage."""
+
+    total: "Dict[str, int]" = {}
+    for usage in usages:
+        for key, value in usage.items():
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def subtract_usage(
+    usage: "Dict[str, int]", initial_usage: "Dict[str, int]"
+) -> "Dict[str, int]":
+    """Returns the operations performed since initial_usage was measured."""
+
+    return {key: value - initial_usage.get(key, 0) for key, value in usage.items()}
+
+
+class SyncBudget:
+
+    """Limits the operations performed by the data stores during synchronizations, for data
+    stores that are billed per operation. The orchestrator checks the budget before each batch
+    and ends the session once it's exhausted. Since the batches that were processed were
+    applied completely, the next session resumes from where this one stopped.
+
+    Attributes:
+        limits (Dict[str, int]): Maximum number of operations of each kind, using the keys returned by BaseDataStore.get_usage (e.g. {"reads": 50000, "writes": 20000}).
+        period_seconds (Optional[float]): If given, the limits apply to all the sessions that ended in this period (e.g. 3600 for hourly limits). Otherwise, they apply to each session.
+    """
+
+    limits: "Dict[str, int]"
+    period_seconds: "Optional[float]"
+
+    def __init__(
+        self, limits: "Dict[str, int]", period_seconds: "Optional[float]" = None
+    ):
+        self.limits = limits
+        self.period_seconds = period_seconds
+        self._sessions_usage: "Deque[Tuple[float, Dict[str, int]]]" = deque()
+
+    def get_period_usage(self) -> "Dict[str, int]":
+        """Returns the usage of the sessions that ended in the current period."""
+
+        if self.period_seconds is None:
+            return {}
+
+        current_time = time.time()
+        while (
+            self._sessions_usage
+            and current_time - self._sessions_usage[0][0] > self.period_seconds
+        ):
+            self._sessions_usage.popleft()
+        return add_usage(*[usage for _, usage in self._sessions_usage])
+
+    def is_exhausted(self, session_usage: "Dict[str, int]") -> "bool":
+        """Checks if any of the limits was reached.
+
+        Args:
+            session_usage (Dict[str, int]): The usage of the session that is running.
+        """
+        usage = add_usage(self.get_period_usage(), session_usage)
+        return any(usage.get(key, 0) >= limit for key, limit in self.limits.items())
+
+    def register_session(self, session_usage: "Dict[str, int]"):
+        """Registers the usage of a session that ended, so that it counts towards the period's limits."""
+
+        if self.period_seconds is not None:
+            self._sessions_usage.append((time.time(), session_usage))
+
+
 def get_now_utc() -> "dt.datetime":
     """Current time in UTC.
 
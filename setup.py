@@ -25,7 +25,7 @@ setup(
 	long_description_content_type='text/markdown',
 	author='Luccas Correa',
 	author_email='luccascorrea@estudio89.com.br',
-	packages=find_packages(exclude=['tests*', 'example/']),
+	packages=find_packages(exclude=['tests*', 'benchmarks*', 'example/']),
 	include_package_data=True,
 	install_requires=["python-dateutil>=2.8.1"],
     extras_require={
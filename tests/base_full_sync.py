@@ -1,6 +1,13 @@
 import unittest
 import unittest.mock
-from maestro.core.utils import make_hashable
+from maestro.core.utils import make_hashable, SyncBudget
+from maestro.core.tracing import (
+    get_tracer,
+    set_tracer,
+    trace_data_store,
+    InMemorySpanExporter,
+    Tracer,
+)
 from maestro.core.orchestrator import SyncOrchestrator
 from maestro.core.store import BaseDataStore
 from maestro.core.provider import BaseSyncProvider
@@ -20,6 +27,7 @@ from .base import BackendTestMixin, TestDataStoreMixin
 from typing import cast, Union, Optional
 import uuid
 import copy
+import time
 
 
 class DebugEventsManager(EventsManager):
@@ -624,11 +632,16 @@ class FullSyncTest(BackendTestMixin, unittest.TestCase):
         # Sinchronization: other_provider (1) -> provider_in_test (2)
         # Expected results: the change from provider_in_test wins because it's the most recent
         num_changes = len(self.data_store2.get_item_changes())
+        num_sessions = len(self.data_store2.get_sync_sessions())
         self.orchestrator.synchronize_providers(
             source_provider_id="other_provider", target_provider_id="provider_in_test"
         )
 
         # Checking data
+        stats = self.data_store2.get_sync_sessions()[num_sessions].stats
+        self.assertEqual(stats["conflicts"], 1)
+        self.assertNotIn("changes_applied", stats)
+
         conflict_logs = self.data_store2.get_conflict_logs()
         self.assertEqual(len(conflict_logs), 1)
         self.assertEqual(conflict_logs[0].status, ConflictStatus.RESOLVED)
@@ -1828,7 +1841,10 @@ class FullSyncTest(BackendTestMixin, unittest.TestCase):
             250,  # provider_in_test_page2_tick
         ]  # [clock_start, deferred_tick, other_provider_page1_tick, other_provider_page2_tick, clock_start, deferred_tick, provider_in_test_page1_tick, provider_in_test_page2_tick]
 
-        with unittest.mock.patch("time.time", side_effect=timers):
+        with unittest.mock.patch(
+            "maestro.core.utils.time",
+            **{"time.side_effect": timers, "monotonic.return_value": 0},
+        ):
             self.orchestrator.run(initial_source_provider_id="other_provider")
 
         # Expected results:
@@ -1870,6 +1886,222 @@ class FullSyncTest(BackendTestMixin, unittest.TestCase):
         with self.assertRaises(ItemNotFoundException):
             self.data_store2.get_item_by_id(id=self.item2_id)
 
+    def test_sync_session_stats(self):
+        """Tests the counters and stage timings recorded in the sync sessions."""
+
+        num_sessions1 = len(self.data_store1.get_sync_sessions())
+        num_sessions2 = len(self.data_store2.get_sync_sessions())
+        self.orchestrator.run(initial_source_provider_id="other_provider")
+
+        # Target provider
+        stats = self.data_store2.get_sync_sessions()[num_sessions2].stats
+        self.assertEqual(stats["batches"], 3)
+        self.assertEqual(stats["changes_applied"], 12)
+        self.assertNotIn("conflicts", stats)
+        self.assertNotIn("deferred", stats)
+        for stage in [
+            "deferred_changes",
+            "upload_changes",
+            "check_conflict",
+            "execute_item_change",
+            "events",
+        ]:
+            self.assertGreaterEqual(stats[stage + "_seconds"], 0)
+        self.assertLessEqual(
+            stats["execute_item_change_seconds"], stats["upload_changes_seconds"]
+        )
+
+        # Source provider
+        stats = self.data_store1.get_sync_sessions()[num_sessions1].stats
+        self.assertEqual(list(stats.keys()), ["download_changes_seconds"])
+
+    def test_tracing(self):
+        """Tests the spans created for sessions, batches, changes and data store calls."""
+
+        exporter = InMemorySpanExporter()
+        previous_tracer = get_tracer()
+        set_tracer(Tracer(exporter=exporter))
+        try:
+            trace_data_store(data_store=self.data_store2)
+            self.orchestrator.synchronize_providers(
+                source_provider_id="other_provider",
+                target_provider_id="provider_in_test",
+            )
+        finally:
+            set_tracer(previous_tracer)
+
+        [session_span] = exporter.get_spans(name="sync_session")
+        self.assertIsNone(session_span.parent_id)
+        self.assertEqual(
+            session_span.attributes,
+            {
+                "source_provider_id": "other_provider",
+                "target_provider_id": "provider_in_test",
+                "query_id": None,
+                "is_complete": True,
+            },
+        )
+
+        batch_spans = exporter.get_spans(name="batch")
+        self.assertEqual(
+            sum(span.attributes["batch_size"] for span in batch_spans), 12
+        )
+        for span in batch_spans:
+            self.assertEqual(span.parent_id, session_span.span_id)
+
+        # The changes of a batch may be processed inside a data store call, such as
+        # run_batch_in_transaction
+        spans_by_id = {span.span_id: span for span in exporter.get_spans()}
+        change_spans = exporter.get_spans(name="process_remote_change")
+        self.assertEqual(len(change_spans), 12)
+        for span in change_spans:
+            parent = spans_by_id[span.parent_id]
+            while parent.name.startswith("data_store."):
+                parent = spans_by_id[parent.parent_id]
+            self.assertIn(parent, batch_spans)
+            self.assertEqual(span.attributes["provider_id"], "other_provider")
+
+        # Data store calls made while applying a change may be nested in other calls, such as
+        # run_in_transaction
+        execute_spans = exporter.get_spans(name="data_store.execute_item_change")
+        self.assertEqual(len(execute_spans), 12)
+        for span in execute_spans:
+            parent = spans_by_id[span.parent_id]
+            while parent.name.startswith("data_store."):
+                parent = spans_by_id[parent.parent_id]
+            self.assertIn(parent, change_spans)
+            self.assertEqual(span.trace_id, session_span.span_id)
+            self.assertLessEqual(span.duration_seconds, session_span.duration_seconds)
+
+    def test_tracing_failed_change(self):
+        """Makes sure that the span of a change that failed carries the error and contains the
+        span of the data store call that raised it."""
+
+        original = self.data_store2.execute_item_change
+        failed_item_ids = []
+
+        def execute_item_change_mock(item_change: "ItemChange"):
+            if not failed_item_ids:
+                failed_item_ids.append(item_change.serialization_result.item_id)
+                raise ValueError("Error!")
+            original(item_change)
+
+        self.data_store2.execute_item_change = execute_item_change_mock
+        self.events_manager2.raise_exception = False
+        exporter = InMemorySpanExporter()
+        previous_tracer = get_tracer()
+        set_tracer(Tracer(exporter=exporter))
+        try:
+            trace_data_store(data_store=self.data_store2)
+            self.orchestrator.synchronize_providers(
+                source_provider_id="other_provider",
+                target_provider_id="provider_in_test",
+            )
+        finally:
+            set_tracer(previous_tracer)
+            self.events_manager2.raise_exception = True
+
+        change_spans = exporter.get_spans(name="process_remote_change")
+        [failed_change_span] = [
+            span for span in change_spans if "error" in span.attributes
+        ]
+        self.assertEqual(
+            failed_change_span.attributes["error"], repr(ValueError("Error!"))
+        )
+        self.assertEqual(failed_change_span.attributes["item_id"], failed_item_ids[0])
+
+        spans_by_id = {span.span_id: span for span in exporter.get_spans()}
+        [failed_call_span] = [
+            span
+            for span in exporter.get_spans(name="data_store.execute_item_change")
+            if span.error is not None
+        ]
+        self.assertEqual(failed_call_span.error, repr(ValueError("Error!")))
+        parent = spans_by_id[failed_call_span.parent_id]
+        while parent.name.startswith("data_store."):
+            parent = spans_by_id[parent.parent_id]
+        self.assertIs(parent, failed_change_span)
+        self.assertEqual(failed_call_span.trace_id, failed_change_span.trace_id)
+
+    def test_sync_lock_lost(self):
+        """Makes sure that a synchronization whose lock was lost isn't reported as complete."""
+
+        num_sessions2 = len(self.data_store2.get_sync_sessions())
+        self.sync_lock.lease_seconds = 0
+        self.events_manager1.raise_exception = False
+        self.events_manager2.raise_exception = False
+        with unittest.mock.patch.object(self.sync_lock, "renew", return_value=False):
+            self.assertFalse(
+                self.orchestrator.run(initial_source_provider_id="other_provider")
+            )
+        self.events_manager1.raise_exception = True
+        self.events_manager2.raise_exception = True
+
+        # Only the first session ran, and it failed when the lease was renewed
+        sync_sessions = self.data_store2.get_sync_sessions()
+        self.assertEqual(len(sync_sessions), num_sessions2 + 1)
+        self.assertEqual(sync_sessions[-1].status, SyncSessionStatus.FAILED)
+
+        self.sync_lock.lease_seconds = 60
+        self.assertTrue(
+            self.orchestrator.run(initial_source_provider_id="other_provider")
+        )
+
+    def test_sync_budget(self):
+        """Simulates sessions whose budget is exhausted after a batch of changes.
+            The remaining changes are synchronized by the next sessions.
+        """
+
+        num_changes2 = len(self.data_store2.get_item_changes())
+        num_sessions2 = len(self.data_store2.get_sync_sessions())
+        self.orchestrator.budget = SyncBudget(limits={"writes": 5})
+
+        # Each change saved counts as a write
+        def get_usage():
+            return {"writes": len(self.data_store2.get_item_changes())}
+
+        with unittest.mock.patch.object(
+            self.data_store2, "get_usage", side_effect=get_usage
+        ):
+            self.assertFalse(
+                self.orchestrator.run(initial_source_provider_id="other_provider")
+            )
+
+            self.assertEqual(num_changes2 + 5, len(self.data_store2.get_item_changes()))
+            with self.assertRaises(ItemNotFoundException):
+                self.data_store2.get_item_by_id(id=self.item2_id)
+
+            sync_sessions = self.data_store2.get_sync_sessions()
+            self.assertEqual(num_sessions2 + 2, len(sync_sessions))
+            self.assertEqual(sync_sessions[0].status, SyncSessionStatus.FINISHED)
+            self.assertEqual(sync_sessions[0].usage, {"writes": 5})
+            self.assertEqual(sync_sessions[1].status, SyncSessionStatus.FINISHED)
+            self.assertEqual(sync_sessions[1].usage, {"writes": 0})
+
+            self.assertFalse(
+                self.orchestrator.run(initial_source_provider_id="other_provider")
+            )
+            self.assertEqual(
+                num_changes2 + 10, len(self.data_store2.get_item_changes())
+            )
+            self.assertTrue(
+                self.orchestrator.run(initial_source_provider_id="other_provider")
+            )
+
+        self.assertEqual(num_changes2 + 12, len(self.data_store2.get_item_changes()))
+        self.data_store2.get_item_by_id(id=self.item2_id)
+
+        # Hourly limits include the usage of the previous sessions
+        budget = SyncBudget(limits={"writes": 5}, period_seconds=3600)
+        budget.register_session(session_usage={"writes": 4})
+        self.assertFalse(budget.is_exhausted(session_usage={}))
+        self.assertTrue(budget.is_exhausted(session_usage={"writes": 1}))
+
+        with unittest.mock.patch(
+            "maestro.core.utils.time", **{"time.return_value": time.time() + 3601}
+        ):
+            self.assertFalse(budget.is_exhausted(session_usage={"writes": 1}))
+
 
 class QueryFullSyncTest(BackendTestMixin, unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,93 @@
+import unittest
+from maestro.core.exceptions import SyncLockedException, SyncLockLostException
+from maestro.core.query.metadata import Query, Filter
+from maestro.core.utils import get_sync_lock_key
+from .base import BackendTestMixin
+import time
+
+
+class BaseSyncLockTest(BackendTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.sync_lock = self._create_sync_lock()
+
+    def test_get_sync_lock_key(self):
+        query = Query(
+            entity_name="my_app_item",
+            filter=Filter(children=[]),
+            ordering=[],
+            limit=None,
+            offset=None,
+        )
+        self.assertEqual(
+            get_sync_lock_key(provider_ids=["provider2", "provider1"]),
+            "provider1:provider2:all",
+        )
+        self.assertEqual(
+            get_sync_lock_key(provider_ids=["provider1", "provider2"], query=query),
+            "provider1:provider2:" + query.get_id(),
+        )
+
+    def test_acquire(self):
+        token = self.sync_lock.acquire(key="key1")
+        self.assertIsNotNone(token)
+        self.assertTrue(self.sync_lock.is_running(key="key1"))
+
+        # Only one holder per key
+        self.assertIsNone(self.sync_lock.acquire(key="key1"))
+        other_token = self.sync_lock.acquire(key="key2")
+        self.assertIsNotNone(other_token)
+
+        # Releasing with another token is ignored
+        self.sync_lock.release(key="key1", token=other_token)
+        self.assertTrue(self.sync_lock.is_running(key="key1"))
+
+        self.assertTrue(self.sync_lock.renew(key="key1", token=token))
+        self.assertFalse(self.sync_lock.renew(key="key1", token=other_token))
+
+        self.sync_lock.release(key="key1", token=token)
+        self.sync_lock.release(key="key2", token=other_token)
+        self.assertFalse(self.sync_lock.is_running(key="key1"))
+        self.assertFalse(self.sync_lock.is_running(key="key2"))
+
+    def test_lease_expiry(self):
+        self.sync_lock.lease_seconds = 1
+        sync_lease = self.sync_lock.lock(key="key1")
+        with sync_lease:
+            with self.assertRaises(SyncLockedException):
+                with self.sync_lock.lock(key="key1"):
+                    pass
+
+            time.sleep(1.1)
+            self.assertFalse(self.sync_lock.is_running(key="key1"))
+
+            # Another session takes over the expired lock
+            token = self.sync_lock.acquire(key="key1")
+            self.assertIsNotNone(token)
+            with self.assertRaises(SyncLockLostException):
+                sync_lease.heartbeat()
+
+        # The lock of the other session is kept
+        self.assertTrue(self.sync_lock.is_running(key="key1"))
+        self.sync_lock.release(key="key1", token=token)
+
+    def test_lease_expiry_reacquired(self):
+        self.sync_lock.lease_seconds = 1
+        old_token = self.sync_lock.acquire(key="key1")
+        time.sleep(1.1)
+
+        # The expired lease can't be renewed, even before anyone takes it over
+        self.assertFalse(self.sync_lock.renew(key="key1", token=old_token))
+
+        self.sync_lock.lease_seconds = 60
+        token = self.sync_lock.acquire(key="key1")
+        self.assertIsNotNone(token)
+        self.assertNotEqual(token, old_token)
+
+        # The expired holder can neither renew nor release the new lease
+        self.assertFalse(self.sync_lock.renew(key="key1", token=old_token))
+        self.sync_lock.release(key="key1", token=old_token)
+        self.assertTrue(self.sync_lock.is_running(key="key1"))
+        self.assertTrue(self.sync_lock.renew(key="key1", token=token))
+
+        self.sync_lock.release(key="key1", token=token)
+        self.assertFalse(self.sync_lock.is_running(key="key1"))
@@ -68,21 +68,24 @@ class TestDjangoDataStore(DjangoDataStore, tests.base.TestDataStoreMixin):
         content_type = ContentType.objects.get_for_model(Item)
         ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
 
-        return ItemChangeRecord.objects.create(
+        item_change_record, _ = ItemChangeRecord.objects.update_or_create(
             id=item_change.id,
-            date_created=item_change.date_created,
-            operation=item_change.operation.value,
-            item_id=item_change.serialization_result.item_id,
-            content_type=content_type,
-            provider_timestamp=item_change.change_vector_clock_item.timestamp,
-            provider_id=item_change.change_vector_clock_item.provider_id,
-            insert_provider_timestamp=item_change.insert_vector_clock_item.timestamp,
-            insert_provider_id=item_change.insert_vector_clock_item.provider_id,
-            serialized_item=item_change.serialization_result.serialized_item,
-            should_ignore=item_change.should_ignore,
-            is_applied=item_change.is_applied,
-            vector_clock=vector_clock,
+            defaults=dict(
+                date_created=item_change.date_created,
+                operation=item_change.operation.value,
+                item_id=item_change.serialization_result.item_id,
+                content_type=content_type,
+                provider_timestamp=item_change.change_vector_clock_item.timestamp,
+                provider_id=item_change.change_vector_clock_item.provider_id,
+                insert_provider_timestamp=item_change.insert_vector_clock_item.timestamp,
+                insert_provider_id=item_change.insert_vector_clock_item.provider_id,
+                serialized_item=item_change.serialization_result.serialized_item,
+                should_ignore=item_change.should_ignore,
+                is_applied=item_change.is_applied,
+                vector_clock=vector_clock,
+            ),
         )
+        return item_change_record
 
     def _add_item_version(self, item_version: "ItemVersion"):
         vector_clock = [
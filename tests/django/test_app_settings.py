@@ -1,12 +1,30 @@
-from django.test import TestCase, override_settings
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, transaction
 from django.apps import apps
 from django.urls import re_path
 from maestro.backends.django.contrib.factory import create_django_data_store
 from maestro.backends.django.contrib.model_dependencies import get_model_dependencies
-from maestro.backends.django.contrib.signals import temporarily_disable_signals
+from maestro.backends.django.contrib.signals import (
+    temporarily_disable_signals,
+    _is_suppressed,
+)
 from maestro.backends.django.contrib.migrate import commit_model_changes
+from maestro.backends.django.contrib.bulk import (
+    bulk_create,
+    bulk_update,
+    queryset_update,
+    SyncQuerySet,
+)
 from maestro.backends.django.contrib.middleware import _operations_queue
+from maestro.backends.django.settings import maestro_settings
+from maestro.backends.django.utils import model_to_entity_name
+from maestro.backends.django import ItemChangeMetadataConverter
+from django.core.management.sql import emit_post_migrate_signal
 from maestro.core.metadata import Operation
+from django.db.models.signals import post_save
+from unittest import mock
+import threading
 import uuid
 from tests.django.views import update_item_view
 
@@ -87,6 +105,64 @@ class AppSettingsTest(TestCase):
         commit_model_changes(Item)
         self.assertEqual(num_changes + 2, ItemChangeRecord.objects.count())
 
+    def test_signals_disabled_per_thread(self):
+        Item = apps.get_model("my_app", "Item")
+        AnotherModel = apps.get_model("my_app", "AnotherModel")
+        ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+        results = {}
+
+        def check_other_thread():
+            results["suppressed"] = _is_suppressed(model=Item)
+
+        with temporarily_disable_signals(Item):
+            with temporarily_disable_signals(Item):
+                self.assertTrue(_is_suppressed(model=Item))
+            self.assertTrue(_is_suppressed(model=Item))
+            self.assertFalse(_is_suppressed(model=AnotherModel))
+
+            # The receivers stay connected and other threads keep tracking changes
+            self.assertTrue(post_save.has_listeners(Item))
+            thread = threading.Thread(target=check_other_thread)
+            thread.start()
+            thread.join()
+
+            Item.objects.create(id=uuid.uuid4(), name="item", version="1")
+            self.assertEqual(ItemChangeRecord.objects.count(), 0)
+
+        self.assertFalse(results["suppressed"])
+        self.assertFalse(_is_suppressed(model=Item))
+        Item.objects.create(id=uuid.uuid4(), name="item", version="1")
+        self.assertEqual(ItemChangeRecord.objects.count(), 1)
+
+    def test_model_registry(self):
+        Item = apps.get_model("my_app", "Item")
+        ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+        item_id = uuid.UUID("533ce3b4-9ef6-42fe-b220-64c86aaad444")
+        item = Item(id=item_id, name="item", version="1",)
+
+        data_store = create_django_data_store()
+        item_change = data_store.commit_item_change(
+            operation=Operation.INSERT,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=item,
+        )
+        item_change_record = ItemChangeRecord.objects.get(id=item_change.id)
+
+        # Conversions don't query the database once the registry is warm
+        converter = ItemChangeMetadataConverter()
+        with self.assertNumQueries(0):
+            self.assertEqual(model_to_entity_name(item), "my_app_item")
+            converter.to_record(metadata_object=item_change)
+            converter.to_metadata(record=item_change_record)
+
+        # Migrations clear the registry
+        emit_post_migrate_signal(verbosity=0, interactive=False, db="default")
+        with self.assertNumQueries(1):
+            converter.to_record(metadata_object=item_change)
+        with self.assertNumQueries(0):
+            converter.to_record(metadata_object=item_change)
+
     def test_model_dependencies(self):
         all_models = []
         AnotherModel = apps.get_model("my_app", "AnotherModel")
@@ -101,3 +177,242 @@ class AppSettingsTest(TestCase):
             },
         )
         self.assertEqual(all_models, ["my_app.item", "my_app.anothermodel"])
+
+
+class BufferedSignalsTest(TransactionTestCase):
+    def setUp(self):
+        _operations_queue.items = []
+        patcher = mock.patch.object(maestro_settings, "BUFFER_SIGNAL_CHANGES", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _count_maestro_queries(self, queries):
+        return len([query for query in queries if "maestro_" in query["sql"]])
+
+    def test_buffered_signals(self):
+        Item = apps.get_model("my_app", "Item")
+        ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+        ItemVersionRecord = apps.get_model("maestro", "ItemVersionRecord")
+
+        # Operations on the same item are merged into a single change
+        with CaptureQueriesContext(connection) as context1:
+            with transaction.atomic():
+                item1 = Item.objects.create(
+                    id=uuid.UUID("533ce3b4-9ef6-42fe-b220-64c86aaad444"),
+                    name="item",
+                    version="1",
+                )
+                item1.version = "2"
+                item1.save()
+                item2 = Item.objects.create(
+                    id=uuid.UUID("f901423f-8fbb-4f89-ac2a-a1f5c1a41ed2"),
+                    name="item",
+                    version="1",
+                )
+                item2.delete()
+                self.assertEqual(ItemChangeRecord.objects.count(), 0)
+
+        self.assertEqual(len(_operations_queue.items), 4)
+        self.assertEqual(ItemChangeRecord.objects.count(), 1)
+        self.assertEqual(ItemVersionRecord.objects.count(), 1)
+        item_change_record = ItemChangeRecord.objects.get()
+        self.assertEqual(item_change_record.operation, Operation.INSERT.value)
+        self.assertEqual(
+            item_change_record.serialized_item,
+            '{"id": "533ce3b4-9ef6-42fe-b220-64c86aaad444", "name": "item", "version": "2"}',
+        )
+
+        # The number of queries doesn't depend on the number of items
+        with CaptureQueriesContext(connection) as context2:
+            with transaction.atomic():
+                for idx in range(10):
+                    Item.objects.create(id=uuid.uuid4(), name="item", version="1")
+                item1.version = "3"
+                item1.save()
+
+        self.assertEqual(ItemChangeRecord.objects.count(), 12)
+        self.assertEqual(ItemVersionRecord.objects.count(), 11)
+        self.assertEqual(
+            self._count_maestro_queries(context1.captured_queries),
+            self._count_maestro_queries(context2.captured_queries),
+        )
+        item_version_record = ItemVersionRecord.objects.get(id=item1.id)
+        self.assertEqual(item_version_record.current_item_change.operation, "UPDATE")
+
+        provider_timestamps = list(
+            ItemChangeRecord.objects.order_by("date_created").values_list(
+                "provider_timestamp", flat=True
+            )
+        )
+        self.assertEqual(len(set(provider_timestamps)), 12)
+        self.assertEqual(provider_timestamps, sorted(provider_timestamps))
+
+        # Nothing is recorded when the transaction is rolled back
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                Item.objects.create(id=uuid.uuid4(), name="item", version="1")
+                raise ValueError()
+
+        self.assertEqual(ItemChangeRecord.objects.count(), 12)
+
+        # Operations outside of transactions are committed immediately
+        Item.objects.create(id=uuid.uuid4(), name="item", version="1")
+        self.assertEqual(ItemChangeRecord.objects.count(), 13)
+
+
+    def test_buffered_signals_savepoints(self):
+        Item = apps.get_model("my_app", "Item")
+        ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+
+        # Operations performed in savepoints are merged with the enclosing block's
+        item_id = uuid.UUID("533ce3b4-9ef6-42fe-b220-64c86aaad444")
+        with transaction.atomic():
+            item = Item.objects.create(id=item_id, name="item", version="1")
+            with transaction.atomic():
+                item.version = "2"
+                item.save()
+            item.version = "3"
+            item.save()
+
+        item_change_record = ItemChangeRecord.objects.get()
+        self.assertEqual(item_change_record.operation, Operation.INSERT.value)
+        self.assertEqual(
+            item_change_record.serialized_item,
+            '{"id": "533ce3b4-9ef6-42fe-b220-64c86aaad444", "name": "item", "version": "3"}',
+        )
+
+        # Operations performed in savepoints that were rolled back are discarded
+        with transaction.atomic():
+            item.version = "4"
+            item.save()
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    Item.objects.create(id=uuid.uuid4(), name="item", version="1")
+                    with transaction.atomic():
+                        item.version = "5"
+                        item.save()
+                    raise ValueError()
+
+            with transaction.atomic():
+                Item.objects.create(id=uuid.uuid4(), name="item", version="1")
+
+        item_change_records = list(ItemChangeRecord.objects.order_by("date_created"))
+        self.assertEqual(len(item_change_records), 3)
+        self.assertEqual(
+            item_change_records[1].serialized_item,
+            '{"id": "533ce3b4-9ef6-42fe-b220-64c86aaad444", "name": "item", "version": "4"}',
+        )
+        self.assertEqual(item_change_records[2].operation, Operation.INSERT.value)
+
+    def test_buffered_signals_rollback(self):
+        Item = apps.get_model("my_app", "Item")
+        ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+        item = Item.objects.create(id=uuid.uuid4(), name="item", version="1")
+
+        # The operations of a transaction that was rolled back don't leak into the next one
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                item.version = "2"
+                item.save()
+                raise ValueError()
+
+        with transaction.atomic():
+            # The first operation is rolled back with its savepoint
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    Item.objects.create(id=uuid.uuid4(), name="item", version="1")
+                    raise ValueError()
+
+            other_item = Item.objects.create(id=uuid.uuid4(), name="item", version="1")
+
+        item_change_records = list(ItemChangeRecord.objects.order_by("date_created"))
+        self.assertEqual(
+            [record.item_id for record in item_change_records], [item.id, other_item.id]
+        )
+        self.assertEqual(
+            [record.operation for record in item_change_records],
+            [Operation.INSERT.value, Operation.INSERT.value],
+        )
+
+
+class BulkOperationsTest(TestCase):
+    def _count_maestro_queries(self, queries):
+        return len([query for query in queries if "maestro_" in query["sql"]])
+
+    def _create_items(self, num_items):
+        Item = apps.get_model("my_app", "Item")
+        with CaptureQueriesContext(connection) as context:
+            items = bulk_create(
+                Item,
+                [
+                    Item(id=uuid.uuid4(), name="item", version="1")
+                    for _ in range(num_items)
+                ],
+            )
+        return items, self._count_maestro_queries(context.captured_queries)
+
+    def test_bulk_operations(self):
+        Item = apps.get_model("my_app", "Item")
+        ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+        ItemVersionRecord = apps.get_model("maestro", "ItemVersionRecord")
+
+        # Create
+        items1, num_queries1 = self._create_items(num_items=2)
+        items2, num_queries2 = self._create_items(num_items=10)
+        self.assertEqual(num_queries1, num_queries2)
+        self.assertEqual(ItemChangeRecord.objects.count(), 12)
+        self.assertEqual(ItemVersionRecord.objects.count(), 12)
+        self.assertEqual(
+            ItemChangeRecord.objects.filter(operation=Operation.INSERT.value).count(),
+            12,
+        )
+
+        # Update
+        for item in items1:
+            item.version = "2"
+        bulk_update(Item, items1, fields=["version"])
+        self.assertEqual(ItemChangeRecord.objects.count(), 14)
+        for item in items1:
+            item_version_record = ItemVersionRecord.objects.get(id=item.id)
+            self.assertEqual(
+                item_version_record.current_item_change.operation,
+                Operation.UPDATE.value,
+            )
+            self.assertEqual(
+                item_version_record.current_item_change.serialized_item,
+                f'{{"id": "{item.id}", "name": "item", "version": "2"}}',
+            )
+
+        # QuerySet.update
+        count = queryset_update(Item.objects.filter(version="1"), version="3")
+        self.assertEqual(count, 10)
+        self.assertEqual(ItemChangeRecord.objects.count(), 24)
+        item_version_record = ItemVersionRecord.objects.get(id=items2[0].id)
+        self.assertEqual(
+            item_version_record.current_item_change.serialized_item,
+            f'{{"id": "{items2[0].id}", "name": "item", "version": "3"}}',
+        )
+
+        # QuerySet
+        queryset = SyncQuerySet(model=Item)
+        queryset.bulk_create([Item(id=uuid.uuid4(), name="item", version="1")])
+        queryset.filter(version="1").update(version="4")
+        self.assertEqual(ItemChangeRecord.objects.count(), 26)
+
+        # Items without primary keys can't be synchronized
+        with self.assertRaises(ValueError):
+            bulk_create(Item, [Item(id=None, name="item", version="1")])
+
+        # The rows that conflict wouldn't be recorded correctly
+        with self.assertRaises(ValueError):
+            bulk_create(
+                Item,
+                [Item(id=items1[0].id, name="item", version="5")],
+                ignore_conflicts=True,
+            )
+        with self.assertRaises(ValueError):
+            queryset.bulk_create(
+                [Item(id=items1[0].id, name="item", version="5")],
+                ignore_conflicts=True,
+            )
+        self.assertEqual(ItemChangeRecord.objects.count(), 26)
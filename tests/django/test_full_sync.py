@@ -1,4 +1,6 @@
+from django.db import DatabaseError
 from django.test import TestCase, override_settings
+from unittest import mock
 import tests.base_full_sync
 import tests.django.base
 
@@ -8,5 +10,51 @@ class DjangoFullSyncTest(
     tests.django.base.DjangoBackendTestMixin,
     tests.base_full_sync.FullSyncTest,
     TestCase,
+):
+    def test_batch_fallback(self):
+        """Makes sure that the changes of a batch whose transaction fails are applied
+        separately."""
+
+        run_batch_in_transaction = self.data_store2.run_batch_in_transaction
+        num_attempts = 0
+
+        def failing_run_batch_in_transaction(item_changes, callback):
+            nonlocal num_attempts
+            num_attempts += 1
+
+            def failing_callback():
+                callback()
+                raise DatabaseError()
+
+            run_batch_in_transaction(item_changes=item_changes, callback=failing_callback)
+
+        num_sessions = len(self.data_store2.get_sync_sessions())
+        with mock.patch.object(
+            self.data_store2,
+            "run_batch_in_transaction",
+            side_effect=failing_run_batch_in_transaction,
+        ):
+            self.orchestrator.synchronize_providers(
+                source_provider_id="other_provider",
+                target_provider_id="provider_in_test",
+            )
+
+        self.assertGreater(num_attempts, 0)
+        self.assertEqual(len(self.data_store2.get_items()), 2 + 3)
+        sync_session = self.data_store2.get_sync_sessions()[num_sessions]
+        self.assertEqual(
+            len(sync_session.item_changes), len(self.data_store1.get_item_changes())
+        )
+        self.assertEqual(
+            sync_session.stats["changes_applied"],
+            len(self.data_store1.get_item_changes()),
+        )
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class DjangoQueryFullSyncTest(
+    tests.django.base.DjangoBackendTestMixin,
+    tests.base_full_sync.QueryFullSyncTest,
+    TestCase,
 ):
     pass
@@ -0,0 +1,482 @@
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from maestro.backends.django.contrib.factory import create_django_data_store
+from maestro.backends.django.converters import TrackedQueryMetadataConverter
+from maestro.backends.django.store import ItemOperation
+from maestro.backends.django.contrib.signals import temporarily_disable_signals
+from maestro.backends.django.contrib.migrate import (
+    move_item_payloads,
+    inline_item_payloads,
+    setup_item_data,
+)
+from maestro.backends.django.settings import maestro_settings
+from maestro.backends.django.utils import (
+    convert_to_django_filter,
+    convert_to_django_ordering,
+)
+from maestro.core.metadata import (
+    Operation,
+    ConflictLog,
+    ConflictStatus,
+    ConflictType,
+    SyncSession,
+    SyncSessionStatus,
+    VectorClock,
+)
+from maestro.core.query.metadata import (
+    Query,
+    Filter,
+    Comparison,
+    Comparator,
+    Connector,
+    SortOrder,
+    TrackedQuery,
+)
+from maestro.core.utils import get_now_utc
+import datetime as dt
+import decimal
+import json
+from unittest import mock
+import pytest
+import uuid
+
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="JSONB item data requires PostgreSQL"
+)
+
+
+def _create_metadata(data_store, num_items):
+    Item = apps.get_model("my_app", "Item")
+    item_changes = []
+    for idx in range(num_items):
+        item_id = uuid.uuid4()
+        item_change = data_store.commit_item_change(
+            operation=Operation.INSERT,
+            entity_name="my_app_item",
+            item_id=str(item_id),
+            item=Item(id=item_id, name="item", version="1"),
+        )
+        item_changes.append(item_change)
+        data_store.save_conflict_log(
+            conflict_log=ConflictLog(
+                id=uuid.uuid4(),
+                created_at=get_now_utc(),
+                resolved_at=None,
+                item_change_loser=item_change,
+                item_change_winner=item_change,
+                status=ConflictStatus.DEFERRED,
+                conflict_type=ConflictType.EXCEPTION_OCCURRED,
+                description=None,
+            )
+        )
+
+    data_store.save_sync_session(
+        sync_session=SyncSession(
+            id=uuid.uuid4(),
+            started_at=get_now_utc(),
+            ended_at=get_now_utc(),
+            status=SyncSessionStatus.FINISHED,
+            source_provider_id="other_provider",
+            target_provider_id="django",
+            item_changes=item_changes,
+        )
+    )
+    return item_changes
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_items", [1, 5])
+@pytest.mark.parametrize("store_payloads_separately", [False, True])
+def test_metadata_queries(
+    num_items, store_payloads_separately, django_assert_num_queries
+):
+    with mock.patch.object(
+        maestro_settings, "STORE_PAYLOADS_SEPARATELY", store_payloads_separately
+    ):
+        data_store = create_django_data_store()
+        item_changes = _create_metadata(data_store=data_store, num_items=num_items)
+
+    # Payloads stored out of line are loaded with one additional query
+    payload_queries = 1 if store_payloads_separately else 0
+
+    with django_assert_num_queries(1 + payload_queries):
+        item_versions = data_store.get_item_versions()
+    assert len(item_versions) == num_items
+
+    with django_assert_num_queries(1):
+        data_store.get_item_version(item_id=item_changes[0].serialization_result.item_id)
+
+    with django_assert_num_queries(1 + payload_queries):
+        assert len(data_store.get_item_changes()) == num_items
+
+    with django_assert_num_queries(1 + payload_queries):
+        assert len(data_store.get_conflict_logs()) == num_items
+
+    with django_assert_num_queries(1 + payload_queries):
+        conflict_logs = data_store.get_deferred_conflict_logs(
+            item_change_loser=item_changes[0]
+        )
+    assert len(conflict_logs) == 1
+
+    with django_assert_num_queries(2 + payload_queries):
+        sync_sessions = data_store.get_sync_sessions()
+    assert len(sync_sessions[0].item_changes) == num_items
+
+    # Distinct providers, count and page
+    with django_assert_num_queries(3 + payload_queries):
+        item_change_batch = data_store.select_changes(
+            vector_clock=VectorClock.create_empty(provider_ids=["django"]),
+            max_num=10,
+        )
+    assert len(item_change_batch.item_changes) == num_items
+    assert [
+        item_change.serialization_result.serialized_item
+        for item_change in item_change_batch.item_changes
+    ] == [item_change.serialization_result.serialized_item for item_change in item_changes]
+
+
+@pytest.mark.django_db
+def test_move_item_payloads():
+    ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+    ItemPayloadRecord = apps.get_model("maestro", "ItemPayloadRecord")
+    data_store = create_django_data_store()
+    item_changes = _create_metadata(data_store=data_store, num_items=5)
+
+    # Identical payloads are stored once
+    Item = apps.get_model("my_app", "Item")
+    item_id = item_changes[0].serialization_result.item_id
+    item_changes.append(
+        data_store.commit_item_change(
+            operation=Operation.UPDATE,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=Item(id=uuid.UUID(item_id), name="item", version="1"),
+        )
+    )
+
+    assert move_item_payloads(batch_size=2) == 6
+    assert ItemPayloadRecord.objects.count() == 5
+    assert not ItemChangeRecord.objects.filter(payload__isnull=True).exists()
+    assert data_store.get_item_changes() == item_changes
+
+    assert inline_item_payloads(batch_size=2) == 6
+    assert ItemPayloadRecord.objects.count() == 0
+    assert data_store.get_item_changes() == item_changes
+
+
+def test_filter_conversion():
+    filter1 = Filter(
+        children=[Comparison(field_name="name", comparator=Comparator.EQUALS, value="a")]
+    )
+    filter2 = Filter(
+        children=[
+            Comparison(field_name="version", comparator=Comparator.IN, value=["1", "2"])
+        ]
+    )
+    date = dt.datetime(2021, 7, 19, 18, 35, tzinfo=dt.timezone.utc)
+    filter3 = Filter(
+        children=[
+            Comparison(
+                field_name="date_created", comparator=Comparator.GREATER_THAN, value=date
+            )
+        ]
+    )
+    filter4 = Filter(
+        children=[
+            Comparison(field_name="name", comparator=Comparator.NOT_EQUALS, value=None)
+        ]
+    )
+
+    assert convert_to_django_filter(
+        filter=filter1 & (filter2 | filter3), field_name="item_data"
+    ) == Q(item_data__contains={"name": "a"}) & (
+        Q(item_data__version__in=["1", "2"])
+        | Q(item_data__date_created__gt="2021-07-19T18:35:00Z")
+    )
+    assert convert_to_django_filter(
+        filter=filter4, field_name="item_data"
+    ) == ~Q(item_data__name=None)
+    assert convert_to_django_ordering(
+        ordering=[SortOrder(field_name="name", descending=True), SortOrder("version")],
+        field_name="item_data",
+    ) == ["-item_data__name", "item_data__version"]
+
+
+def test_filter_conversion_values():
+    """Comparison values use the same representation as the serialized items."""
+
+    date = dt.datetime(
+        2021, 7, 19, 15, 35, 0, 123456, tzinfo=dt.timezone(dt.timedelta(hours=-3))
+    )
+    price = decimal.Decimal("10.50")
+    serialized_item = json.loads(
+        json.dumps(
+            {"date_created": date.astimezone(dt.timezone.utc), "price": price},
+            cls=DjangoJSONEncoder,
+        )
+    )
+    assert serialized_item == {
+        "date_created": "2021-07-19T18:35:00.123Z",
+        "price": "10.50",
+    }
+
+    filter1 = Filter(
+        children=[
+            Comparison(
+                field_name="date_created", comparator=Comparator.EQUALS, value=date
+            )
+        ]
+    )
+    assert convert_to_django_filter(filter=filter1, field_name="item_data") == Q(
+        item_data__contains={"date_created": serialized_item["date_created"]}
+    )
+
+    # Decimals and ranges of numbers are compared as numeric values
+    filter2 = Filter(
+        children=[
+            Comparison(field_name="price", comparator=Comparator.EQUALS, value=price),
+            Comparison(field_name="quantity", comparator=Comparator.GREATER_THAN, value=2),
+            Comparison(field_name="quantity", comparator=Comparator.EQUALS, value=3),
+        ]
+    )
+    assert convert_to_django_filter(filter=filter2, field_name="item_data") == (
+        Q(item_data__price__maestro_numeric=price)
+        & Q(item_data__quantity__maestro_numeric__gt=2)
+        & Q(item_data__contains={"quantity": 3})
+    )
+
+    ItemChangeRecord = apps.get_model("maestro", "ItemChangeRecord")
+    sql = str(
+        ItemChangeRecord.objects.filter(
+            item_data__quantity__maestro_numeric__gt=2
+        ).query
+    )
+    assert "#>> '{}')::numeric" in sql
+
+
+@pytest.mark.django_db
+def test_query_items():
+    Item = apps.get_model("my_app", "Item")
+    data_store = create_django_data_store()
+    item_changes = []
+    for name, version in [("b", "1"), ("a", "1"), ("c", "2")]:
+        item_id = uuid.uuid4()
+        item_changes.append(
+            data_store.commit_item_change(
+                operation=Operation.INSERT,
+                entity_name="my_app_item",
+                item_id=str(item_id),
+                item=Item(id=item_id, name=name, version=version),
+            )
+        )
+    vector_clock = data_store.get_local_vector_clock()
+    item_id = item_changes[1].serialization_result.item_id
+    data_store.commit_item_change(
+        operation=Operation.UPDATE,
+        entity_name="my_app_item",
+        item_id=item_id,
+        item=Item(id=uuid.UUID(item_id), name="a", version="2"),
+    )
+
+    query = Query(
+        entity_name="my_app_item",
+        filter=Filter(
+            children=[
+                Comparison(field_name="version", comparator=Comparator.EQUALS, value="1")
+            ]
+        ),
+        ordering=[SortOrder(field_name="name")],
+        limit=None,
+        offset=None,
+    )
+    items = data_store.query_items(query=query, vector_clock=None)
+    assert [item.name for item in items] == ["b"]
+
+    items = data_store.query_items(query=query, vector_clock=vector_clock)
+    assert [item.name for item in items] == ["a", "b"]
+
+    query.filter = Filter(children=[])
+    query.limit = 2
+    query.offset = 1
+    items = data_store.query_items(query=query, vector_clock=None)
+    assert [(item.name, item.version) for item in items] == [("b", "1"), ("c", "2")]
+
+
+def test_tracked_query_converter():
+    query = Query(
+        entity_name="my_app_item",
+        filter=Filter(
+            connector=Connector.OR,
+            children=[
+                Comparison(
+                    field_name="date",
+                    comparator=Comparator.GREATER_THAN,
+                    value=dt.datetime(2021, 7, 19, 15, 35, tzinfo=dt.timezone.utc),
+                ),
+                Filter(
+                    children=[
+                        Comparison(
+                            field_name="price",
+                            comparator=Comparator.LESS_THAN,
+                            value=decimal.Decimal("10.50"),
+                        ),
+                        Comparison(
+                            field_name="id",
+                            comparator=Comparator.IN,
+                            value={uuid.UUID("e104b1c0-9a15-4ac1-b5fb-b273b91250d1")},
+                        ),
+                        Comparison(
+                            field_name="name", comparator=Comparator.EQUALS, value=None
+                        ),
+                    ]
+                ),
+            ],
+        ),
+        ordering=[SortOrder(field_name="name", descending=True)],
+        limit=10,
+        offset=None,
+    )
+    vector_clock = VectorClock.create_empty(provider_ids=["django"])
+    converter = TrackedQueryMetadataConverter()
+
+    record = converter.to_record(
+        metadata_object=TrackedQuery(query=query, vector_clock=vector_clock)
+    )
+    assert record.id == query.get_id()
+    record.query = json.loads(json.dumps(record.query))
+
+    tracked_query = converter.to_metadata(record=record)
+    assert tracked_query.query.get_id() == query.get_id()
+    assert str(tracked_query.query) == str(query)
+    assert tracked_query.vector_clock == vector_clock
+
+
+@pytest.mark.django_db
+def test_commit_item_changes_query():
+    Item = apps.get_model("my_app", "Item")
+    data_store = create_django_data_store()
+    query = Query(
+        entity_name="my_app_item",
+        filter=Filter(
+            children=[
+                Comparison(field_name="version", comparator=Comparator.EQUALS, value="1")
+            ]
+        ),
+        ordering=[],
+        limit=None,
+        offset=None,
+    )
+    data_store.start_tracking_query(query=query)
+
+    items = [
+        Item(id=uuid.uuid4(), name="a", version="1"),
+        Item(id=uuid.uuid4(), name="b", version="2"),
+    ]
+    with temporarily_disable_signals(model=Item):
+        for item in items:
+            item.save()
+
+    item_changes = data_store.commit_item_changes(
+        item_operations=[
+            ItemOperation(
+                operation=Operation.INSERT,
+                entity_name="my_app_item",
+                item_id=str(item.id),
+                item=item,
+            )
+            for item in items
+        ]
+    )
+    assert data_store.get_local_vector_clock(query=query) == VectorClock(
+        item_changes[0].change_vector_clock_item
+    )
+
+    # Leaving the query also updates its vector clock
+    items[0].version = "2"
+    with temporarily_disable_signals(model=Item):
+        items[0].save()
+    item_changes = data_store.commit_item_changes(
+        item_operations=[
+            ItemOperation(
+                operation=Operation.UPDATE,
+                entity_name="my_app_item",
+                item_id=str(items[0].id),
+                item=items[0],
+            )
+        ]
+    )
+    assert data_store.get_local_vector_clock(query=query) == VectorClock(
+        item_changes[0].change_vector_clock_item
+    )
+
+
+@pytest.mark.django_db
+def test_setup_item_data():
+    with pytest.raises(ValueError):
+        setup_item_data()
+
+
+@postgresql_only
+@pytest.mark.django_db
+def test_query_items_jsonb():
+    Item = apps.get_model("my_app", "Item")
+    data_store = create_django_data_store()
+
+    with mock.patch.object(maestro_settings, "JSONB_ITEM_DATA", True):
+        item_changes = []
+        for name, version in [("b", "2"), ("a", "10"), ("c", "9")]:
+            item_id = uuid.uuid4()
+            item_changes.append(
+                data_store.commit_item_change(
+                    operation=Operation.INSERT,
+                    entity_name="my_app_item",
+                    item_id=str(item_id),
+                    item=Item(id=item_id, name=name, version=version),
+                )
+            )
+        vector_clock = data_store.get_local_vector_clock()
+        item_id = item_changes[1].serialization_result.item_id
+        data_store.commit_item_change(
+            operation=Operation.UPDATE,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=Item(id=uuid.UUID(item_id), name="a", version="1"),
+        )
+
+        # Numbers are compared as numbers, so "10" > 5 although "10" < "5"
+        query = Query(
+            entity_name="my_app_item",
+            filter=Filter(
+                children=[
+                    Comparison(
+                        field_name="version", comparator=Comparator.GREATER_THAN, value=5
+                    )
+                ]
+            ),
+            ordering=[SortOrder(field_name="name")],
+            limit=None,
+            offset=None,
+        )
+        with CaptureQueriesContext(connection) as context:
+            items = data_store.query_items(query=query, vector_clock=None)
+        assert [item.name for item in items] == ["c"]
+        assert any("::numeric" in captured["sql"] for captured in context.captured_queries)
+
+        # The last change of each item before the clock is selected with DISTINCT ON
+        with CaptureQueriesContext(connection) as context:
+            items = data_store.query_items(query=query, vector_clock=vector_clock)
+        assert [(item.name, item.version) for item in items] == [("a", "10"), ("c", "9")]
+        assert any("DISTINCT ON" in captured["sql"] for captured in context.captured_queries)
+
+        query.filter = Filter(children=[])
+        query.ordering = [SortOrder(field_name="version", descending=True)]
+        items = data_store.query_items(query=query, vector_clock=vector_clock)
+        assert [item.version for item in items] == ["9", "2", "10"]
+
+        query.limit = 2
+        query.offset = 1
+        items = data_store.query_items(query=query, vector_clock=None)
+        assert [item.version for item in items] == ["2", "1"]
@@ -0,0 +1,66 @@
+from django.apps import apps
+from django.core import serializers
+from maestro.backends.django import DjangoItemSerializer
+from maestro.core.metadata import SerializationResult
+import pytest
+import json
+import uuid
+
+
+def _legacy_serialize(item):
+    """The output of the serializer when it relied on django.core.serializers."""
+
+    serialized = serializers.serialize("json", [item])
+    data = json.loads(serialized)[0]
+    fields = data["fields"]
+    fields["id"] = data["pk"]
+    return json.dumps(dict(sorted(fields.items())))
+
+
+def _create_items():
+    Item = apps.get_model("my_app", "Item")
+    AnotherModel = apps.get_model("my_app", "AnotherModel")
+
+    item = Item(id=uuid.uuid4(), name="item", version="1")
+    item.save()
+    return [
+        item,
+        Item(id=uuid.uuid4(), name='quoted "name" ã', version="2"),
+        AnotherModel(id=uuid.uuid4(), item=item),
+        AnotherModel(id=uuid.uuid4(), item=None),
+    ]
+
+
+@pytest.mark.django_db
+def test_serialization_matches_django_serializers():
+    serializer = DjangoItemSerializer()
+
+    for item in _create_items():
+        result = serializer.serialize_item(item=item, entity_name="")
+        assert result.item_id == str(item.pk)
+        assert result.serialized_item == _legacy_serialize(item)
+
+        deserialized = serializer.deserialize_item(serialization_result=result)
+        assert type(deserialized) == type(item)
+        assert deserialized.pk == item.pk
+        for field in item._meta.fields:
+            assert getattr(deserialized, field.attname) == getattr(
+                item, field.attname
+            )
+
+
+@pytest.mark.django_db
+def test_deserialization_ignores_unknown_fields():
+    serializer = DjangoItemSerializer()
+    item_id = str(uuid.uuid4())
+    item = serializer.deserialize_item(
+        serialization_result=SerializationResult(
+            item_id=item_id,
+            entity_name="my_app_item",
+            serialized_item=json.dumps(
+                {"id": item_id, "name": "item", "version": "1", "removed": 1}
+            ),
+        )
+    )
+    assert str(item.pk) == item_id
+    assert item.name == "item"
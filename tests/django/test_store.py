@@ -1,10 +1,75 @@
 from django.test import TestCase, override_settings
+from django.apps import apps
+from maestro.core.metadata import Operation
+from unittest import mock
 import tests.base_store
 import tests.django.base
+import uuid
 
 
 @override_settings(ROOT_URLCONF=__name__)
 class DjangoStoreTest(
     tests.django.base.DjangoBackendTestMixin, tests.base_store.BaseStoreTest, TestCase
+):
+    def test_lock_items(self):
+        Item = apps.get_model("my_app", "Item")
+        item_changes = []
+        for idx in range(3):
+            item_id = uuid.uuid4()
+            item_changes.append(
+                self.data_store.commit_item_change(
+                    operation=Operation.INSERT,
+                    entity_name="my_app_item",
+                    item_id=str(item_id),
+                    item=Item(id=item_id, name="item", version="1"),
+                    execute_operation=idx < 2,
+                )
+            )
+
+        with mock.patch.object(
+            self.data_store, "deserialize_item", side_effect=AssertionError
+        ):
+            with self.assertNumQueries(1):
+                locked_item_changes = self.data_store.lock_items(
+                    item_changes=item_changes
+                )
+            self.assertEqual(locked_item_changes, item_changes)
+
+            # The item that doesn't exist yet is checked separately
+            with self.assertNumQueries(2):
+                locked_item_changes = self.data_store.lock_items(
+                    item_changes=item_changes, skip_locked=True
+                )
+            self.assertEqual(locked_item_changes, item_changes)
+
+            result = False
+
+            def callback():
+                nonlocal result
+                result = True
+
+            # Savepoint, lock and release
+            with self.assertNumQueries(3):
+                self.data_store.run_in_transaction(
+                    item_change=item_changes[0], callback=callback
+                )
+            self.assertTrue(result)
+
+            # The items of a batch are locked once: savepoint, lock, the change's savepoint
+            # and release, and release
+            with self.assertNumQueries(5):
+                self.data_store.run_batch_in_transaction(
+                    item_changes=item_changes,
+                    callback=lambda: self.data_store.run_in_transaction(
+                        item_change=item_changes[0], callback=callback
+                    ),
+                )
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class DjangoQueriesTest(
+    tests.django.base.DjangoBackendTestMixin,
+    tests.base_store.BaseQueriesTest,
+    TestCase,
 ):
     pass
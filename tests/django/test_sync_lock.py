@@ -0,0 +1,11 @@
+from django.test import TestCase
+import tests.base_sync_lock
+import tests.django.base
+
+
+class DjangoSyncLockTest(
+    tests.django.base.DjangoBackendTestMixin,
+    tests.base_sync_lock.BaseSyncLockTest,
+    TestCase,
+):
+    pass
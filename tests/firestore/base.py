@@ -34,6 +34,7 @@ from maestro.backends.firestore import (
     VectorClockMetadataConverter,
     FirestoreItemSerializer,
     FirestoreSyncProvider,
+    TrackedQueryMetadataConverter,
 )
 import uuid
 import tests.base
@@ -219,6 +220,9 @@ class FirestoreBackendTestMixin(tests.base.BackendTestMixin):
             )
             conflict_log_metadata_converter = ConflictLogMetadataConverter()
             vector_clock_metadata_converter = VectorClockMetadataConverter()
+            tracked_query_metadata_converter = TrackedQueryMetadataConverter(
+                vector_clock_converter=vector_clock_metadata_converter
+            )
 
             data_store = TestFirestoreDataStore(
                 local_provider_id=local_provider_id,
@@ -228,6 +232,7 @@ class FirestoreBackendTestMixin(tests.base.BackendTestMixin):
                 conflict_log_metadata_converter=conflict_log_metadata_converter,
                 vector_clock_metadata_converter=vector_clock_metadata_converter,
                 item_serializer=self.item_serializer,
+                tracked_query_metadata_converter=tracked_query_metadata_converter,
                 db=self.db,
             )
 
@@ -75,7 +75,10 @@ class FirestoreFullSyncTest(
             290,  # provider2_page3_tick
         ]  # [clock_start, deferred_tick, other_provider_page1_tick, other_provider_page2_tick, clock_start, deferred_tick, provider2_page1_tick, provider2_page2_tick]
 
-        with unittest.mock.patch("time.time", side_effect=timers):
+        with unittest.mock.patch(
+            "maestro.core.utils.time",
+            **{"time.side_effect": timers, "monotonic.return_value": 0},
+        ):
             self.orchestrator.run(initial_source_provider_id="other_provider")
 
         # Resultado esperado:
@@ -116,3 +119,11 @@ class FirestoreFullSyncTest(
 
         with self.assertRaises(ItemNotFoundException):
             self.data_store2.get_item_by_id(id=self.item2_id)
+
+
+class FirestoreQueryFullSyncTest(
+    tests.firestore.base.FirestoreBackendTestMixin,
+    tests.base_full_sync.QueryFullSyncTest,
+    tests.firestore.base.FirestoreTestCase,
+):
+    pass
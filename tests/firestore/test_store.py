@@ -1,4 +1,36 @@
+from maestro.core.query.metadata import (
+    Query,
+    Filter,
+    Comparison,
+    Comparator,
+)
+from maestro.core.events import EventsManager
+from maestro.core.execution import ChangesExecutor, ConflictResolver
+from maestro.core.metadata import (
+    ItemChange,
+    Operation,
+    SerializationResult,
+    VectorClock,
+    VectorClockItem,
+)
+from maestro.core.utils import get_now_utc
+from maestro.backends.firestore.store import (
+    FirestoreCache,
+    FirestoreUsage,
+    freeze,
+    thaw,
+)
+from maestro.backends.firestore.utils import convert_to_firestore_filter
+from maestro.backends.base_nosql.collections import CollectionType
+from maestro.backends.base_nosql.utils import (
+    entity_name_to_collection,
+    type_to_collection,
+)
 import tests.base_store
+import unittest.mock
+import copy
+import datetime as dt
+import uuid
 import tests.firestore.base
 
 
@@ -7,4 +39,528 @@ class FirestoreStoreTest(
     tests.base_store.BaseStoreTest,
     tests.firestore.base.FirestoreTestCase,
 ):
-    pass
+    def test_cache(self):
+        """Tests the eviction, expiration and immutability of cached documents."""
+
+        usage = FirestoreUsage()
+        usage.reset()
+        cache = FirestoreCache(max_size=2, usage=usage)
+        value = {"id": "1", "vector_clock": [{"provider_id": "provider_in_test"}]}
+        cache.save(collection_name="collection", document_id="1", value=value)
+        value["vector_clock"].append({})
+
+        cached = cache.get(collection_name="collection", document_id="1")
+        self.assertEqual(
+            cached, {"id": "1", "vector_clock": ({"provider_id": "provider_in_test"},)}
+        )
+        with self.assertRaises(TypeError):
+            cached["id"] = "2"
+        copied = copy.deepcopy(cached)
+        copied["vector_clock"].append({})
+        self.assertEqual(len(cached["vector_clock"]), 1)
+
+        # Frozen values are only copied when they are thawed
+        self.assertIs(freeze(cached), cached)
+        self.assertIs(thaw(value), value)
+        thawed = thaw(cached)
+        self.assertEqual(type(thawed), dict)
+        self.assertEqual(type(thawed["vector_clock"]), list)
+        self.assertEqual(type(thawed["vector_clock"][0]), dict)
+
+        # The least recently used document is discarded
+        cache.save(collection_name="collection", document_id="2", value={})
+        cache.get(collection_name="collection", document_id="1")
+        cache.save(collection_name="collection", document_id="3", value={})
+        self.assertIsNone(cache.get(collection_name="collection", document_id="2"))
+        self.assertIsNotNone(cache.get(collection_name="collection", document_id="1"))
+        self.assertEqual(usage.num_cache_hits, 3)
+        self.assertEqual(usage.num_cache_misses, 1)
+
+        with unittest.mock.patch("maestro.backends.firestore.store.time") as mock_time:
+            mock_time.monotonic.return_value = 0
+            cache = FirestoreCache(ttl_seconds=10)
+            cache.save(collection_name="collection", document_id="1", value={})
+            mock_time.monotonic.return_value = 10
+            self.assertIsNone(cache.get(collection_name="collection", document_id="1"))
+
+    def test_select_changes_reads(self):
+        """Makes sure that select_changes only reads the changes that are selected."""
+
+        for idx in range(20):
+            item_id = "e104b1c0-9a15-4ac1-b5fb-b273b91250%02d" % (idx)
+            self.data_store.commit_item_change(
+                operation=Operation.INSERT,
+                entity_name="my_app_item",
+                item_id=item_id,
+                item=self.data_store._create_item(
+                    id=item_id, name="item_%d" % (idx), version="1",
+                ),
+            )
+
+        item_changes = self.data_store.get_item_changes()
+        vector_clock = VectorClock.create_empty(provider_ids=["provider_in_test"])
+
+        self.data_store._usage.reset()
+        item_change_batch = self.data_store.select_changes(
+            vector_clock=vector_clock, max_num=5
+        )
+
+        # The provider ids and the selected changes
+        self.assertEqual(self.data_store._usage.num_reads, 6)
+        self.assertEqual(item_change_batch.item_changes, item_changes[:5])
+
+    def test_select_changes_interleaved_providers(self):
+        """Makes sure that the changes of several providers are selected in timestamp order
+        for each provider, even if their clocks disagree, and returned by creation date."""
+
+        start = dt.datetime(2021, 6, 26, 7, 0, tzinfo=dt.timezone.utc)
+        item_changes = []
+        for idx in range(6):
+            # The clock of other_provider is one hour behind
+            provider_id = "provider_in_test" if idx % 2 == 0 else "other_provider"
+            date_created = start + dt.timedelta(minutes=idx)
+            timestamp = date_created - dt.timedelta(
+                hours=0 if provider_id == "provider_in_test" else 1
+            )
+            item_id = "e104b1c0-9a15-4ac1-b5fb-b273b91250%02d" % (idx)
+            vector_clock_item = VectorClockItem(
+                provider_id=provider_id, timestamp=timestamp
+            )
+            item_change = ItemChange(
+                id=uuid.uuid4(),
+                date_created=date_created,
+                operation=Operation.INSERT,
+                serialization_result=SerializationResult(
+                    item_id=item_id,
+                    entity_name="my_app_item",
+                    serialized_item=self._serialize_item(
+                        id=item_id, name="item_%d" % (idx), version="1"
+                    ),
+                ),
+                change_vector_clock_item=vector_clock_item,
+                insert_vector_clock_item=vector_clock_item,
+                should_ignore=False,
+                is_applied=True,
+                vector_clock=VectorClock(vector_clock_item),
+            )
+            self.data_store.save_item_change(item_change=item_change, is_creating=True)
+            item_changes.append(item_change)
+
+        vector_clock = VectorClock.create_empty(
+            provider_ids=["provider_in_test", "other_provider"]
+        )
+        selected = []
+        while True:
+            item_change_batch = self.data_store.select_changes(
+                vector_clock=vector_clock, max_num=2
+            )
+            if item_change_batch.is_last_batch:
+                break
+
+            batch_dates = [
+                item_change.date_created for item_change in item_change_batch.item_changes
+            ]
+            self.assertEqual(batch_dates, sorted(batch_dates))
+            for item_change in item_change_batch.item_changes:
+                vector_clock.update(vector_clock_item=item_change.change_vector_clock_item)
+                selected.append(item_change)
+
+        # Every change is selected once, the ones with the oldest timestamps first
+        self.assertEqual(
+            [item_change.id for item_change in selected],
+            [item_changes[idx].id for idx in [1, 3, 0, 5, 2, 4]],
+        )
+
+    def _apply_remote_changes(self, num_changes: "int", in_sync_session: "bool") -> "int":
+        """Applies changes received from another provider and returns the number of reads."""
+
+        item_changes = []
+        for idx in range(num_changes):
+            item_id = str(uuid.uuid4())
+            now_utc = get_now_utc()
+            vector_clock_item = VectorClockItem(
+                provider_id="other_provider", timestamp=now_utc
+            )
+            item_changes.append(
+                ItemChange(
+                    id=uuid.uuid4(),
+                    date_created=now_utc,
+                    operation=Operation.INSERT,
+                    serialization_result=SerializationResult(
+                        item_id=item_id,
+                        entity_name="my_app_item",
+                        serialized_item=self._serialize_item(
+                            id=item_id, name="item_%d" % (idx), version="1"
+                        ),
+                    ),
+                    change_vector_clock_item=vector_clock_item,
+                    insert_vector_clock_item=vector_clock_item,
+                    should_ignore=False,
+                    is_applied=False,
+                    vector_clock=VectorClock(vector_clock_item),
+                )
+            )
+
+        events_manager = EventsManager(data_store=self.data_store)
+        changes_executor = ChangesExecutor(
+            data_store=self.data_store,
+            events_manager=events_manager,
+            conflict_resolver=ConflictResolver(),
+        )
+        if in_sync_session:
+            events_manager.on_start_sync_session(
+                source_provider_id="other_provider",
+                target_provider_id="provider_in_test",
+                query=None,
+            )
+
+        self.data_store._usage.reset()
+        changes_executor.run(item_changes=item_changes, query=None)
+        num_reads = self.data_store._usage.num_reads
+
+        if in_sync_session:
+            events_manager.on_end_sync_session()
+        return num_reads
+
+    def test_session_cache_reads(self):
+        """Tests that the documents cached during a sync session reduce the reads performed
+        when applying changes."""
+
+        num_reads = self._apply_remote_changes(num_changes=100, in_sync_session=False)
+        num_session_reads = self._apply_remote_changes(
+            num_changes=100, in_sync_session=True
+        )
+        self.assertLess(num_session_reads, num_reads)
+        self.assertIsNone(self.data_store._session_cache)
+        self.assertEqual(len(self.data_store.get_item_versions()), 200)
+
+    def test_session_cache_local_write(self):
+        """Makes sure that an item changed by another process after the session started is
+        checked for conflicts with its current version, not the cached one."""
+
+        self.data_store.start_session_cache()
+        item_id = "e104b1c0-9a15-4ac1-b5fb-b273b9125000"
+        insert_change = self.data_store.commit_item_change(
+            operation=Operation.INSERT,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=self.data_store._create_item(id=item_id, name="item_1", version="1"),
+        )
+        # Caches the item's version
+        self.data_store.get_item_version(item_id=item_id)
+
+        # The remote change happened before the local one below, so it loses the conflict
+        now_utc = get_now_utc()
+
+        # The application updates the item in another process
+        other_data_store = self._create_data_store(local_provider_id="provider_in_test")
+        local_change = other_data_store.commit_item_change(
+            operation=Operation.UPDATE,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=other_data_store._create_item(id=item_id, name="item_1", version="2"),
+        )
+
+        # A remote change that only knows about the insert
+        vector_clock_item = VectorClockItem(provider_id="other_provider", timestamp=now_utc)
+        remote_change = ItemChange(
+            id=uuid.uuid4(),
+            date_created=now_utc,
+            operation=Operation.UPDATE,
+            serialization_result=SerializationResult(
+                item_id=item_id,
+                entity_name="my_app_item",
+                serialized_item=self._serialize_item(
+                    id=item_id, name="item_1", version="3"
+                ),
+            ),
+            change_vector_clock_item=vector_clock_item,
+            insert_vector_clock_item=insert_change.insert_vector_clock_item,
+            should_ignore=False,
+            is_applied=False,
+            vector_clock=VectorClock(
+                vector_clock_item, insert_change.change_vector_clock_item
+            ),
+        )
+        events_manager = EventsManager(data_store=self.data_store)
+        changes_executor = ChangesExecutor(
+            data_store=self.data_store,
+            events_manager=events_manager,
+            conflict_resolver=ConflictResolver(),
+        )
+        changes_executor.run(item_changes=[remote_change], query=None)
+        self.data_store.end_session_cache()
+
+        conflict_logs = self.data_store.get_conflict_logs()
+        self.assertEqual(len(conflict_logs), 1)
+        self.assertEqual(conflict_logs[0].item_change_loser.id, remote_change.id)
+        self.assertEqual(
+            self.data_store.get_item_version(item_id=item_id).current_item_change.id,
+            local_change.id,
+        )
+
+    def test_session_cache_collections(self):
+        """Makes sure that only the metadata documents are cached during a sync session."""
+
+        self.data_store.start_session_cache()
+        item_id = "e104b1c0-9a15-4ac1-b5fb-b273b9125000"
+        self.data_store.commit_item_change(
+            operation=Operation.INSERT,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=self.data_store._create_item(id=item_id, name="item_1", version="1"),
+        )
+
+        session_cache = self.data_store._session_cache
+        self.assertIsNotNone(
+            session_cache.get(
+                collection_name=type_to_collection(key=CollectionType.ITEM_VERSIONS),
+                document_id=item_id,
+            )
+        )
+        self.assertIsNone(
+            session_cache.get(
+                collection_name=entity_name_to_collection("my_app_item"),
+                document_id=item_id,
+            )
+        )
+        self.data_store.end_session_cache()
+
+    def test_batch_writes(self):
+        """Tests that the writes performed in a batch_writes block are committed together."""
+
+        item_ids = [
+            "e104b1c0-9a15-4ac1-b5fb-b273b91250%02d" % (idx) for idx in range(3)
+        ]
+        self.data_store._usage.reset()
+        with self.data_store.batch_writes():
+            for item_id in item_ids:
+                self.data_store.save_item(
+                    item=self.data_store._create_item(
+                        id=item_id, name="item", version="1"
+                    )
+                )
+            self.assertEqual(len(self.data_store.db.collection("my_app_item").get()), 0)
+
+        self.assertEqual(len(self.data_store.db.collection("my_app_item").get()), 3)
+        self.assertEqual(self.data_store._usage.num_writes, 3)
+        self.assertEqual(self.data_store._usage.num_commits, 1)
+
+        # Pending writes are committed before the collection is queried
+        with self.data_store.batch_writes():
+            item_change = self.data_store.commit_item_change(
+                operation=Operation.UPDATE,
+                entity_name="my_app_item",
+                item_id=item_ids[0],
+                item=self.data_store._create_item(
+                    id=item_ids[0], name="item_updated", version="2"
+                ),
+            )
+            self.assertEqual(self.data_store.get_item_changes(), [item_change])
+
+
+class FirestoreQueriesTest(
+    tests.firestore.base.FirestoreBackendTestMixin,
+    tests.base_store.BaseQueriesTest,
+    tests.firestore.base.FirestoreTestCase,
+):
+    def test_filter_conversion(self):
+        """Tests the conversion of filter metadata to Firestore where clauses"""
+
+        comparison1 = Comparison(
+            field_name="name", comparator=Comparator.EQUALS, value="item_1"
+        )
+        comparison2 = Comparison(
+            field_name="version", comparator=Comparator.GREATER_THAN, value="1"
+        )
+        comparison3 = Comparison(
+            field_name="version", comparator=Comparator.LESS_THAN, value="5"
+        )
+        comparison4 = Comparison(
+            field_name="name", comparator=Comparator.IN, value=["item_1", "item_2"]
+        )
+        comparison5 = Comparison(
+            field_name="other", comparator=Comparator.LESS_THAN, value=3
+        )
+
+        # 1 - Everything can be pushed down
+        filter1 = (
+            Filter(children=[comparison1])
+            & Filter(children=[comparison2])
+            & Filter(children=[comparison3])
+            & Filter(children=[comparison4])
+        )
+        result1 = convert_to_firestore_filter(
+            filter=filter1, field_prefix="serialized_item."
+        )
+        self.assertEqual(
+            result1.where_clauses,
+            [
+                ("serialized_item.name", "==", "item_1"),
+                ("serialized_item.version", ">", "1"),
+                ("serialized_item.version", "<", "5"),
+                ("serialized_item.name", "in", ["item_1", "item_2"]),
+            ],
+        )
+        self.assertIsNone(result1.residual_filter)
+
+        # 2 - Inequalities in a second field are evaluated in memory
+        filter2 = Filter(children=[comparison2]) & Filter(children=[comparison5])
+        result2 = convert_to_firestore_filter(
+            filter=filter2, field_prefix="serialized_item."
+        )
+        self.assertEqual(
+            result2.where_clauses, [("serialized_item.version", ">", "1")]
+        )
+        self.assertEqual(result2.residual_filter, Filter(children=[comparison5]))
+
+        # 3 - OR filters are evaluated in memory
+        filter3 = Filter(children=[comparison1]) | Filter(children=[comparison5])
+        result3 = convert_to_firestore_filter(
+            filter=filter3, field_prefix="serialized_item."
+        )
+        self.assertEqual(result3.where_clauses, [])
+        self.assertEqual(result3.residual_filter, filter3)
+
+        # 4 - "in" with more values than Firestore allows is evaluated in memory
+        comparison6 = Comparison(
+            field_name="name",
+            comparator=Comparator.IN,
+            value=["item_%d" % (idx) for idx in range(11)],
+        )
+        filter4 = Filter(children=[comparison1]) & Filter(children=[comparison6])
+        result4 = convert_to_firestore_filter(
+            filter=filter4, field_prefix="serialized_item."
+        )
+        self.assertEqual(result4.where_clauses, [("serialized_item.name", "==", "item_1")])
+        self.assertEqual(result4.residual_filter, Filter(children=[comparison6]))
+
+    def test_query_items_updated_item(self):
+        """Makes sure that items updated out of a query aren't returned with stale data."""
+
+        item_id = "e104b1c0-9a15-4ac1-b5fb-b273b91250d1"
+        self.data_store.commit_item_change(
+            operation=Operation.INSERT,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=self.data_store._create_item(id=item_id, name="item_1", version="1"),
+        )
+        vector_clock = self.data_store.get_local_vector_clock()
+        self.data_store.commit_item_change(
+            operation=Operation.UPDATE,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=self.data_store._create_item(id=item_id, name="item_2", version="2"),
+        )
+
+        query = Query(
+            entity_name="my_app_item",
+            filter=Filter(
+                children=[
+                    Comparison(
+                        field_name="name", comparator=Comparator.EQUALS, value="item_1"
+                    )
+                ]
+            ),
+            ordering=[],
+            limit=None,
+            offset=None,
+        )
+        items = self.data_store.query_items(query=query, vector_clock=None)
+        self.assertEqual(items, [])
+
+        items = self.data_store.query_items(query=query, vector_clock=vector_clock)
+        self.assertEqual(
+            [(item["name"], item["version"]) for item in items], [("item_1", "1")]
+        )
+
+    def test_query_items_many_candidates(self):
+        """Makes sure that the last changes of more items than fit in an "in" clause are
+        loaded."""
+
+        item_ids = []
+        for idx in range(25):
+            item_id = "e104b1c0-9a15-4ac1-b5fb-b273b91250%02d" % (idx)
+            self.data_store.commit_item_change(
+                operation=Operation.INSERT,
+                entity_name="my_app_item",
+                item_id=item_id,
+                item=self.data_store._create_item(id=item_id, name="item", version="1"),
+            )
+            item_ids.append(item_id)
+        vector_clock = self.data_store.get_local_vector_clock()
+
+        # Some of the candidates are updated out of the query afterwards
+        for item_id in item_ids[::3]:
+            self.data_store.commit_item_change(
+                operation=Operation.UPDATE,
+                entity_name="my_app_item",
+                item_id=item_id,
+                item=self.data_store._create_item(id=item_id, name="other", version="2"),
+            )
+
+        query = Query(
+            entity_name="my_app_item",
+            filter=Filter(
+                children=[
+                    Comparison(field_name="name", comparator=Comparator.EQUALS, value="item")
+                ]
+            ),
+            ordering=[],
+            limit=None,
+            offset=None,
+        )
+        items = self.data_store.query_items(query=query, vector_clock=None)
+        self.assertEqual(
+            [item["id"] for item in items],
+            [item_id for idx, item_id in enumerate(item_ids) if idx % 3 != 0],
+        )
+
+        items = self.data_store.query_items(query=query, vector_clock=vector_clock)
+        self.assertEqual([item["id"] for item in items], item_ids)
+        self.assertEqual({item["version"] for item in items}, {"1"})
+
+    def test_select_changes_query_reads(self):
+        """Makes sure that a query-scoped select_changes reads fewer documents than a full one."""
+
+        for idx in range(20):
+            item_id = "e104b1c0-9a15-4ac1-b5fb-b273b91250%02d" % (idx)
+            self.data_store.commit_item_change(
+                operation=Operation.INSERT,
+                entity_name="my_app_item",
+                item_id=item_id,
+                item=self.data_store._create_item(
+                    id=item_id, name="item_%d" % (idx % 10), version="1",
+                ),
+            )
+
+        query = Query(
+            entity_name="my_app_item",
+            filter=Filter(
+                children=[
+                    Comparison(
+                        field_name="name", comparator=Comparator.EQUALS, value="item_1"
+                    )
+                ]
+            ),
+            ordering=[],
+            limit=None,
+            offset=None,
+        )
+        vector_clock = self.data_store.get_local_vector_clock(query=query)
+
+        self.data_store._usage.reset()
+        full_batch = self.data_store.select_changes(
+            vector_clock=vector_clock, max_num=50
+        )
+        full_reads = self.data_store._usage.num_reads
+
+        self.data_store._usage.reset()
+        query_batch = self.data_store.select_changes(
+            vector_clock=vector_clock, max_num=50, query=query
+        )
+        query_reads = self.data_store._usage.num_reads
+
+        self.assertEqual(len(full_batch.item_changes), 20)
+        self.assertEqual(len(query_batch.item_changes), 2)
+        self.assertLess(query_reads, full_reads)
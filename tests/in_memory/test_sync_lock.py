@@ -0,0 +1,9 @@
+import tests.base_sync_lock
+import tests.in_memory.base
+
+
+class InMemorySyncLockTest(
+    tests.in_memory.base.InMemoryBackendTestMixin,
+    tests.base_sync_lock.BaseSyncLockTest,
+):
+    pass
@@ -118,6 +118,11 @@ class TestMongoDataStore(MongoDataStore):
             },
             upsert=True,
         )
+        self._update_validity_ranges(
+            item_change_record=self.item_change_metadata_converter.to_record(
+                metadata_object=item_change
+            )
+        )
 
         self.db["maestro__provider_ids"].update_one(
             filter={"_id": item_change.change_vector_clock_item.provider_id},
@@ -213,6 +218,7 @@ class TestMongoDataStore(MongoDataStore):
 class MongoBackendTestMixin(tests.base.BackendTestMixin):
     db: "Database"
     client: "MongoClient"
+    use_current_items_collection = False
 
     def _create_sync_lock(self) -> "BaseSyncLock":
         return InMemorySyncLock()
@@ -263,6 +269,7 @@ class MongoBackendTestMixin(tests.base.BackendTestMixin):
                 vector_clock_metadata_converter=vector_clock_metadata_converter,
                 item_serializer=self.item_serializer,
                 tracked_query_metadata_converter=tracked_query_metadata_converter,
+                use_current_items_collection=self.use_current_items_collection,
                 db=self.db,
                 client=self.client,
             )
@@ -0,0 +1,97 @@
+from maestro.backends.mongo.buffer import WriteBuffer
+from pymongo import UpdateOne, ReplaceOne, DeleteOne
+import unittest
+
+
+class WriteBufferTest(unittest.TestCase):
+    def test_merge_writes(self):
+        write_buffer = WriteBuffer()
+        write_buffer.save(collection="items", pk="1", fields={"name": "a", "version": 1})
+        write_buffer.save(collection="items", pk="1", fields={"version": 2})
+        write_buffer.save(collection="items", pk="2", fields={"name": "b"})
+        write_buffer.delete(collection="items", pk="2")
+        write_buffer.delete(collection="items", pk="3")
+        write_buffer.save(collection="items", pk="3", fields={"name": "c"})
+        write_buffer.save(collection="versions", pk="1", fields={"version": 2})
+
+        self.assertEqual(write_buffer.get_collections(), ["items", "versions"])
+        self.assertFalse(write_buffer.overwrites(collection="items", pk="1"))
+        self.assertTrue(write_buffer.overwrites(collection="items", pk="2"))
+        self.assertFalse(write_buffer.has_write(collection="items", pk="4"))
+        self.assertEqual(
+            write_buffer.apply(
+                collection="items", pk="1", document={"_id": "1", "_lock": "x"}
+            ),
+            {"_id": "1", "_lock": "x", "name": "a", "version": 2},
+        )
+        self.assertIsNone(
+            write_buffer.apply(collection="items", pk="2", document={"_id": "2"})
+        )
+        self.assertEqual(
+            write_buffer.apply(collection="items", pk="3", document=None),
+            {"_id": "3", "name": "c"},
+        )
+
+        self.assertEqual(
+            write_buffer.pop_requests(collection="items"),
+            [
+                UpdateOne({"_id": "1"}, {"$set": {"name": "a", "version": 2}}, upsert=True),
+                DeleteOne({"_id": "2"}),
+                ReplaceOne({"_id": "3"}, {"name": "c"}, upsert=True),
+            ],
+        )
+        self.assertEqual(write_buffer.get_collections(), ["versions"])
+        self.assertEqual(write_buffer.pop_requests(collection="items"), [])
+
+    def test_nested_buffers(self):
+        parent = WriteBuffer()
+        parent.save(collection="items", pk="1", fields={"name": "a", "version": 1})
+        parent.delete(collection="items", pk="2")
+
+        child = WriteBuffer(parent=parent)
+        child.save(collection="items", pk="1", fields={"version": 2})
+        child.save(collection="items", pk="2", fields={"name": "b"})
+        child.save(collection="versions", pk="1", fields={"version": 2})
+
+        # The parent's writes are taken into account
+        self.assertEqual(child.get_collections(), ["items", "versions"])
+        self.assertTrue(child.has_write(collection="items", pk="2"))
+        self.assertEqual(
+            child.apply(collection="items", pk="1", document={"_id": "1"}),
+            {"_id": "1", "name": "a", "version": 2},
+        )
+        self.assertEqual(
+            child.apply(collection="items", pk="2", document={"_id": "2", "x": 1}),
+            {"_id": "2", "name": "b"},
+        )
+
+        # The child's writes are only added to the parent when merged
+        self.assertEqual(parent.get_collections(), ["items"])
+        self.assertEqual(
+            parent.apply(collection="items", pk="1", document={"_id": "1"}),
+            {"_id": "1", "name": "a", "version": 1},
+        )
+        child.merge_into_parent()
+        self.assertEqual(parent.get_collections(), ["items", "versions"])
+        self.assertEqual(
+            parent.pop_requests(collection="items"),
+            [
+                UpdateOne({"_id": "1"}, {"$set": {"name": "a", "version": 2}}, upsert=True),
+                ReplaceOne({"_id": "2"}, {"name": "b"}, upsert=True),
+            ],
+        )
+
+        # Popping the child's requests also pops the parent's
+        child = WriteBuffer(parent=parent)
+        self.assertEqual(
+            child.pop_requests(collection="versions"),
+            [UpdateOne({"_id": "1"}, {"$set": {"version": 2}}, upsert=True)],
+        )
+        self.assertFalse(child.was_flushed)
+        self.assertEqual(parent.get_collections(), [])
+
+        child.delete(collection="items", pk="3")
+        self.assertEqual(
+            child.pop_requests(collection="items"), [DeleteOne({"_id": "3"})]
+        )
+        self.assertTrue(child.was_flushed)
@@ -39,7 +39,10 @@ class MongoFullSyncTest(
             290,  # provider2_page3_tick
         ]  # [clock_start, deferred_tick, other_provider_page1_tick, other_provider_page2_tick, clock_start, deferred_tick, provider2_page1_tick, provider2_page2_tick]
 
-        with unittest.mock.patch("time.time", side_effect=timers):
+        with unittest.mock.patch(
+            "maestro.core.utils.time",
+            **{"time.side_effect": timers, "monotonic.return_value": 0},
+        ):
             self.orchestrator.run(initial_source_provider_id="other_provider")
 
         # Resultado esperado:
@@ -1,6 +1,17 @@
-from maestro.core.query.metadata import Filter, Comparison, Comparator, SortOrder
+from maestro.core.query.metadata import (
+    Query,
+    Filter,
+    Comparison,
+    Comparator,
+    SortOrder,
+)
+from maestro.core.metadata import Operation, SerializationResult
+from maestro.backends.mongo.store import DiscardedWritesError
 from maestro.backends.mongo.utils import convert_to_mongo_filter, convert_to_mongo_sort
 import pymongo
+import pymongo.collection
+import pymongo.errors
+import unittest.mock
 import tests.base_store
 import tests.mongo.base
 import datetime as dt
@@ -11,7 +22,152 @@ class MongoStoreTest(
     tests.base_store.BaseStoreTest,
     tests.mongo.base.MongoTestCase,
 ):
-    pass
+    def test_buffer_writes(self):
+        """Tests sending the writes performed inside a block with bulk_write."""
+
+        item1 = self.data_store._create_item(id="1", name="item_1", version="1")
+        item2 = self.data_store._create_item(id="2", name="item_2", version="1")
+        self.data_store._add_item(item=item2)
+
+        with unittest.mock.patch.object(
+            pymongo.collection.Collection,
+            "bulk_write",
+            autospec=True,
+            side_effect=pymongo.collection.Collection.bulk_write,
+        ) as mock_bulk_write:
+            with self.data_store.buffer_writes():
+                self.data_store.save_item(item=item1)
+                item1["version"] = "2"
+                self.data_store.save_item(item=item1)
+                self.data_store.delete_item(item=item2)
+
+                # Pending writes are visible when documents are read by id
+                self.assertEqual(
+                    self.data_store._find_document(collection_name="my_app_item", pk="1"),
+                    {"_id": "1", "name": "item_1", "version": "2"},
+                )
+                self.assertIsNone(
+                    self.data_store._find_document(collection_name="my_app_item", pk="2")
+                )
+                self.assertIsNone(self.db["my_app_item"].find_one({"_id": "1"}))
+
+            self.assertEqual(mock_bulk_write.call_count, 1)
+
+        self.assertEqual(self.data_store.get_items(), [item1])
+
+    def test_run_batch_in_transaction(self):
+        """Tests processing a batch of changes in a single transaction."""
+
+        item1 = self.data_store._create_item(id="1", name="item_1", version="1")
+        item2 = self.data_store._create_item(id="2", name="item_2", version="1")
+        item_changes = [
+            unittest.mock.Mock(
+                serialization_result=SerializationResult(
+                    item_id=item["id"], entity_name="my_app_item", serialized_item=""
+                )
+            )
+            for item in [item1, item2]
+        ]
+
+        sessions = []
+
+        def save_item(item):
+            sessions.append(self.data_store.session)
+            self.data_store.save_item(item=item)
+
+        def process_batch():
+            for item_change, item in zip(item_changes, [item1, item2]):
+                self.data_store.run_in_transaction(
+                    item_change=item_change, callback=lambda: save_item(item)
+                )
+
+        self.data_store.run_batch_in_transaction(
+            item_changes=item_changes, callback=process_batch
+        )
+        self.assertEqual(len(sessions), 2)
+        self.assertIsNotNone(sessions[0])
+        self.assertIs(sessions[0], sessions[1])
+        self.assertIsNone(self.data_store.session)
+        self.assertEqual(self.data_store.get_items(), [item1, item2])
+
+        # A database error in any of the changes makes the whole batch fail
+        def fail():
+            raise pymongo.errors.OperationFailure("failed")
+
+        def process_failed_batch():
+            self.data_store.run_in_transaction(
+                item_change=item_changes[0],
+                callback=lambda: self.data_store.delete_item(item=item1),
+            )
+            try:
+                self.data_store.run_in_transaction(
+                    item_change=item_changes[1], callback=fail
+                )
+            except pymongo.errors.OperationFailure:
+                pass
+
+        with self.assertRaises(pymongo.errors.OperationFailure):
+            self.data_store.run_batch_in_transaction(
+                item_changes=item_changes, callback=process_failed_batch
+            )
+        self.assertEqual(self.data_store.get_items(), [item1, item2])
+
+        # Writes are discarded if an exception is raised
+        with self.assertRaises(ValueError):
+            with self.data_store.buffer_writes():
+                self.data_store.delete_item(item=item1)
+                raise ValueError()
+
+        self.assertEqual(self.data_store.get_items(), [item1])
+
+    def test_run_batch_in_transaction_failed_change(self):
+        """Tests that the writes of a change that fails inside a batch are discarded."""
+
+        item1 = self.data_store._create_item(id="1", name="item_1", version="1")
+        item2 = self.data_store._create_item(id="2", name="item_2", version="1")
+        item_changes = [
+            unittest.mock.Mock(
+                serialization_result=SerializationResult(
+                    item_id=item["id"], entity_name="my_app_item", serialized_item=""
+                )
+            )
+            for item in [item1, item2]
+        ]
+
+        def fail(item, read_items):
+            self.data_store.save_item(item=item)
+            if read_items:
+                # Reading the collection sends the pending writes
+                self.data_store.get_items()
+            raise ValueError()
+
+        def process_batch(read_items):
+            self.data_store.run_in_transaction(
+                item_change=item_changes[0],
+                callback=lambda: self.data_store.save_item(item=item1),
+            )
+            try:
+                self.data_store.run_in_transaction(
+                    item_change=item_changes[1],
+                    callback=lambda: fail(item=item2, read_items=read_items),
+                )
+            except ValueError:
+                pass
+
+        # The batch is committed without the failed change
+        self.data_store.run_batch_in_transaction(
+            item_changes=item_changes, callback=lambda: process_batch(read_items=False)
+        )
+        self.assertEqual(self.data_store.get_items(), [item1])
+
+        # The batch fails if the failed change's writes were already sent
+        self.data_store.delete_item(item=item1)
+        with self.assertRaises(DiscardedWritesError):
+            self.data_store.run_batch_in_transaction(
+                item_changes=item_changes,
+                callback=lambda: process_batch(read_items=True),
+            )
+        self.assertEqual(self.data_store.get_items(), [])
 
 
 class MongoQueriesTest(
@@ -188,6 +344,61 @@ class MongoQueriesTest(
         with self.assertRaises(ValueError):
             convert_to_mongo_filter(filter=filter10, field_prefix="serialized_item.")
 
+    def test_validity_ranges(self):
+        """Tests that each change stores the timestamps at which it was superseded"""
+
+        item_id = "d7a8bb4f-8ce4-4a08-9cb6-c6ec7ce4cdcb"
+        item_change1 = self.data_store.commit_item_change(
+            operation=Operation.INSERT,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=self.data_store._create_item(id=item_id, name="item", version="1"),
+        )
+        vector_clock = self.data_store.get_local_vector_clock()
+        item_change2 = self.data_store.commit_item_change(
+            operation=Operation.UPDATE,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=self.data_store._create_item(id=item_id, name="item", version="2"),
+        )
+
+        item_changes = self.db["maestro__item_changes"]
+        doc1 = item_changes.find_one({"_id": str(item_change1.id)})
+        doc2 = item_changes.find_one({"_id": str(item_change2.id)})
+        self.assertEqual(
+            doc1["superseded_at"], [doc2["change_vector_clock_item"]],
+        )
+        self.assertEqual(doc2["superseded_at"], [])
+
+        query = Query(
+            entity_name="my_app_item",
+            filter=Filter(
+                children=[
+                    Comparison(
+                        field_name="name", comparator=Comparator.EQUALS, value="item"
+                    )
+                ]
+            ),
+            ordering=[],
+            limit=None,
+            offset=None,
+        )
+        items = self.data_store.query_items(query=query, vector_clock=vector_clock)
+        self.assertEqual([item["version"] for item in items], ["1"])
+        items = self.data_store.query_items(query=query, vector_clock=None)
+        self.assertEqual([item["version"] for item in items], ["2"])
+
+        # Rebuilding results in the same ranges
+        item_changes.update_many({}, {"$unset": {"superseded_at": ""}})
+        self.data_store.rebuild_validity_ranges()
+        self.assertEqual(
+            item_changes.find_one({"_id": str(item_change1.id)})["superseded_at"],
+            doc1["superseded_at"],
+        )
+        self.assertEqual(
+            item_changes.find_one({"_id": str(item_change2.id)})["superseded_at"], [],
+        )
+
     def test_sort_conversion(self):
         """Tests the conversion of sort metadata to mongo sorts"""
 
@@ -200,3 +411,80 @@ class MongoQueriesTest(
         self.assertEqual(
             mongo_ordering, {"field1": pymongo.ASCENDING, "field2": pymongo.DESCENDING}
         )
+
+
+class MongoCurrentItemsTest(
+    tests.mongo.base.MongoBackendTestMixin, tests.mongo.base.MongoTestCase,
+):
+    use_current_items_collection = True
+
+    def setUp(self):
+        self.data_store = self._create_data_store(
+            local_provider_id="provider_in_test",
+        )
+
+    def test_query_current_items(self):
+        """Tests that queries without a vector clock read from the current items collection"""
+
+        item_ids = [
+            "d7a8bb4f-8ce4-4a08-9cb6-c6ec7ce4cdcb",
+            "3e4d87c4-4f1c-4d1b-9ef1-5c0a2b8e7c1a",
+            "f1b8a0a2-7c4e-4b8e-8f5e-6b8c2a9d0e3f",
+        ]
+        for item_id in item_ids:
+            self.data_store.commit_item_change(
+                operation=Operation.INSERT,
+                entity_name="my_app_item",
+                item_id=item_id,
+                item=self.data_store._create_item(
+                    id=item_id, name="item", version="1"
+                ),
+            )
+        vector_clock = self.data_store.get_local_vector_clock()
+
+        self.data_store.commit_item_change(
+            operation=Operation.UPDATE,
+            entity_name="my_app_item",
+            item_id=item_ids[1],
+            item=self.data_store._create_item(id=item_ids[1], name="item", version="2"),
+        )
+
+        current_items = self.db["maestro__current_items__my_app_item"]
+        self.assertEqual(current_items.count_documents({}), 3)
+
+        query = Query(
+            entity_name="my_app_item",
+            filter=Filter(
+                children=[
+                    Comparison(
+                        field_name="version", comparator=Comparator.EQUALS, value="1"
+                    )
+                ]
+            ),
+            ordering=[],
+            limit=None,
+            offset=None,
+        )
+        items = self.data_store.query_items(query=query, vector_clock=None)
+        self.assertEqual([item["id"] for item in items], [item_ids[0], item_ids[2]])
+
+        # Time travel still uses the history of changes
+        items = self.data_store.query_items(query=query, vector_clock=vector_clock)
+        self.assertEqual([item["id"] for item in items], item_ids)
+
+        paginated_query = Query(
+            entity_name="my_app_item",
+            filter=query.filter,
+            ordering=[SortOrder(field_name="version")],
+            limit=1,
+            offset=1,
+        )
+        items = self.data_store.query_items(query=paginated_query, vector_clock=None)
+        self.assertEqual([item["id"] for item in items], [item_ids[2]])
+
+        # Rebuilding from the item versions results in the same state
+        current_items.delete_many({})
+        self.data_store.rebuild_current_items(entity_name="my_app_item")
+        self.assertEqual(current_items.count_documents({}), 3)
+        doc = current_items.find_one({"_id": item_ids[1]})
+        self.assertEqual(doc["serialized_item"]["version"], "2")
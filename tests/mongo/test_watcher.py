@@ -0,0 +1,113 @@
+from maestro.backends.mongo.contrib import MongoChangesWatcher
+from maestro.core.metadata import Operation
+from maestro.core.query.metadata import Query, Filter, Comparison, Comparator
+import tests.mongo.base
+import threading
+import unittest.mock
+import time
+
+
+class MongoChangesWatcherTest(
+    tests.mongo.base.MongoBackendTestMixin, tests.mongo.base.MongoTestCase,
+):
+    def setUp(self):
+        self.data_store = self._create_data_store(local_provider_id="provider_in_test")
+        self.orchestrator = unittest.mock.Mock()
+        self.orchestrator.run.return_value = True
+
+    def _commit_item_change(self, item_id: "str", name: "str", operation: "Operation"):
+        item_change = self.data_store.commit_item_change(
+            operation=operation,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=self.data_store._create_item(id=item_id, name=name, version="1"),
+        )
+        return self.db["maestro__item_changes"].find_one({"_id": str(item_change.id)})
+
+    def test_add_change(self):
+        """Tests that only the queries affected by a change are synchronized."""
+
+        query = Query(
+            entity_name="my_app_item",
+            filter=Filter(
+                children=[
+                    Comparison(
+                        field_name="name", comparator=Comparator.EQUALS, value="item_1"
+                    )
+                ]
+            ),
+            ordering=[],
+            limit=None,
+            offset=None,
+        )
+        other_query = Query(
+            entity_name="other_item",
+            filter=Filter(children=[]),
+            ordering=[],
+            limit=None,
+            offset=None,
+        )
+        watcher = MongoChangesWatcher(
+            data_store=self.data_store,
+            orchestrator=self.orchestrator,
+            remote_provider_id="other_provider",
+            queries=[query, other_query],
+        )
+
+        watcher.add_change(
+            document=self._commit_item_change(
+                item_id="1", name="item_2", operation=Operation.INSERT
+            )
+        )
+        self.assertFalse(watcher.has_pending_changes())
+
+        watcher.add_change(
+            document=self._commit_item_change(
+                item_id="1", name="item_3", operation=Operation.UPDATE
+            )
+        )
+        self.assertTrue(watcher.has_pending_changes())
+
+        # Queries remain pending while another synchronization is running
+        self.orchestrator.run.return_value = False
+        self.assertFalse(watcher.synchronize())
+        self.assertTrue(watcher.has_pending_changes())
+
+        self.orchestrator.run.return_value = True
+        self.assertTrue(watcher.synchronize())
+        self.assertFalse(watcher.has_pending_changes())
+        self.orchestrator.run.assert_called_with(
+            initial_source_provider_id="provider_in_test", query=query
+        )
+
+    def test_run(self):
+        """Tests triggering a synchronization after changes are committed."""
+
+        watcher = MongoChangesWatcher(
+            data_store=self.data_store,
+            orchestrator=self.orchestrator,
+            remote_provider_id="other_provider",
+            debounce_seconds=0.5,
+        )
+        thread = threading.Thread(target=watcher.run)
+        thread.start()
+        try:
+            # Waits for the stream to be opened
+            time.sleep(0.5)
+            for idx in range(3):
+                self._commit_item_change(
+                    item_id=str(idx), name="item", operation=Operation.INSERT
+                )
+
+            started_at = time.monotonic()
+            while not self.orchestrator.run.called and time.monotonic() - started_at < 10:
+                time.sleep(0.05)
+        finally:
+            watcher.stop()
+            thread.join()
+
+        # The burst of changes is synchronized once
+        self.orchestrator.run.assert_called_once_with(
+            initial_source_provider_id="provider_in_test", query=None
+        )
+        self.assertIsNotNone(watcher.load_resume_token())
@@ -0,0 +1,86 @@
+from maestro.core.events import EventsManager
+from maestro.core.execution import ChangesExecutor, ConflictResolver
+from maestro.core.metadata import Operation
+import tests.in_memory.base
+import copy
+import unittest
+import unittest.mock
+
+
+class CollectEventsTest(
+    tests.in_memory.base.InMemoryBackendTestMixin, unittest.TestCase
+):
+    def setUp(self):
+        self.data_store = self._create_data_store(local_provider_id="provider_in_test")
+        self.events_manager = EventsManager(data_store=self.data_store)
+        self.events_manager.on_start_sync_session(
+            source_provider_id="other_provider",
+            target_provider_id="provider_in_test",
+            query=None,
+        )
+
+    def test_collect_events(self):
+        sync_session = self.events_manager.current_sync_session
+        item_change = unittest.mock.Mock()
+
+        # The events of an attempt that failed are discarded
+        with self.assertRaises(ValueError):
+            with self.events_manager.collect_events():
+                self.events_manager.increment_stat(key="changes_applied")
+                self.events_manager.on_item_change_processed(item_change=item_change)
+                raise ValueError()
+
+        with self.events_manager.collect_events() as events:
+            self.events_manager.increment_stat(key="changes_applied")
+            self.events_manager.on_item_change_processed(item_change=item_change)
+
+        self.assertEqual(sync_session.stats, {})
+        self.assertEqual(sync_session.item_changes, [])
+
+        self.events_manager.publish_events(events)
+        self.assertEqual(sync_session.stats, {"changes_applied": 1})
+        self.assertEqual(sync_session.item_changes, [item_change])
+
+        # Events are published right away outside collect_events
+        self.events_manager.increment_stat(key="changes_applied")
+        self.assertEqual(sync_session.stats, {"changes_applied": 2})
+
+    def test_collect_post_transaction_events(self):
+        other_data_store = self._create_data_store(local_provider_id="other_provider")
+        item_id = "e104b1c0-9a15-4ac1-b5fb-b273b91250d1"
+        item_change = other_data_store.commit_item_change(
+            operation=Operation.INSERT,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=other_data_store._create_item(id=item_id, name="item_1", version="1"),
+        )
+        item_change = copy.deepcopy(item_change)
+        item_change.reset_status()
+        changes_executor = ChangesExecutor(
+            data_store=self.data_store,
+            events_manager=self.events_manager,
+            conflict_resolver=ConflictResolver(),
+        )
+
+        with unittest.mock.patch.object(
+            self.events_manager,
+            "on_item_change_applied",
+            wraps=self.events_manager.on_item_change_applied,
+        ) as on_item_change_applied:
+            with self.events_manager.collect_events() as events:
+                changes_executor.process_remote_change(
+                    item_change=item_change, query=None
+                )
+
+            # The change was applied, but its events weren't published yet
+            self.assertEqual(len(self.data_store.get_items()), 1)
+            on_item_change_applied.assert_not_called()
+            self.assertEqual(self.events_manager.current_sync_session.stats, {})
+
+            self.events_manager.publish_events(events)
+            on_item_change_applied.assert_called_once()
+
+        sync_session = self.events_manager.current_sync_session
+        self.assertEqual(len(sync_session.item_changes), 1)
+        self.assertEqual(sync_session.stats["changes_applied"], 1)
+        self.assertIn("events_seconds", sync_session.stats)
@@ -0,0 +1,145 @@
+from maestro.core.metrics import (
+    BaseMetricsSink,
+    instrument_data_store,
+    LATENCY_BUCKETS_MS,
+)
+from maestro.core.events import EventsManager
+from maestro.core.exceptions import ItemNotFoundException
+from maestro.core.execution import ChangesExecutor, ConflictResolver
+from maestro.core.metadata import Operation, VectorClock
+from maestro.core.orchestrator import SyncOrchestrator
+import tests.in_memory.base
+import uuid
+import unittest
+import unittest.mock
+
+
+class ListMetricsSink(BaseMetricsSink):
+    def __init__(self):
+        self.calls = []
+        self.errors = []
+
+    def record_call(
+        self, method_name, duration_seconds, num_rows, num_bytes, is_error
+    ):
+        self.calls.append((method_name, num_rows, num_bytes))
+        if is_error:
+            self.errors.append(method_name)
+
+
+class InstrumentDataStoreTest(
+    tests.in_memory.base.InMemoryBackendTestMixin, unittest.TestCase
+):
+    def test_instrument_data_store(self):
+        data_store = self._create_data_store(local_provider_id="provider_in_test")
+        sink = ListMetricsSink()
+        metrics = instrument_data_store(data_store=data_store, sinks=[sink])
+
+        item_id = "e104b1c0-9a15-4ac1-b5fb-b273b91250d1"
+        item_change = data_store.commit_item_change(
+            operation=Operation.INSERT,
+            entity_name="my_app_item",
+            item_id=item_id,
+            item=data_store._create_item(id=item_id, name="item_1", version="1"),
+        )
+        payload_size = len(item_change.serialization_result.serialized_item.encode())
+
+        sink.calls.clear()
+        item_change_batch = data_store.select_changes(
+            vector_clock=VectorClock.create_empty(provider_ids=["provider_in_test"]),
+            max_num=10,
+        )
+        self.assertEqual(item_change_batch.item_changes, [item_change])
+        self.assertEqual(sink.calls[-1], ("select_changes", 1, payload_size))
+
+        # Calls made by the data store to its own methods are part of the outer call
+        sink.calls.clear()
+        data_store.get_local_version(item_id=item_id)
+        self.assertEqual(sink.calls, [("get_local_version", 1, payload_size)])
+
+        sink.calls.clear()
+        data_store.run_in_transaction(item_change=item_change, callback=lambda: None)
+        self.assertEqual(sink.calls, [("run_in_transaction", 0, payload_size)])
+
+        # The calls made by the callback passed to the data store are measured
+        sink.calls.clear()
+        data_store.run_in_transaction(
+            item_change=item_change,
+            callback=lambda: data_store.get_item_version(item_id=item_id),
+        )
+        self.assertEqual(
+            [call[0] for call in sink.calls],
+            ["get_item_version", "run_in_transaction"],
+        )
+
+        # Calls that raise are recorded as errors
+        with self.assertRaises(ItemNotFoundException):
+            data_store.get_item_change_by_id(id=uuid.uuid4())
+        self.assertEqual(sink.errors, ["get_item_change_by_id"])
+        self.assertEqual(data_store.get_usage()["get_item_change_by_id.errors"], 1)
+
+        usage = data_store.get_usage()
+        self.assertEqual(usage["select_changes.calls"], 1)
+        self.assertEqual(usage["select_changes.rows"], 1)
+        self.assertEqual(usage["select_changes.bytes"], payload_size)
+        self.assertEqual(
+            usage["calls"],
+            sum(method_metrics.num_calls for method_metrics in metrics.methods.values()),
+        )
+
+        with unittest.mock.patch("maestro.core.metrics.time") as mock_time:
+            mock_time.perf_counter.side_effect = [0, 0.2]
+            data_store.get_sync_sessions()
+
+        latency_buckets = metrics.methods["get_sync_sessions"].latency_buckets
+        self.assertEqual(latency_buckets[LATENCY_BUCKETS_MS.index(500)], 1)
+        self.assertEqual(sum(latency_buckets), 1)
+
+    def test_instrument_sync(self):
+        """Makes sure that the calls made while applying changes are measured."""
+
+        providers = []
+        data_stores = []
+        for provider_id in ["other_provider", "provider_in_test"]:
+            data_store = self._create_data_store(local_provider_id=provider_id)
+            events_manager = EventsManager(data_store=data_store)
+            providers.append(
+                self._create_provider(
+                    provider_id=provider_id,
+                    data_store=data_store,
+                    events_manager=events_manager,
+                    changes_executor=ChangesExecutor(
+                        data_store=data_store,
+                        events_manager=events_manager,
+                        conflict_resolver=ConflictResolver(),
+                    ),
+                    max_num=5,
+                )
+            )
+            data_stores.append(data_store)
+
+        for idx in range(3):
+            item_id = "e104b1c0-9a15-4ac1-b5fb-b273b91250%02d" % (idx)
+            data_stores[0].commit_item_change(
+                operation=Operation.INSERT,
+                entity_name="my_app_item",
+                item_id=item_id,
+                item=data_stores[0]._create_item(id=item_id, name="item", version="1"),
+            )
+
+        metrics = instrument_data_store(data_store=data_stores[1])
+        orchestrator = SyncOrchestrator(
+            sync_lock=self._create_sync_lock(),
+            providers=providers,
+            maximum_duration_seconds=5 * 60,
+        )
+        orchestrator.synchronize_providers(
+            source_provider_id="other_provider", target_provider_id="provider_in_test"
+        )
+
+        usage = metrics.get_usage()
+        self.assertEqual(usage["run_in_transaction.calls"], 3)
+        self.assertEqual(usage["save_item_version.calls"], 3)
+        self.assertEqual(usage["execute_item_change.calls"], 3)
+        self.assertEqual(usage["get_local_version.calls"], 3)
+        self.assertEqual(usage["errors"], 0)
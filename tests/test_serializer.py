@@ -238,6 +238,8 @@ class MetadataSerializerTest(unittest.TestCase):
                 "source_provider_id": "other_provider",
                 "target_provider_id": "provider_in_test",
                 "query_id": None,
+                "usage": {},
+                "stats": {},
                 "item_changes": [
                     {
                         "id": "14717ffa-5f72-4d3d-91b4-2abf7ac0fdb7",
@@ -354,5 +356,5 @@ class MetadataSerializerTest(unittest.TestCase):
 
         self.assertEqual(
             result,
-            '{\n"conflict_logs": [\n{\n"id": "019124a5-56b4-4d05-bcde-27751cd9c7c1",\n"created_at": "2021-06-26T07:11:00+00:00",\n"resolved_at": null,\n"item_change_loser": {\n"id": "14717ffa-5f72-4d3d-91b4-2abf7ac0fdb7",\n"date_created": "2021-06-17T15:44:00+00:00",\n"operation": "Operation.INSERT",\n"change_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"insert_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"serialization_result": {\n"item_id": "69bdd54f-4048-43ca-8aa1-529cd790098e",\n"entity_name": "my_app_item",\n"serialized_item": ""\n},\n"should_ignore": false,\n"is_applied": false,\n"vector_clock": [\n{\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n{\n"provider_id": "provider2",\n"timestamp": "2021-06-15T15:40:00+00:00"\n},\n{\n"provider_id": "provider3",\n"timestamp": "2021-06-14T15:40:00+00:00"\n}\n]\n},\n"item_change_winner": null,\n"status": "ConflictStatus.DEFERRED",\n"conflict_type": "ConflictType.EXCEPTION_OCCURRED",\n"description": "Error!",\n"query_ids": []\n}\n],\n"item_changes": [\n{\n"id": "14717ffa-5f72-4d3d-91b4-2abf7ac0fdb7",\n"date_created": "2021-06-17T15:44:00+00:00",\n"operation": "Operation.INSERT",\n"change_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"insert_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"serialization_result": {\n"item_id": "69bdd54f-4048-43ca-8aa1-529cd790098e",\n"entity_name": "my_app_item",\n"serialized_item": ""\n},\n"should_ignore": false,\n"is_applied": false,\n"vector_clock": [\n{\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n{\n"provider_id": "provider2",\n"timestamp": "2021-06-15T15:40:00+00:00"\n},\n{\n"provider_id": "provider3",\n"timestamp": "2021-06-14T15:40:00+00:00"\n}\n]\n}\n],\n"item_versions": [\n{\n"current_item_change": {\n"id": "14717ffa-5f72-4d3d-91b4-2abf7ac0fdb7",\n"date_created": "2021-06-17T15:44:00+00:00",\n"operation": "Operation.INSERT",\n"change_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"insert_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"serialization_result": {\n"item_id": "69bdd54f-4048-43ca-8aa1-529cd790098e",\n"entity_name": "my_app_item",\n"serialized_item": ""\n},\n"should_ignore": false,\n"is_applied": false,\n"vector_clock": [\n{\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n{\n"provider_id": "provider2",\n"timestamp": "2021-06-15T15:40:00+00:00"\n},\n{\n"provider_id": "provider3",\n"timestamp": "2021-06-14T15:40:00+00:00"\n}\n]\n},\n"item_id": "69bdd54f-4048-43ca-8aa1-529cd790098e",\n"vector_clock": [\n{\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n{\n"provider_id": "provider2",\n"timestamp": "2021-06-15T15:40:00+00:00"\n},\n{\n"provider_id": "provider3",\n"timestamp": "2021-06-14T15:40:00+00:00"\n}\n],\n"date_created": "2021-06-26T07:02:00+00:00"\n}\n],\n"sync_sessions": [\n{\n"id": "d797c785-f16b-488c-adfe-79c26717ad59",\n"started_at": "2021-06-26T07:02:00+00:00",\n"ended_at": "2021-06-26T07:03:00+00:00",\n"status": "SyncSessionStatus.FINISHED",\n"source_provider_id": "other_provider",\n"target_provider_id": "provider_in_test",\n"item_changes": [\n{\n"id": "14717ffa-5f72-4d3d-91b4-2abf7ac0fdb7",\n"date_created": "2021-06-17T15:44:00+00:00",\n"operation": "Operation.INSERT",\n"change_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"insert_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"serialization_result": {\n"item_id": "69bdd54f-4048-43ca-8aa1-529cd790098e",\n"entity_name": "my_app_item",\n"serialized_item": ""\n},\n"should_ignore": false,\n"is_applied": false,\n"vector_clock": [\n{\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n{\n"provider_id": "provider2",\n"timestamp": "2021-06-15T15:40:00+00:00"\n},\n{\n"provider_id": "provider3",\n"timestamp": "2021-06-14T15:40:00+00:00"\n}\n]\n}\n],\n"query_id": null\n}\n],\n"items": []\n}',
+            '{\n"conflict_logs": [\n{\n"id": "019124a5-56b4-4d05-bcde-27751cd9c7c1",\n"created_at": "2021-06-26T07:11:00+00:00",\n"resolved_at": null,\n"item_change_loser": {\n"id": "14717ffa-5f72-4d3d-91b4-2abf7ac0fdb7",\n"date_created": "2021-06-17T15:44:00+00:00",\n"operation": "Operation.INSERT",\n"change_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"insert_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"serialization_result": {\n"item_id": "69bdd54f-4048-43ca-8aa1-529cd790098e",\n"entity_name": "my_app_item",\n"serialized_item": ""\n},\n"should_ignore": false,\n"is_applied": false,\n"vector_clock": [\n{\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n{\n"provider_id": "provider2",\n"timestamp": "2021-06-15T15:40:00+00:00"\n},\n{\n"provider_id": "provider3",\n"timestamp": "2021-06-14T15:40:00+00:00"\n}\n]\n},\n"item_change_winner": null,\n"status": "ConflictStatus.DEFERRED",\n"conflict_type": "ConflictType.EXCEPTION_OCCURRED",\n"description": "Error!",\n"query_ids": []\n}\n],\n"item_changes": [\n{\n"id": "14717ffa-5f72-4d3d-91b4-2abf7ac0fdb7",\n"date_created": "2021-06-17T15:44:00+00:00",\n"operation": "Operation.INSERT",\n"change_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"insert_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"serialization_result": {\n"item_id": "69bdd54f-4048-43ca-8aa1-529cd790098e",\n"entity_name": "my_app_item",\n"serialized_item": ""\n},\n"should_ignore": false,\n"is_applied": false,\n"vector_clock": [\n{\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n{\n"provider_id": "provider2",\n"timestamp": "2021-06-15T15:40:00+00:00"\n},\n{\n"provider_id": "provider3",\n"timestamp": "2021-06-14T15:40:00+00:00"\n}\n]\n}\n],\n"item_versions": [\n{\n"current_item_change": {\n"id": "14717ffa-5f72-4d3d-91b4-2abf7ac0fdb7",\n"date_created": "2021-06-17T15:44:00+00:00",\n"operation": "Operation.INSERT",\n"change_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"insert_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"serialization_result": {\n"item_id": "69bdd54f-4048-43ca-8aa1-529cd790098e",\n"entity_name": "my_app_item",\n"serialized_item": ""\n},\n"should_ignore": false,\n"is_applied": false,\n"vector_clock": [\n{\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n{\n"provider_id": "provider2",\n"timestamp": "2021-06-15T15:40:00+00:00"\n},\n{\n"provider_id": "provider3",\n"timestamp": "2021-06-14T15:40:00+00:00"\n}\n]\n},\n"item_id": "69bdd54f-4048-43ca-8aa1-529cd790098e",\n"vector_clock": [\n{\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n{\n"provider_id": "provider2",\n"timestamp": "2021-06-15T15:40:00+00:00"\n},\n{\n"provider_id": "provider3",\n"timestamp": "2021-06-14T15:40:00+00:00"\n}\n],\n"date_created": "2021-06-26T07:02:00+00:00"\n}\n],\n"sync_sessions": [\n{\n"id": "d797c785-f16b-488c-adfe-79c26717ad59",\n"started_at": "2021-06-26T07:02:00+00:00",\n"ended_at": "2021-06-26T07:03:00+00:00",\n"status": "SyncSessionStatus.FINISHED",\n"source_provider_id": "other_provider",\n"target_provider_id": "provider_in_test",\n"item_changes": [\n{\n"id": "14717ffa-5f72-4d3d-91b4-2abf7ac0fdb7",\n"date_created": "2021-06-17T15:44:00+00:00",\n"operation": "Operation.INSERT",\n"change_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"insert_vector_clock_item": {\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n"serialization_result": {\n"item_id": "69bdd54f-4048-43ca-8aa1-529cd790098e",\n"entity_name": "my_app_item",\n"serialized_item": ""\n},\n"should_ignore": false,\n"is_applied": false,\n"vector_clock": [\n{\n"provider_id": "provider1",\n"timestamp": "2021-06-17T15:44:00+00:00"\n},\n{\n"provider_id": "provider2",\n"timestamp": "2021-06-15T15:40:00+00:00"\n},\n{\n"provider_id": "provider3",\n"timestamp": "2021-06-14T15:40:00+00:00"\n}\n]\n}\n],\n"query_id": null,\n"usage": {},\n"stats": {}\n}\n],\n"items": []\n}',
         )
@@ -0,0 +1,55 @@
+from maestro.core.tracing import (
+    InMemorySpanExporter,
+    JSONLinesSpanExporter,
+    NoOpSpan,
+    Tracer,
+)
+import json
+import os
+import tempfile
+import unittest
+
+
+class TracerTest(unittest.TestCase):
+    def test_json_lines_exporter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "spans.jsonl")
+            tracer = Tracer(exporter=JSONLinesSpanExporter(path=path))
+
+            with self.assertRaises(ValueError):
+                with tracer.span("sync_session", query_id=None):
+                    with tracer.span("batch", batch_size=2) as span:
+                        span.set_attribute("is_last_batch", True)
+                    raise ValueError("failed")
+
+            with open(path) as f:
+                batch, session = [json.loads(line) for line in f]
+
+        self.assertEqual(batch["name"], "batch")
+        self.assertEqual(batch["attributes"], {"batch_size": 2, "is_last_batch": True})
+        self.assertEqual(batch["parent_id"], session["span_id"])
+        self.assertEqual(batch["trace_id"], session["span_id"])
+        self.assertIsNone(batch["error"])
+        self.assertEqual(session["name"], "sync_session")
+        self.assertIsNone(session["parent_id"])
+        self.assertEqual(session["error"], "ValueError('failed')")
+
+    def test_get_current_span(self):
+        tracer = Tracer(exporter=InMemorySpanExporter())
+        with tracer.span("process_remote_change") as change_span:
+            with tracer.span("data_store.run_in_transaction") as data_store_span:
+                self.assertIs(tracer.get_current_span(), data_store_span)
+                self.assertIs(
+                    tracer.get_current_span(name="process_remote_change"), change_span
+                )
+                self.assertIsInstance(
+                    tracer.get_current_span(name="sync_session"), NoOpSpan
+                )
+
+    def test_no_op_tracer(self):
+        tracer = Tracer()
+        with tracer.span("sync_session") as span:
+            span.set_attribute("is_complete", True)
+            self.assertIs(tracer.get_current_span(), tracer.get_current_span())
+
+        self.assertEqual(span.attributes, {})